@@ -8,8 +8,8 @@ from alembic import context
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 print("Current sys.path:", sys.path)
 
-# Now you can import your app modules
-from app.database import Base
+# Only the models: importing the app (engine, OAuth, mail) is not needed to migrate
+from app.models.base import Base
 import app.models  # Ensure all models are imported
 
 # Alembic Config object
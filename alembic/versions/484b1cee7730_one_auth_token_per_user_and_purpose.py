@@ -0,0 +1,35 @@
+"""One auth token per user and purpose, so issuing one is a single upsert
+
+Revision ID: 484b1cee7730
+Revises: 0a60f05d1fe8
+Create Date: 2026-10-18 21:12:09.518344
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '484b1cee7730'
+down_revision: Union[str, None] = '0a60f05d1fe8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Issuing a token always deleted the user's earlier ones, so duplicates
+    # can only be leftovers of races; keep the newest.
+    op.execute("""
+        DELETE FROM auth_tokens a
+        USING auth_tokens b
+        WHERE a.user_id = b.user_id AND a.purpose = b.purpose AND a.id < b.id
+    """)
+    # The unique index leads with user_id, so the plain one is redundant
+    op.drop_index(op.f('ix_auth_tokens_user_id'), table_name='auth_tokens')
+    op.create_index('uq_auth_tokens_user_id_purpose', 'auth_tokens', ['user_id', 'purpose'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_auth_tokens_user_id_purpose', table_name='auth_tokens')
+    op.create_index(op.f('ix_auth_tokens_user_id'), 'auth_tokens', ['user_id'], unique=False)
@@ -0,0 +1,60 @@
+"""Move verification/reset tokens into an indexed, expiring auth_tokens table
+
+Revision ID: 85e53b1bfce8
+Revises: 9326dd491d97
+Create Date: 2026-10-18 14:42:37.118902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '85e53b1bfce8'
+down_revision: Union[str, None] = '9326dd491d97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('auth_tokens',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('token_hash', sa.String(length=64), nullable=False),
+    sa.Column('purpose', sa.Enum('email_verification', 'password_reset', name='tokenpurpose'), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_auth_tokens_token_hash'), 'auth_tokens', ['token_hash'], unique=True)
+    op.create_index(op.f('ix_auth_tokens_user_id'), 'auth_tokens', ['user_id'], unique=False)
+    op.create_index(op.f('ix_auth_tokens_expires_at'), 'auth_tokens', ['expires_at'], unique=False)
+
+    # Backfill outstanding tokens. The old column was shared by both flows:
+    # unverified users can only have been sent a verification link, verified
+    # users only a reset link. Existing links get a fresh 48h expiry.
+    op.execute(
+        """
+        INSERT INTO auth_tokens (user_id, token_hash, purpose, expires_at)
+        SELECT id,
+               encode(sha256(convert_to(verification_token, 'UTF8')), 'hex'),
+               CASE WHEN is_verified THEN 'password_reset' ELSE 'email_verification' END::tokenpurpose,
+               now() + interval '48 hours'
+        FROM users
+        WHERE verification_token IS NOT NULL
+        """
+    )
+    op.drop_column('users', 'verification_token')
+
+
+def downgrade() -> None:
+    # Only token hashes are stored, so outstanding links cannot be restored.
+    op.add_column('users', sa.Column('verification_token', sa.String(), nullable=True))
+    op.drop_index(op.f('ix_auth_tokens_expires_at'), table_name='auth_tokens')
+    op.drop_index(op.f('ix_auth_tokens_user_id'), table_name='auth_tokens')
+    op.drop_index(op.f('ix_auth_tokens_token_hash'), table_name='auth_tokens')
+    op.drop_table('auth_tokens')
+    op.execute('DROP TYPE tokenpurpose')
@@ -0,0 +1,55 @@
+"""Add audit_events, partitioned by month with a BRIN index on occurred_at
+
+Revision ID: a3bf41cd076b
+Revises: 484b1cee7730
+Create Date: 2026-10-18 22:41:37.226105
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3bf41cd076b'
+down_revision: Union[str, None] = '484b1cee7730'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('audit_events',
+    sa.Column('id', sa.BigInteger(), sa.Identity(always=False), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('event', sa.String(length=32), nullable=False),
+    sa.Column('success', sa.Boolean(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('ip_address', sa.String(length=45), nullable=True),
+    sa.Column('user_agent', sa.String(length=256), nullable=True),
+    sa.Column('detail', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    # The partition key has to be part of the primary key
+    sa.PrimaryKeyConstraint('id', 'occurred_at'),
+    postgresql_partition_by='RANGE (occurred_at)'
+    )
+    # Catches rows for months the flusher has not created a partition for yet
+    op.execute('CREATE TABLE audit_events_default PARTITION OF audit_events DEFAULT')
+    # The flusher keeps partitions created ahead from now on (AUDIT_PARTITIONS_AHEAD)
+    month = date.today().replace(day=1)
+    for _ in range(3):
+        upper = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        op.execute(f"CREATE TABLE audit_events_p{month:%Y%m} PARTITION OF audit_events "
+                   f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')")
+        month = upper
+    # Indexes on the parent are created on every partition, present and future
+    op.create_index('ix_audit_events_occurred_at', 'audit_events', ['occurred_at'], unique=False, postgresql_using='brin')
+    op.create_index(op.f('ix_audit_events_user_id'), 'audit_events', ['user_id'], unique=False)
+    op.create_index(op.f('ix_audit_events_email'), 'audit_events', ['email'], unique=False)
+
+
+def downgrade() -> None:
+    # Dropping the parent drops every partition with it
+    op.drop_table('audit_events')
@@ -0,0 +1,79 @@
+"""Add care plans, their weekly slots and scheduled visits
+
+Revision ID: a5fc0271167b
+Revises: c1597eccb1fb
+Create Date: 2026-10-18 17:32:08.671245
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5fc0271167b'
+down_revision: Union[str, None] = 'c1597eccb1fb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('care_plans',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('latitude', sa.Float(), nullable=False),
+    sa.Column('longitude', sa.Float(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=True),
+    sa.Column('status', sa.Enum('active', 'paused', 'ended', name='careplanstatus'), nullable=False),
+    sa.Column('scheduled_until', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['customer_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_care_plans_customer_id'), 'care_plans', ['customer_id'], unique=False)
+    op.create_table('care_plan_slots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('care_plan_id', sa.Integer(), nullable=False),
+    sa.Column('weekday', sa.Integer(), nullable=False),
+    sa.Column('start_minute', sa.Integer(), nullable=False),
+    sa.Column('duration_minutes', sa.Integer(), nullable=False),
+    sa.CheckConstraint('weekday BETWEEN 0 AND 6 AND start_minute BETWEEN 0 AND 1439 AND duration_minutes > 0', name='ck_care_plan_slots_range'),
+    sa.ForeignKeyConstraint(['care_plan_id'], ['care_plans.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_care_plan_slots_care_plan_id'), 'care_plan_slots', ['care_plan_id'], unique=False)
+    op.create_table('visits',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('care_plan_id', sa.Integer(), nullable=False),
+    sa.Column('slot_id', sa.Integer(), nullable=True),
+    sa.Column('caregiver_id', sa.Integer(), nullable=True),
+    sa.Column('starts_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('ends_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('status', sa.Enum('unassigned', 'scheduled', 'cancelled', 'completed', name='visitstatus'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['care_plan_id'], ['care_plans.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['caregiver_id'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['slot_id'], ['care_plan_slots.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('care_plan_id', 'slot_id', 'starts_at', name='uq_visits_care_plan_id_slot_id_starts_at')
+    )
+    op.create_index('ix_visits_care_plan_id_starts_at', 'visits', ['care_plan_id', 'starts_at'], unique=False)
+    op.create_index('ix_visits_caregiver_id_starts_at', 'visits', ['caregiver_id', 'starts_at'], unique=False)
+    op.create_index('ix_visits_status_starts_at', 'visits', ['status', 'starts_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_visits_status_starts_at', table_name='visits')
+    op.drop_index('ix_visits_caregiver_id_starts_at', table_name='visits')
+    op.drop_index('ix_visits_care_plan_id_starts_at', table_name='visits')
+    op.drop_table('visits')
+    op.drop_index(op.f('ix_care_plan_slots_care_plan_id'), table_name='care_plan_slots')
+    op.drop_table('care_plan_slots')
+    op.drop_index(op.f('ix_care_plans_customer_id'), table_name='care_plans')
+    op.drop_table('care_plans')
+    op.execute('DROP TYPE visitstatus')
+    op.execute('DROP TYPE careplanstatus')
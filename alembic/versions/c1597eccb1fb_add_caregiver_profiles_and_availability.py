@@ -0,0 +1,63 @@
+"""Add caregiver profiles, weekly availability slots and users.is_approved
+
+Revision ID: c1597eccb1fb
+Revises: ddf14753dda8
+Create Date: 2026-10-18 16:48:31.552093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1597eccb1fb'
+down_revision: Union[str, None] = 'ddf14753dda8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('is_approved', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.create_table('caregiver_profiles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('bio', sa.Text(), nullable=True),
+    sa.Column('services', sa.JSON(), nullable=False),
+    sa.Column('languages', sa.JSON(), nullable=False),
+    sa.Column('hourly_rate', sa.Float(), nullable=False),
+    sa.Column('years_experience', sa.Integer(), nullable=False),
+    sa.Column('rating', sa.Float(), nullable=False),
+    sa.Column('latitude', sa.Float(), nullable=False),
+    sa.Column('longitude', sa.Float(), nullable=False),
+    sa.Column('service_radius_km', sa.Float(), nullable=False),
+    sa.Column('grid_cell', sa.String(length=32), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_caregiver_profiles_user_id'), 'caregiver_profiles', ['user_id'], unique=True)
+    op.create_index(op.f('ix_caregiver_profiles_grid_cell'), 'caregiver_profiles', ['grid_cell'], unique=False)
+    op.create_table('availability_slots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('caregiver_id', sa.Integer(), nullable=False),
+    sa.Column('start_minute', sa.Integer(), nullable=False),
+    sa.Column('end_minute', sa.Integer(), nullable=False),
+    sa.CheckConstraint('start_minute >= 0 AND start_minute < end_minute AND end_minute <= 10080', name='ck_availability_slots_week_range'),
+    sa.ForeignKeyConstraint(['caregiver_id'], ['caregiver_profiles.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_availability_slots_caregiver_id_start_minute', 'availability_slots', ['caregiver_id', 'start_minute'], unique=False)
+    op.create_index('ix_availability_slots_start_minute_end_minute', 'availability_slots', ['start_minute', 'end_minute'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_availability_slots_start_minute_end_minute', table_name='availability_slots')
+    op.drop_index('ix_availability_slots_caregiver_id_start_minute', table_name='availability_slots')
+    op.drop_table('availability_slots')
+    op.drop_index(op.f('ix_caregiver_profiles_grid_cell'), table_name='caregiver_profiles')
+    op.drop_index(op.f('ix_caregiver_profiles_user_id'), table_name='caregiver_profiles')
+    op.drop_table('caregiver_profiles')
+    op.drop_column('users', 'is_approved')
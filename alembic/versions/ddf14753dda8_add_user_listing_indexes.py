@@ -0,0 +1,34 @@
+"""Add composite and trigram indexes for the admin user listings
+
+Revision ID: ddf14753dda8
+Revises: 85e53b1bfce8
+Create Date: 2026-10-18 16:05:12.304417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ddf14753dda8'
+down_revision: Union[str, None] = '85e53b1bfce8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_users_role_id', 'users', ['role', 'id'], unique=False)
+    op.create_index('ix_users_role_is_verified_is_active_id', 'users', ['role', 'is_verified', 'is_active', 'id'], unique=False)
+    op.create_index('ix_users_auth_provider_id', 'users', ['auth_provider', 'id'], unique=False)
+    op.create_index('ix_users_email_trgm', 'users', ['email'], unique=False, postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'})
+    op.create_index('ix_users_full_name_trgm', 'users', ['full_name'], unique=False, postgresql_using='gin', postgresql_ops={'full_name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_full_name_trgm', table_name='users')
+    op.drop_index('ix_users_email_trgm', table_name='users')
+    op.drop_index('ix_users_auth_provider_id', table_name='users')
+    op.drop_index('ix_users_role_is_verified_is_active_id', table_name='users')
+    op.drop_index('ix_users_role_id', table_name='users')
@@ -1,14 +1,38 @@
-from fastapi import Depends, HTTPException
+import ipaddress
+import os
+from json import JSONDecodeError
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.utils.auth_utils import decode_access_token
 from app.crud.user_crud import get_user_by_email
+from app.models.user_model import User, UserRole
 from app.database import get_db
-from app.auth.exceptions import InvalidTokenException
+from app.auth.exceptions import InvalidTokenException, RateLimitExceededException
+from app.utils.rate_limit import rate_limiter, parse_limit
+from app.auth.user_cache import user_cache
+from app.auth.revocation import revocation_index, revoked_rejections
+from app.utils.audit_log import audit_client
 from app.logging_config import logger
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# "count/seconds" per client IP and per account (email)
+RATE_LIMITS = {
+    "login": (
+        parse_limit(os.getenv("RATE_LIMIT_LOGIN_PER_IP", "30/60")),
+        parse_limit(os.getenv("RATE_LIMIT_LOGIN_PER_ACCOUNT", "10/300")),
+    ),
+    "email": (
+        parse_limit(os.getenv("RATE_LIMIT_EMAIL_PER_IP", "10/600")),
+        parse_limit(os.getenv("RATE_LIMIT_EMAIL_PER_ACCOUNT", "3/600")),
+    ),
+}
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+# Proxies in front of the app that append to X-Forwarded-For; the client is
+# the address the outermost of them saw, this many entries from the right.
+RATE_LIMIT_FORWARDED_HOPS = max(1, int(os.getenv("RATE_LIMIT_FORWARDED_HOPS", "1")))
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
@@ -20,13 +44,88 @@ async def get_current_user(
         
         if email is None or role is None:
             raise InvalidTokenException(detail="Token payload missing 'sub' or 'role'.")
-        user = await get_user_by_email(db, email)
-        
+        if revocation_index.is_revoked(payload.get("jti")):
+            revoked_rejections.inc()
+            raise InvalidTokenException(detail="Token has been revoked.")
+        user = await user_cache.get(db, email)
         if user is None:
-            raise InvalidTokenException(detail="User not found.")
+            user = await get_user_by_email(db, email)
+            if user is None:
+                raise InvalidTokenException(detail="User not found.")
+            await user_cache.set(user)
         return user
     
     except InvalidTokenException as e:
         logger.error(f"Invalid token: {e.detail}")
         raise HTTPException(status_code=401, detail=e.detail)
 
+def require_role(*roles: UserRole):
+    """Dependency that lets only users with one of ``roles`` through."""
+    async def dependency(user: User = Depends(get_current_user)) -> User:
+        if user.role not in roles:
+            raise HTTPException(status_code=403, detail="Not permitted for this role")
+        return user
+
+    return dependency
+
+async def require_admin(user: User = Depends(get_current_user)) -> User:
+    if user.role != UserRole.admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
+
+
+
+def client_ip(request: Request) -> str:
+    """The client's address, from X-Forwarded-For when the app sits behind trusted proxies.
+
+    Entries left of the ones our proxies appended are whatever the client
+    sent, so only the entry ``RATE_LIMIT_FORWARDED_HOPS`` from the right is
+    used, and only if it is a valid address.
+    """
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",")]
+        if len(forwarded) >= RATE_LIMIT_FORWARDED_HOPS:
+            try:
+                return str(ipaddress.ip_address(forwarded[-RATE_LIMIT_FORWARDED_HOPS]))
+            except ValueError:
+                pass
+    return request.client.host if request.client else "unknown"
+
+async def audit_request(request: Request) -> None:
+    """Router dependency that tags audit events recorded while serving ``request`` with its client.
+
+    Must stay ``async``: sync dependencies run in a copied context, so the
+    value would not reach the endpoint.
+    """
+    # Cut to the column sizes: one oversized value would fail the whole batch write
+    audit_client.set((client_ip(request)[:45], request.headers.get("user-agent", "")[:256] or None))
+
+async def _account(request: Request, source: str, field: str):
+    if source == "query":
+        value = request.query_params.get(field)
+    else:
+        # FastAPI has already read the body for the endpoint; this is cached.
+        try:
+            body = await request.json()
+        except (JSONDecodeError, UnicodeDecodeError):
+            return None
+        value = body.get(field) if isinstance(body, dict) else None
+    return value.strip().lower() if isinstance(value, str) else None
+
+def rate_limit(action: str, source: str, field: str):
+    """Route dependency enforcing the per-IP and per-account limits for ``action``.
+
+    Used in ``dependencies=[...]`` so it runs before the endpoint touches the
+    database or hashes anything.
+    """
+    per_ip, per_account = RATE_LIMITS[action]
+
+    async def dependency(request: Request):
+        retry_after = await rate_limiter.check(f"{action}_ip", client_ip(request), per_ip)
+        account = await _account(request, source, field)
+        if not retry_after and account:
+            retry_after = await rate_limiter.check(f"{action}_account", account, per_account)
+        if retry_after:
+            raise RateLimitExceededException(retry_after)
+
+    return Depends(dependency)
@@ -13,8 +13,9 @@ class InvalidCredentialsException(Exception):
         super().__init__("Incorrect email or password.")
 
 class InvalidTokenException(Exception):
-    def __init__(self):
-        super().__init__("Invalid token.")
+    def __init__(self, detail: str = "Invalid token."):
+        self.detail = detail
+        super().__init__(detail)
 
 class UnapprovedCaregiverException(Exception):
     def __init__(self):
@@ -38,3 +39,15 @@ class InvalidAuthProviderException(Exception):
 class EmailNotVerifiedException(Exception):
     def __init__(self, message: str = "Email address is not verified."):
         super().__init__(message)
+
+class PasswordHashingBusyException(Exception):
+    def __init__(self, message: str = "Server is busy, please retry shortly."):
+        self.detail = message
+        super().__init__(message)
+
+
+class RateLimitExceededException(Exception):
+    def __init__(self, retry_after: float, message: str = "Too many requests, please try again later."):
+        self.retry_after = retry_after
+        self.detail = message
+        super().__init__(message)
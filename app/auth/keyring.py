@@ -0,0 +1,146 @@
+"""Access-token signing keys, selected by ``kid``.
+
+With ``JWT_KEYS_DIR`` set, access tokens are signed with an asymmetric
+key from that directory (ES256 for P-256 keys, RS256 for RSA keys) and
+carry its ``kid``; the public halves are published at
+``/.well-known/jwks.json`` so other services can verify tokens locally.
+Every ``*.pem`` file in the directory is a key whose ``kid`` is the file
+name: private keys can sign and verify, public-only keys (retired ones)
+only verify. ``JWT_ACTIVE_KID`` picks the signing key, defaulting to the
+last private key by name (``app.cli.keys`` names keys by date).
+
+Rotation: add the new key to every instance while the old one stays
+active, wait for verifiers' JWKS caches (``JWKS_MAX_AGE_SECONDS``), then
+switch ``JWT_ACTIVE_KID``. Retire the old key to public-only and delete it
+once the last token it signed has expired.
+
+Without a keys directory tokens are signed with HS256 and ``JWT_SECRET``
+as before. Tokens without a ``kid`` are only accepted while
+``JWT_ACCEPT_HS256`` is on and a secret is configured, which lets tokens
+issued before the switch live out their lifetime.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+from dotenv import load_dotenv
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+from app.auth.exceptions import InvalidTokenException
+from app.logging_config import logger
+
+load_dotenv()
+
+JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR")
+JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID")
+JWT_SECRET = os.getenv("JWT_SECRET")
+JWT_ACCEPT_HS256 = os.getenv("JWT_ACCEPT_HS256", "true").lower() == "true"
+JWKS_MAX_AGE_SECONDS = int(os.getenv("JWKS_MAX_AGE_SECONDS", "300"))
+
+FALLBACK_SECRET = "fallback-secret-key"
+LEGACY_ALGORITHM = "HS256"
+
+
+class SigningKey(NamedTuple):
+    kid: str
+    algorithm: str
+    public: Key
+    private: Optional[Key]
+
+
+def _algorithm_for(key) -> str:
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        if key.curve.name != "secp256r1":
+            raise ValueError(f"unsupported curve {key.curve.name}; use P-256")
+        return "ES256"
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return "RS256"
+    raise ValueError(f"unsupported key type {type(key).__name__}")
+
+
+def load_key(path: Path) -> SigningKey:
+    pem = path.read_bytes()
+    kid = path.name[:-len(".pem")]
+    if b"PRIVATE KEY" in pem:
+        algorithm = _algorithm_for(load_pem_private_key(pem, password=None))
+        private = jwk.construct(pem, algorithm)
+        return SigningKey(kid, algorithm, private.public_key(), private)
+    algorithm = _algorithm_for(load_pem_public_key(pem))
+    return SigningKey(kid, algorithm, jwk.construct(pem, algorithm), None)
+
+
+class KeyRing:
+    def __init__(self, keys_dir: Optional[str], active_kid: Optional[str], secret: Optional[str],
+                 accept_hs256: bool = True):
+        self.keys_dir = keys_dir
+        self.active_kid = active_kid
+        self.secret = secret or FALLBACK_SECRET
+        self.accept_hs256 = accept_hs256 and (secret is not None or not keys_dir)
+        self.keys: Dict[str, SigningKey] = {}
+        self.active: Optional[SigningKey] = None
+        self._jwks = b'{"keys":[]}'
+        self._etag = '""'
+        self.loaded = False
+
+    def load(self) -> "KeyRing":
+        keys = {}
+        if self.keys_dir:
+            for path in sorted(Path(self.keys_dir).glob("*.pem")):
+                key = load_key(path)
+                keys[key.kid] = key
+        signing = [kid for kid, key in keys.items() if key.private is not None]
+        active_kid = self.active_kid or (signing[-1] if signing else None)
+        if self.keys_dir and active_kid not in signing:
+            raise RuntimeError(f"No private signing key '{active_kid}' in {self.keys_dir}")
+        self.keys = keys
+        self.active = keys.get(active_kid)
+        self._jwks = json.dumps({"keys": [
+            {**key.public.to_dict(), "kid": kid, "use": "sig", "alg": key.algorithm}
+            for kid, key in keys.items()
+        ]}, separators=(",", ":")).encode()
+        self._etag = f'"{hashlib.sha256(self._jwks).hexdigest()[:32]}"'
+        if self.active is not None:
+            logger.info(f"Signing access tokens with {self.active.algorithm} key '{self.active.kid}' "
+                        f"({len(keys)} keys published)")
+        elif self.secret == FALLBACK_SECRET:
+            logger.warning("JWT_SECRET is not set; access tokens are signed with a built-in fallback secret")
+        self.loaded = True
+        return self
+
+    def sign(self, claims: dict) -> str:
+        if not self.loaded:
+            self.load()
+        if self.active is None:
+            return jwt.encode(claims, self.secret, algorithm=LEGACY_ALGORITHM)
+        return jwt.encode(claims, self.active.private, algorithm=self.active.algorithm,
+                          headers={"kid": self.active.kid})
+
+    def decode(self, token: str) -> dict:
+        if not self.loaded:
+            self.load()
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            if kid is None:
+                if not self.accept_hs256:
+                    raise InvalidTokenException(detail="Token has no key id.")
+                return jwt.decode(token, self.secret, algorithms=[LEGACY_ALGORITHM])
+            key = self.keys.get(kid)
+            if key is None:
+                raise InvalidTokenException(detail="Token signed with an unknown key.")
+            # The algorithm is pinned per key, never taken from the token
+            return jwt.decode(token, key.public, algorithms=[key.algorithm])
+        except JWTError as e:
+            raise InvalidTokenException(detail=str(e))
+
+    def jwks(self) -> Tuple[bytes, str]:
+        """The JWKS document (serialized once per load) and its ETag."""
+        if not self.loaded:
+            self.load()
+        return self._jwks, self._etag
+
+
+# Loaded at startup (see app.startup), or on first use outside the app
+keyring = KeyRing(JWT_KEYS_DIR, JWT_ACTIVE_KID, JWT_SECRET, JWT_ACCEPT_HS256)
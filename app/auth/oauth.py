@@ -1,34 +1,84 @@
 # app/oauth.py
 from authlib.integrations.starlette_client import OAuth
+from fastapi import HTTPException
 from starlette.config import Config
+from app.auth.oauth_metadata import (
+    OAUTH_HTTP_TIMEOUT_SECONDS,
+    ProviderMetadata,
+    oauth_metadata,
+    shared_transport,
+)
+from app.logging_config import logger
 
 config = Config('.env')  # Load environment variables
 
 oauth = OAuth(config)
 
-# Google OAuth Configuration
-oauth.register(
-    name='google',
-    client_id=config('GOOGLE_CLIENT_ID'),
-    client_secret=config('GOOGLE_CLIENT_SECRET'),
-    server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-    client_kwargs={
-        'scope': 'openid email profile'
-    }
-)
+GOOGLE_DISCOVERY_URL = config('GOOGLE_DISCOVERY_URL', default='https://accounts.google.com/.well-known/openid-configuration')
 
-# Facebook OAuth Configuration
-oauth.register(
-    name='facebook',
-    client_id=config('FACEBOOK_APP_ID'),
-    client_secret=config('FACEBOOK_APP_SECRET'),
-    access_token_url='https://graph.facebook.com/v10.0/oauth/access_token',
-    authorize_url='https://www.facebook.com/v10.0/dialog/oauth',
-    api_base_url='https://graph.facebook.com/',
-    client_kwargs={
-        'scope': 'email public_profile'
-    }
-)
+# Discovery document and JWKS are cached and refreshed in the background,
+# once register_clients() finds Google configured
+google_metadata = ProviderMetadata('google', GOOGLE_DISCOVERY_URL)
+
+_registered = False
+
+
+def register_clients() -> None:
+    """Register the OAuth clients whose credentials are configured.
+
+    Called at startup rather than import, so a missing provider secret
+    disables that sign-in option instead of failing every import of the
+    app (migrations, CLI commands).
+    """
+    global _registered
+    if _registered:
+        return
+    _registered = True
+
+    if config('GOOGLE_CLIENT_ID', default=None) and config('GOOGLE_CLIENT_SECRET', default=None):
+        # Google OAuth Configuration
+        oauth.register(
+            name='google',
+            client_id=config('GOOGLE_CLIENT_ID'),
+            client_secret=config('GOOGLE_CLIENT_SECRET'),
+            server_metadata_url=GOOGLE_DISCOVERY_URL,
+            client_kwargs={
+                'scope': 'openid email profile',
+                'transport': shared_transport,
+                'timeout': OAUTH_HTTP_TIMEOUT_SECONDS,
+            }
+        )
+        google_metadata.bind(oauth.google)
+        oauth_metadata.register(google_metadata)
+    else:
+        logger.warning("GOOGLE_CLIENT_ID/GOOGLE_CLIENT_SECRET not set; Google sign-in is disabled")
+
+    if config('FACEBOOK_APP_ID', default=None) and config('FACEBOOK_APP_SECRET', default=None):
+        # Facebook OAuth Configuration
+        oauth.register(
+            name='facebook',
+            client_id=config('FACEBOOK_APP_ID'),
+            client_secret=config('FACEBOOK_APP_SECRET'),
+            access_token_url='https://graph.facebook.com/v10.0/oauth/access_token',
+            authorize_url='https://www.facebook.com/v10.0/dialog/oauth',
+            api_base_url='https://graph.facebook.com/',
+            client_kwargs={
+                'scope': 'email public_profile',
+                'transport': shared_transport,
+                'timeout': OAUTH_HTTP_TIMEOUT_SECONDS,
+            }
+        )
+    else:
+        logger.warning("FACEBOOK_APP_ID/FACEBOOK_APP_SECRET not set; Facebook sign-in is disabled")
+
+
+def get_client(name: str):
+    """The registered client for ``name``; 404 when that provider is not configured."""
+    register_clients()
+    client = oauth.create_client(name)
+    if client is None:
+        raise HTTPException(status_code=404, detail=f"{name.capitalize()} sign-in is not configured")
+    return client
 
 # Apple OAuth Configuration
 # oauth.register(
@@ -0,0 +1,258 @@
+"""HTTP plumbing shared by the OAuth providers.
+
+authlib opens a new ``httpx`` client for every token exchange, metadata
+fetch and API call, so each social login paid for fresh TCP+TLS handshakes
+to the provider. Every client now runs on one pooled keep-alive transport,
+and the OpenID discovery document and JWKS are cached (refreshed in the
+background before they expire) so ID tokens can be verified locally.
+"""
+import asyncio
+import os
+import re
+import time
+from typing import Callable, Dict, Optional
+
+import httpx
+from authlib.jose import JsonWebKey, jwt
+from authlib.jose.errors import JoseError
+from dotenv import load_dotenv
+from app.auth.exceptions import InvalidTokenException
+from app.utils.instrumentation import span
+from app.utils.metrics import metrics
+from app.logging_config import logger
+
+load_dotenv()
+
+OAUTH_HTTP_MAX_CONNECTIONS = int(os.getenv("OAUTH_HTTP_MAX_CONNECTIONS", "20"))
+OAUTH_HTTP_MAX_KEEPALIVE = int(os.getenv("OAUTH_HTTP_MAX_KEEPALIVE", "10"))
+OAUTH_HTTP_KEEPALIVE_SECONDS = float(os.getenv("OAUTH_HTTP_KEEPALIVE_SECONDS", "60"))
+OAUTH_HTTP_TIMEOUT_SECONDS = float(os.getenv("OAUTH_HTTP_TIMEOUT_SECONDS", "10"))
+# Upper bound on how long discovery/JWKS documents are cached; a shorter
+# Cache-Control max-age from the provider wins.
+OAUTH_METADATA_TTL_SECONDS = float(os.getenv("OAUTH_METADATA_TTL_SECONDS", "3600"))
+OAUTH_METADATA_REFRESH_MARGIN_SECONDS = float(os.getenv("OAUTH_METADATA_REFRESH_MARGIN_SECONDS", "300"))
+# Backoff between failed background refreshes: doubles from the base up to the max
+OAUTH_METADATA_RETRY_BASE_SECONDS = float(os.getenv("OAUTH_METADATA_RETRY_BASE_SECONDS", "5"))
+OAUTH_METADATA_RETRY_MAX_SECONDS = float(os.getenv("OAUTH_METADATA_RETRY_MAX_SECONDS", "300"))
+OAUTH_ID_TOKEN_LEEWAY_SECONDS = int(os.getenv("OAUTH_ID_TOKEN_LEEWAY_SECONDS", "60"))
+
+metadata_refreshes = metrics.counter("oauth_metadata_refresh_total", "Discovery/JWKS refreshes by provider and outcome.")
+id_token_verifications = metrics.counter("oauth_id_token_verifications_total", "Local ID token checks by provider and outcome.")
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class SharedTransport(httpx.AsyncBaseTransport):
+    """Hands requests to one pooled transport and ignores close calls.
+
+    authlib closes its client after every call; passing this wrapper as the
+    client's transport keeps the underlying connections alive between calls.
+    The pooled transport (and its TLS context, which takes a while to load)
+    is created on the first request.
+    """
+
+    def __init__(self, factory: Callable[[], httpx.AsyncBaseTransport]):
+        self.factory = factory
+        self.transport: Optional[httpx.AsyncBaseTransport] = None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.transport is None:
+            self.transport = self.factory()
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        """Really close the pooled connections (at shutdown)."""
+        if self.transport is not None:
+            await self.transport.aclose()
+            self.transport = None
+
+
+def create_transport() -> httpx.AsyncBaseTransport:
+    return httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=OAUTH_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=OAUTH_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=OAUTH_HTTP_KEEPALIVE_SECONDS,
+        ),
+        retries=1,
+    )
+
+
+shared_transport = SharedTransport(create_transport)
+http_client = httpx.AsyncClient(transport=shared_transport, timeout=OAUTH_HTTP_TIMEOUT_SECONDS)
+
+
+def _max_age(response: httpx.Response, default: float) -> float:
+    match = _MAX_AGE.search(response.headers.get("cache-control", ""))
+    return min(default, float(match.group(1))) if match else default
+
+
+class ProviderMetadata:
+    """Cached OpenID discovery document and JWKS for one provider.
+
+    The cached documents are also written into the authlib client's
+    ``server_metadata`` (with the ``_loaded_at`` and ``jwks`` keys authlib
+    looks for), so its own token exchange and ID-token parsing never fetch
+    them on the request path either.
+    """
+
+    def __init__(self, name: str, discovery_url: str, client: httpx.AsyncClient = http_client,
+                 ttl: float = OAUTH_METADATA_TTL_SECONDS,
+                 refresh_margin: float = OAUTH_METADATA_REFRESH_MARGIN_SECONDS,
+                 leeway: int = OAUTH_ID_TOKEN_LEEWAY_SECONDS,
+                 retry_base: float = OAUTH_METADATA_RETRY_BASE_SECONDS,
+                 retry_max: float = OAUTH_METADATA_RETRY_MAX_SECONDS):
+        self.name = name
+        self.discovery_url = discovery_url
+        self.client = client
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.leeway = leeway
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.failures = 0  # consecutive failed background refreshes
+        self.document: Optional[dict] = None
+        self.jwks: Optional[dict] = None
+        self.key_set = None
+        self.expires_at = 0.0
+        self.targets = []  # authlib ``server_metadata`` dicts kept in sync
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def bind(self, oauth_app) -> None:
+        self.targets.append(oauth_app.server_metadata)
+        if self.document is not None:
+            self._publish(oauth_app.server_metadata)
+
+    def _publish(self, target: dict) -> None:
+        target.update(self.document)
+        target["jwks"] = self.jwks
+        target["_loaded_at"] = time.time()
+
+    async def refresh(self) -> None:
+        try:
+            with span("oauth_metadata"):
+                response = await self.client.get(self.discovery_url)
+                response.raise_for_status()
+                document = response.json()
+                ttl = _max_age(response, self.ttl)
+                response = await self.client.get(document["jwks_uri"])
+                response.raise_for_status()
+                jwks = response.json()
+                ttl = _max_age(response, ttl)
+            key_set = JsonWebKey.import_key_set(jwks)
+        except Exception:
+            metadata_refreshes.inc(provider=self.name, outcome="error")
+            raise
+        self.document, self.jwks, self.key_set = document, jwks, key_set
+        self.expires_at = time.monotonic() + ttl
+        self.failures = 0
+        for target in self.targets:
+            self._publish(target)
+        metadata_refreshes.inc(provider=self.name, outcome="ok")
+        logger.info(f"Loaded {self.name} OAuth metadata ({len(jwks.get('keys', []))} keys, ttl {ttl:.0f}s)")
+
+    async def get(self) -> dict:
+        if self.document is None or time.monotonic() >= self.expires_at:
+            async with self._lock:
+                if self.document is None:
+                    await self.refresh()
+                elif time.monotonic() >= self.expires_at:
+                    try:
+                        await self.refresh()
+                    except Exception as e:
+                        # A stale JWKS is still better than failing every login.
+                        logger.error(f"Refreshing {self.name} OAuth metadata failed, serving cached copy: {e}")
+        return self.document
+
+    async def verify_id_token(self, id_token: str, client_id: str, nonce: Optional[str] = None) -> dict:
+        """Check an ID token's signature and claims against the cached JWKS."""
+        document = await self.get()
+        issuer = document["issuer"]
+        claims_options = {
+            # Google still issues some tokens with the scheme-less issuer.
+            "iss": {"essential": True, "values": [issuer, issuer.replace("https://", "", 1)]},
+            "aud": {"essential": True, "value": client_id},
+            "exp": {"essential": True},
+        }
+        if nonce is not None:
+            claims_options["nonce"] = {"essential": True, "value": nonce}
+        with span("oauth_id_token"):
+            try:
+                try:
+                    claims = jwt.decode(id_token, self.key_set, claims_options=claims_options)
+                except ValueError:
+                    # Unknown kid: the provider rotated keys since the last refresh.
+                    async with self._lock:
+                        await self.refresh()
+                    claims = jwt.decode(id_token, self.key_set, claims_options=claims_options)
+                claims.validate(leeway=self.leeway)
+            except (JoseError, ValueError) as e:
+                id_token_verifications.inc(provider=self.name, outcome="invalid")
+                logger.warning(f"Rejected {self.name} ID token: {e}")
+                raise InvalidTokenException("Invalid ID token.")
+        id_token_verifications.inc(provider=self.name, outcome="ok")
+        return dict(claims)
+
+    def _next_delay(self) -> float:
+        if self.failures:
+            return min(self.retry_max, self.retry_base * 2 ** (self.failures - 1))
+        return max(self.expires_at - time.monotonic() - self.refresh_margin, 1.0)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._next_delay())
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep serving the cached copy; back off until the provider answers again.
+                self.failures += 1
+                logger.error(f"Refreshing {self.name} OAuth metadata failed "
+                             f"(retrying in {self._next_delay():.0f}s): {e}")
+
+    async def start(self) -> None:
+        if self._task is None:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.failures = 1
+                logger.error(f"Loading {self.name} OAuth metadata failed, "
+                             f"retrying in {self._next_delay():.0f}s: {e}")
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class OAuthMetadataCache:
+    def __init__(self):
+        self.providers: Dict[str, ProviderMetadata] = {}
+
+    def register(self, provider: ProviderMetadata) -> ProviderMetadata:
+        self.providers[provider.name] = provider
+        return provider
+
+    def get(self, name: str) -> ProviderMetadata:
+        return self.providers[name]
+
+    async def start(self) -> None:
+        await asyncio.gather(*(provider.start() for provider in self.providers.values()))
+
+    async def stop(self) -> None:
+        for provider in self.providers.values():
+            await provider.stop()
+        await shared_transport.close()
+
+
+oauth_metadata = OAuthMetadataCache()
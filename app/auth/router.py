@@ -1,17 +1,23 @@
+from typing import Optional
 from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.schemas.user_schemas import UserCreate, UserResponse, LoginRequest
+from app.schemas.user_schemas import UserCreate, UserResponse, LoginRequest, serialize_user
 from app.auth.exceptions import *
 from app.services.user_service import UserService
+from app.services.token_service import TokenService
 from app.database import get_db
 from app.schemas.token_schemas import Token
 from app.logging_config import logger
-from app.auth.oauth import oauth
+from app.auth.oauth import get_client
+from app.auth.dependencies import audit_request, get_current_user, oauth2_scheme, rate_limit
+from app.utils.auth_utils import decode_access_token
+from app.utils.responses import trusted_response
 from starlette.responses import RedirectResponse
 
 router = APIRouter(
     prefix="/auth",
     tags=["auth"],
+    dependencies=[Depends(audit_request)],
 )
 
 @router.post("/signup", response_model=UserResponse)
@@ -22,7 +28,7 @@ async def signup(
     service = UserService(db)
     try:
         user = await service.signup(user_data)
-        return user
+        return trusted_response(serialize_user(user))
     except UserAlreadyExistsException as e:
         logger.error(f"Signup error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -30,7 +36,7 @@ async def signup(
         logger.error(f"Signup error: {e}")
         raise HTTPException(status_code=403, detail=str(e))
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[rate_limit("login", "body", "username")])
 async def login(
     login_request: LoginRequest,
     db: AsyncSession = Depends(get_db)
@@ -38,10 +44,39 @@ async def login(
     service = UserService(db)
     try:
         token = await service.login(login_request)
-        return token
+        return trusted_response(token)
     except (InvalidCredentialsException, UnapprovedCaregiverException) as e:
         logger.warning(f"Login failed: {e}")
         raise HTTPException(status_code=401, detail=str(e))
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    refresh_token: str = Body(..., embed=True),
+    db: AsyncSession = Depends(get_db)
+):
+    """Exchange a refresh token for a new access/refresh pair; the old refresh token stops working."""
+    try:
+        return trusted_response(await TokenService(db).refresh(refresh_token))
+    except (InvalidTokenException, UnapprovedCaregiverException) as e:
+        logger.warning(f"Token refresh failed: {e}")
+        raise HTTPException(status_code=401, detail=str(e))
+
+@router.post("/logout", status_code=204)
+async def logout(
+    refresh_token: Optional[str] = Body(None, embed=True),
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    """Revoke the presented access token and, if given, the refresh token's whole family."""
+    try:
+        payload = decode_access_token(token)
+    except InvalidTokenException as e:
+        raise HTTPException(status_code=401, detail=e.detail)
+    await TokenService(db).logout(payload, refresh_token)
+
+@router.get("/me", response_model=UserResponse)
+async def read_current_user(current_user = Depends(get_current_user)):
+    return trusted_response(serialize_user(current_user))
     
 @router.get("/verify-email")
 async def verify_email(
@@ -52,7 +87,7 @@ async def verify_email(
     await service.verify_email(token)
     return {"detail": "Email verified successfully"}
 
-@router.post("/resend-verification")
+@router.post("/resend-verification", dependencies=[rate_limit("email", "query", "email")])
 async def resend_verification(
     email: str = Query(...),
     db: AsyncSession = Depends(get_db)
@@ -61,7 +96,7 @@ async def resend_verification(
     await service.resend_verification_email(email)
     return {"detail": "Verification email resent"}
 
-@router.post("/forgot-password")
+@router.post("/forgot-password", dependencies=[rate_limit("email", "body", "email")])
 async def forgot_password(
     email: str = Body(..., embed=True),
     db: AsyncSession = Depends(get_db)
@@ -91,19 +126,19 @@ async def reset_password(
 @router.get('/google')
 async def auth_google(request: Request):
     redirect_uri = request.url_for('auth_google_callback')
-    return await oauth.google.authorize_redirect(request, redirect_uri)
+    return await get_client('google').authorize_redirect(request, redirect_uri)
 
 @router.get('/facebook')
 async def auth_facebook(request: Request):
     redirect_uri = request.url_for('auth_facebook_callback')
-    return await oauth.facebook.authorize_redirect(request, redirect_uri)
+    return await get_client('facebook').authorize_redirect(request, redirect_uri)
 
 @router.get('/google/callback')
 async def auth_google_callback(request: Request, db: AsyncSession = Depends(get_db)):
     service = UserService(db)
     try:
         token = await service.authenticate_with_google(request)
-        return token
+        return trusted_response(token)
     except Exception as e:
         logger.error(f"Google authentication failed: {e}")
         raise HTTPException(status_code=400, detail="Google authentication failed")
@@ -113,7 +148,7 @@ async def auth_facebook_callback(request: Request, db: AsyncSession = Depends(ge
     service = UserService(db)
     try:
         token = await service.authenticate_with_facebook(request)
-        return token
+        return trusted_response(token)
     except Exception as e:
         logger.error(f"Facebook authentication failed: {e}")
         raise HTTPException(status_code=400, detail="Facebook authentication failed")
\ No newline at end of file
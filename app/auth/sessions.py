@@ -0,0 +1,206 @@
+"""Server-side sessions for the OAuth redirect flow.
+
+The only session data the app has is authlib's OAuth ``state`` between
+``/auth/google`` (or ``/auth/facebook``) and its callback. Instead of
+signing and serializing that into a cookie on every response, the cookie
+carries an opaque random ID and the data lives in a session backend: an
+in-memory LRU with TTL (single worker, or sticky sessions), a table in
+shared memory (every worker of the prefork server, ``app.cli.serve``) or
+Redis (shared by every worker and pod). The ID is 256 random bits, so it needs
+no signature and there is no session secret to manage.
+
+Only requests under ``SESSION_PATHS`` get ``request.session``; every other
+route passes through the middleware after one prefix check, with no
+cookie parsing and no backend I/O. The cookie is scoped to
+``SESSION_COOKIE_PATH`` so browsers do not send it elsewhere either. A
+session is written only when its contents changed and deleted once it is
+empty, which authlib does when the callback consumes the state.
+"""
+import json
+import os
+import secrets
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+from dotenv import load_dotenv
+from starlette.requests import cookie_parser
+from app.utils.cache import TTLCache
+from app.utils.metrics import metrics
+from app.logging_config import logger
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # redis is only needed for the shared backend
+    redis = None
+
+load_dotenv()
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")  # memory | redis | shared
+# Time allowed between starting an OAuth login and the provider's callback
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "900"))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "100000"))
+SESSION_COOKIE_NAME = os.getenv("SESSION_COOKIE_NAME", "sid")
+SESSION_COOKIE_PATH = os.getenv("SESSION_COOKIE_PATH", "/auth")
+SESSION_COOKIE_SECURE = os.getenv("SESSION_COOKIE_SECURE", "false").lower() == "true"
+SESSION_PATHS = tuple(path for path in os.getenv("SESSION_PATHS", "/auth/google,/auth/facebook").split(",") if path)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+session_operations = metrics.counter("session_store_operations_total", "Session backend reads, writes and deletes.")
+sessions_unsaved = metrics.counter("session_store_unsaved_total",
+                                   "Sessions not stored because the shared table was full or the session too large.")
+
+
+class SessionBackend(ABC):
+    """Storage interface for serialized sessions, keyed by session ID."""
+
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def set(self, session_id: str, value: str, ttl: int) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        ...
+
+
+class InMemorySessionBackend(SessionBackend):
+    def __init__(self, maxsize: int, ttl: int):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl, name="sessions")
+
+    async def get(self, session_id: str) -> Optional[str]:
+        return self.cache.get(session_id)
+
+    async def set(self, session_id: str, value: str, ttl: int) -> None:
+        self.cache.set(session_id, value, ttl=ttl)
+
+    async def delete(self, session_id: str) -> None:
+        self.cache.pop(session_id)
+
+
+class RedisSessionBackend(SessionBackend):
+    """Shared backend: the callback may land on another worker than the redirect."""
+
+    def __init__(self, url: str, prefix: str = "session:"):
+        if redis is None:
+            raise RuntimeError("SESSION_BACKEND=redis requires the 'redis' package")
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, session_id: str) -> Optional[str]:
+        raw = await self.client.get(self.prefix + session_id)
+        return raw.decode() if raw is not None else None
+
+    async def set(self, session_id: str, value: str, ttl: int) -> None:
+        await self.client.set(self.prefix + session_id, value, ex=ttl)
+
+    async def delete(self, session_id: str) -> None:
+        await self.client.delete(self.prefix + session_id)
+
+
+class SharedMemorySessionBackend(SessionBackend):
+    """Shares sessions between the workers of one prefork server.
+
+    A session that does not fit (the table is full around its ID, or it is
+    larger than ``SESSION_SHM_VALUE_BYTES``) is not stored, and the login
+    it belongs to fails at the callback; ``session_store_unsaved_total``
+    counts these.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    async def get(self, session_id: str) -> Optional[str]:
+        raw = self.table.get(session_id)
+        return raw.decode() if raw is not None else None
+
+    async def set(self, session_id: str, value: str, ttl: int) -> None:
+        if not self.table.set(session_id, value.encode(), ttl):
+            sessions_unsaved.inc()
+            logger.warning("Session not stored in shared memory; raise SESSION_SHM_SLOTS or SESSION_SHM_VALUE_BYTES")
+
+    async def delete(self, session_id: str) -> None:
+        self.table.delete(session_id)
+
+
+class ServerSessionMiddleware:
+    """Drop-in for Starlette's ``SessionMiddleware`` on ``paths``, backed by ``backend``.
+
+    Plain ASGI middleware: requests outside ``paths`` cost one
+    ``str.startswith``.
+    """
+
+    def __init__(self, app, backend: SessionBackend, paths: Tuple[str, ...] = SESSION_PATHS,
+                 cookie_name: str = SESSION_COOKIE_NAME, cookie_path: str = SESSION_COOKIE_PATH,
+                 ttl: int = SESSION_TTL_SECONDS, secure: bool = SESSION_COOKIE_SECURE):
+        self.app = app
+        self.backend = backend
+        self.paths = paths
+        self.cookie_name = cookie_name
+        self.ttl = ttl
+        self.cookie_attributes = f"path={cookie_path}; httponly; samesite=lax" + ("; secure" if secure else "")
+
+    def _session_id(self, scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == b"cookie":
+                return cookie_parser(value.decode("latin-1")).get(self.cookie_name)
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        session_id = self._session_id(scope)
+        stored = None
+        if session_id:
+            session_operations.inc(op="get")
+            stored = await self.backend.get(session_id)
+            if stored is None:
+                # Expired or unknown; never adopt an ID the client chose
+                session_id = None
+        scope["session"] = json.loads(stored) if stored else {}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                cookie = await self._save(scope["session"], session_id, stored)
+                if cookie is not None:
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _save(self, session: dict, session_id: Optional[str], stored: Optional[str]) -> Optional[str]:
+        """Persist ``session`` if it changed; returns a Set-Cookie value when the cookie must change."""
+        if not session:
+            if session_id is None:
+                return None
+            session_operations.inc(op="delete")
+            await self.backend.delete(session_id)
+            return f"{self.cookie_name}=null; {self.cookie_attributes}; max-age=0"
+        # Serializing catches changes inside nested values, which authlib makes
+        value = json.dumps(session, separators=(",", ":"))
+        if value == stored:
+            return None
+        cookie = None
+        if session_id is None:
+            session_id = secrets.token_urlsafe(32)
+            cookie = f"{self.cookie_name}={session_id}; {self.cookie_attributes}; max-age={self.ttl}"
+        session_operations.inc(op="set")
+        await self.backend.set(session_id, value, self.ttl)
+        return cookie
+
+
+def create_backend() -> SessionBackend:
+    if SESSION_BACKEND == "redis":
+        logger.info("Using Redis session backend")
+        return RedisSessionBackend(REDIS_URL)
+    if SESSION_BACKEND == "shared":
+        from app.utils import shared_memory
+        if shared_memory.session_table is None:
+            raise RuntimeError("SESSION_BACKEND=shared requires the prefork server (python -m app.cli.serve)")
+        logger.info("Using shared-memory session backend")
+        return SharedMemorySessionBackend(shared_memory.session_table)
+    return InMemorySessionBackend(SESSION_MAX_ENTRIES, SESSION_TTL_SECONDS)
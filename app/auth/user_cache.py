@@ -0,0 +1,164 @@
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Optional
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from app.models.user_model import User
+from app.utils.cache import TTLCache
+from app.utils.metrics import metrics
+from app.logging_config import logger
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # redis is only needed for the shared backend
+    redis = None
+
+load_dotenv()
+
+USER_CACHE_BACKEND = os.getenv("USER_CACHE_BACKEND", "memory")  # memory | redis | none
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+user_cache_hits = metrics.counter("user_cache_hits_total", "get_current_user lookups served from the user cache.")
+user_cache_misses = metrics.counter("user_cache_misses_total", "get_current_user lookups that went to the database.")
+user_cache_invalidations = metrics.counter("user_cache_invalidations_total", "Explicit user cache invalidations.")
+
+
+# Left out of cached users so password hashes never reach a shared store
+# like Redis; get_current_user does not need them and login loads the row.
+UNCACHED_COLUMNS = frozenset({"hashed_password"})
+
+
+def user_to_dict(user: User, exclude: frozenset = frozenset()) -> dict:
+    data = {}
+    for column in User.__table__.columns:
+        if column.key in exclude:
+            continue
+        value = getattr(user, column.key)
+        data[column.key] = value.value if hasattr(value, "value") else value
+    return data
+
+
+def user_from_dict(data: dict) -> User:
+    values = {}
+    for column in User.__table__.columns:
+        if column.key not in data:
+            # Left unloaded rather than None, so it cannot pass for "no password"
+            continue
+        value = data[column.key]
+        enum_class = getattr(column.type, "enum_class", None)
+        if enum_class is not None and value is not None:
+            value = enum_class(value)
+        values[column.key] = value
+    user = User(**values)
+    # Mark the row as already persisted so it can be merged without a SELECT.
+    make_transient_to_detached(user)
+    return user
+
+
+class UserCacheBackend(ABC):
+    """Storage interface for cached user rows, keyed by email."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: dict, ttl: int) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+
+class InMemoryUserCacheBackend(UserCacheBackend):
+    def __init__(self, maxsize: int, ttl: int):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl, name="users")
+
+    async def get(self, key: str) -> Optional[dict]:
+        return self.cache.get(key)
+
+    async def set(self, key: str, value: dict, ttl: int) -> None:
+        self.cache.set(key, value, ttl=ttl)
+
+    async def delete(self, key: str) -> None:
+        self.cache.pop(key)
+
+
+class RedisUserCacheBackend(UserCacheBackend):
+    """Shared backend for deployments running several workers or pods."""
+
+    def __init__(self, url: str, prefix: str = "user:"):
+        if redis is None:
+            raise RuntimeError("USER_CACHE_BACKEND=redis requires the 'redis' package")
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: dict, ttl: int) -> None:
+        await self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+
+class UserCache:
+    """Caches user rows for ``get_current_user``.
+
+    Anything that changes a user row must call ``invalidate`` with the
+    user's email once the change is committed.
+    """
+
+    def __init__(self, backend: Optional[UserCacheBackend], ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+
+    async def get(self, db: AsyncSession, email: str) -> Optional[User]:
+        if self.backend is None:
+            return None
+        data = await self.backend.get(email)
+        if data is None:
+            user_cache_misses.inc()
+            return None
+        user_cache_hits.inc()
+        return await db.merge(user_from_dict(data), load=False)
+
+    async def set(self, user: User) -> None:
+        if self.backend is not None:
+            await self.backend.set(user.email, user_to_dict(user, exclude=UNCACHED_COLUMNS), self.ttl)
+
+    async def invalidate(self, email: str) -> None:
+        if self.backend is not None:
+            user_cache_invalidations.inc()
+            await self.backend.delete(email)
+
+    def stats(self) -> dict:
+        stats = {
+            "backend": USER_CACHE_BACKEND,
+            "hits": user_cache_hits.value(),
+            "misses": user_cache_misses.value(),
+            "invalidations": user_cache_invalidations.value(),
+        }
+        if isinstance(self.backend, InMemoryUserCacheBackend):
+            stats["evictions"] = self.backend.cache.stats()["evictions"]
+            stats["size"] = len(self.backend.cache)
+        return stats
+
+
+def _create_backend() -> Optional[UserCacheBackend]:
+    if USER_CACHE_BACKEND == "none":
+        return None
+    if USER_CACHE_BACKEND == "redis":
+        logger.info("Using Redis user cache backend")
+        return RedisUserCacheBackend(REDIS_URL)
+    return InMemoryUserCacheBackend(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS)
+
+
+user_cache = UserCache(_create_backend(), USER_CACHE_TTL_SECONDS)
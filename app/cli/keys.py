@@ -0,0 +1,91 @@
+"""Access-token signing keys for ``JWT_KEYS_DIR``.
+
+    python -m app.cli.keys generate --dir keys
+    python -m app.cli.keys generate --dir keys --algorithm RS256
+    python -m app.cli.keys list --dir keys
+    python -m app.cli.keys retire --dir keys 20260101-1a2b3c
+
+New keys are named ``<date>-<random>`` so the newest sorts last and
+becomes the active key unless ``JWT_ACTIVE_KID`` says otherwise; deploy a
+new key everywhere before it starts signing (see ``app.auth.keyring``).
+Retiring a key keeps only its public half, so tokens it already signed
+still verify until they expire.
+"""
+import argparse
+import os
+import secrets
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
+
+from app.auth.keyring import JWT_KEYS_DIR, load_key
+
+
+def generate(args) -> int:
+    if args.algorithm == "ES256":
+        key = ec.generate_private_key(ec.SECP256R1())
+    else:
+        key = rsa.generate_private_key(public_exponent=65537, key_size=args.rsa_bits)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    kid = args.kid or f"{datetime.now(timezone.utc):%Y%m%d}-{secrets.token_hex(3)}"
+    path = Path(args.dir) / f"{kid}.pem"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as out:
+        out.write(pem)
+    print(kid)
+    return 0
+
+
+def list_keys(args) -> int:
+    for path in sorted(Path(args.dir).glob("*.pem")):
+        key = load_key(path)
+        print(f"{key.kid}\t{key.algorithm}\t{'private' if key.private is not None else 'public-only'}")
+    return 0
+
+
+def retire(args) -> int:
+    path = Path(args.dir) / f"{args.kid}.pem"
+    pem = path.read_bytes()
+    if b"PRIVATE KEY" not in pem:
+        print(f"{args.kid} is already public-only", file=sys.stderr)
+        return 1
+    public = load_pem_private_key(pem, password=None).public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(public)
+    tmp.replace(path)
+    print(f"{args.kid} retired; it verifies existing tokens but no longer signs")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    keys_dir = argparse.ArgumentParser(add_help=False)
+    keys_dir.add_argument("--dir", default=JWT_KEYS_DIR, required=JWT_KEYS_DIR is None,
+                          help="default: JWT_KEYS_DIR")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generator = commands.add_parser("generate", parents=[keys_dir], help="create a new signing key")
+    generator.add_argument("--algorithm", choices=["ES256", "RS256"], default="ES256")
+    generator.add_argument("--rsa-bits", type=int, default=2048)
+    generator.add_argument("--kid", help="default: <date>-<random>")
+
+    commands.add_parser("list", parents=[keys_dir], help="show keys, their algorithm and whether they can sign")
+
+    retirer = commands.add_parser("retire", parents=[keys_dir], help="drop a key's private half")
+    retirer.add_argument("kid")
+
+    args = parser.parse_args()
+    return {"generate": generate, "list": list_keys, "retire": retire}[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Password-hash parameters and migration progress.
+
+    python -m app.cli.passwords calibrate --budget-ms 250
+    python -m app.cli.passwords calibrate --budget-ms 150 --max-memory-mib 64 --concurrency 4
+    python -m app.cli.passwords report
+
+``calibrate`` times argon2 on this machine and prints the strongest
+``PASSWORD_ARGON2_*`` settings whose median hash time stays within the
+budget: memory first (it is what makes GPU cracking expensive), then as
+many passes as still fit. Run it on the production hardware (same CPU
+quota) and with ``--concurrency`` set to the hash pool size, since
+parallel hashes compete for the same cores and memory bandwidth.
+
+``report`` counts stored hashes by scheme. Outdated hashes (bcrypt, or
+argon2 with other parameters) are replaced at the user's next login, so
+the legacy count falls as users come back.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from passlib.hash import argon2
+
+from app.database import SessionLocal
+from app.utils.auth_utils import argon2_settings
+from app.utils.resources import cpu_limit
+from app.utils.password_hashing import password_hash_report
+
+SAMPLE_PASSWORD = "correct horse battery staple"
+
+
+def median_ms(hasher, pool: ThreadPoolExecutor, concurrency: int, samples: int) -> float:
+    def timed(_):
+        start = time.perf_counter()
+        hasher.hash(SAMPLE_PASSWORD)
+        return (time.perf_counter() - start) * 1000
+    # argon2-cffi releases the GIL, so threads load the cores like the hash pool does
+    return statistics.median(pool.map(timed, range(samples * concurrency)))
+
+
+def fit_time_cost(memory_kib: int, parallelism: int, budget_ms: float, max_time_cost: int,
+                  pool: ThreadPoolExecutor, concurrency: int, samples: int) -> Optional[Tuple[int, float]]:
+    """The largest time_cost within the budget at this memory cost, with its median."""
+    best = None
+    for time_cost in range(1, max_time_cost + 1):
+        hasher = argon2.using(time_cost=time_cost, memory_cost=memory_kib, parallelism=parallelism)
+        latency = median_ms(hasher, pool, concurrency, samples)
+        print(f"  memory {memory_kib // 1024:>5} MiB  time_cost {time_cost:>2}  {latency:8.1f} ms",
+              file=sys.stderr)
+        if latency > budget_ms:
+            break
+        best = (time_cost, latency)
+    return best
+
+
+def memory_candidates(max_memory_mib: int, min_memory_mib: int) -> List[int]:
+    """Halving from the ceiling (256, 128, 64, ... MiB), ending at the floor itself (19 MiB for OWASP)."""
+    candidates: List[int] = []
+    memory_mib = max_memory_mib
+    while memory_mib > min_memory_mib:
+        candidates.append(memory_mib)
+        memory_mib //= 2
+    candidates.append(min_memory_mib)
+    return candidates
+
+
+def calibrate(args) -> int:
+    parallelism = args.parallelism or cpu_limit()
+    candidates = memory_candidates(args.max_memory_mib, args.min_memory_mib)
+    print(f"Calibrating argon2id for {args.budget_ms:g} ms with parallelism {parallelism}, "
+          f"{args.concurrency} concurrent hashes; current settings {argon2_settings()}", file=sys.stderr)
+    chosen = None
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for memory_mib in candidates:
+            fit = fit_time_cost(memory_mib * 1024, parallelism, args.budget_ms, args.max_time_cost,
+                                pool, args.concurrency, args.samples)
+            if fit is None:
+                continue
+            chosen = chosen or (memory_mib, *fit)
+            # A single pass over lots of memory is weaker than a few passes over a bit less
+            if fit[0] >= args.min_time_cost:
+                chosen = (memory_mib, *fit)
+                break
+    if chosen is None:
+        print(f"No setting with at least {args.min_memory_mib} MiB hashes within {args.budget_ms:g} ms; "
+              "raise the budget or add CPU", file=sys.stderr)
+        return 1
+    memory_mib, time_cost, latency = chosen
+    print(f"# median {latency:.1f} ms per hash")
+    print(f"PASSWORD_ARGON2_TIME_COST={time_cost}")
+    print(f"PASSWORD_ARGON2_MEMORY_KIB={memory_mib * 1024}")
+    print(f"PASSWORD_ARGON2_PARALLELISM={parallelism}")
+    return 0
+
+
+async def run_report(args) -> int:
+    async with SessionLocal() as db:
+        report = await password_hash_report(db)
+    for scheme, count in sorted(report["schemes"].items()):
+        print(f"{scheme}\t{count}")
+    print(f"{report['legacy']} of {report['total']} users still have an outdated password hash")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    calibrator = commands.add_parser("calibrate", help="pick argon2 parameters for a latency budget")
+    calibrator.add_argument("--budget-ms", type=float, default=250)
+    calibrator.add_argument("--max-memory-mib", type=int, default=256)
+    calibrator.add_argument("--min-memory-mib", type=int, default=19)
+    calibrator.add_argument("--min-time-cost", type=int, default=2,
+                            help="with fewer passes, try the next smaller memory size first")
+    calibrator.add_argument("--max-time-cost", type=int, default=10)
+    calibrator.add_argument("--parallelism", type=int, help="default: the CPUs available to this process")
+    calibrator.add_argument("--concurrency", type=int, default=1, help="hashes running at once while timing")
+    calibrator.add_argument("--samples", type=int, default=5, help="hashes timed per setting and thread")
+
+    commands.add_parser("report", help="count stored password hashes by scheme")
+
+    args = parser.parse_args()
+    if args.command == "calibrate":
+        return calibrate(args)
+    return asyncio.run(run_report(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
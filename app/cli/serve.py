@@ -0,0 +1,274 @@
+"""Production server: a prefork master running one uvicorn worker per core.
+
+    python -m app.cli.serve --port 8000
+    python -m app.cli.serve --workers 4 --max-requests 20000 --max-memory-mib 512
+
+The master imports the app once, binds the listening socket and forks
+``--workers`` processes (default ``WEB_CONCURRENCY``, else the CPUs this
+container may use) that all accept on it. Code and import-time state are
+shared copy-on-write; each worker still runs the lifespan (database pool,
+hash pool, mail and audit flushers) itself after forking.
+
+A worker is restarted, gracefully, into the same slot after
+``--max-requests`` requests (plus up to ``--max-requests-jitter`` more, so
+workers do not all recycle at once) or once its RSS exceeds
+``--max-memory-mib``; a worker that dies is respawned, with a backoff if
+it keeps failing at startup. SIGTERM or SIGINT stops the workers, waiting
+``--graceful-timeout`` seconds for requests in flight before killing them.
+SIGHUP restarts every worker.
+
+Before forking, the master maps the shared-memory segments of
+``app.utils.shared_memory``: workers add their metrics to it, so
+``/metrics`` from any worker reports the whole server, the rate limiter
+defaults to ``RATE_LIMIT_BACKEND=shared`` so limits hold across workers,
+and sessions default to ``SESSION_BACKEND=shared`` so an OAuth callback
+finds the state its redirect stored on another worker. All of these cover
+one host; use Redis to share limits and sessions between pods. Several
+workers with ``SESSION_BACKEND=memory`` are refused, since most OAuth
+logins would fail.
+"""
+import argparse
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from app.utils import shared_memory
+from app.utils.resources import cpu_limit, rss_bytes
+
+load_dotenv()
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0"))  # 0: one worker per available CPU
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "0"))  # 0: never recycle on request count
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "0"))
+SERVER_MAX_MEMORY_MIB = int(os.getenv("SERVER_MAX_MEMORY_MIB", "0"))  # 0: no memory limit
+SERVER_GRACEFUL_TIMEOUT_SECONDS = float(os.getenv("SERVER_GRACEFUL_TIMEOUT_SECONDS", "30"))
+METRICS_SHM_ENTRIES = int(os.getenv("METRICS_SHM_ENTRIES", "4096"))
+RATE_LIMIT_SHM_SLOTS = int(os.getenv("RATE_LIMIT_SHM_SLOTS", "262144"))
+RATE_LIMIT_SHM_SHARDS = int(os.getenv("RATE_LIMIT_SHM_SHARDS", "64"))
+# Sessions only live through an OAuth login (SESSION_TTL_SECONDS)
+SESSION_SHM_SLOTS = int(os.getenv("SESSION_SHM_SLOTS", "16384"))
+SESSION_SHM_VALUE_BYTES = int(os.getenv("SESSION_SHM_VALUE_BYTES", "2048"))
+
+MEMORY_CHECK_INTERVAL_SECONDS = 5
+# A worker exiting sooner than this after starting counts as a failed start
+MIN_WORKER_UPTIME_SECONDS = 5
+MAX_RESPAWN_BACKOFF_SECONDS = 30
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    # An explicit IPPROTO_TCP makes asyncio set TCP_NODELAY on accepted
+    # connections; without it every response waits on a delayed ACK.
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def watch_memory(server, limit_bytes: int) -> None:
+    """Ask ``server`` to finish gracefully once this process outgrows ``limit_bytes``."""
+    from app.logging_config import logger
+
+    while not server.should_exit:
+        time.sleep(MEMORY_CHECK_INTERVAL_SECONDS)
+        rss = rss_bytes()
+        if rss > limit_bytes:
+            logger.warning(f"Worker {os.getpid()} RSS {rss // 2 ** 20} MiB exceeds "
+                           f"{limit_bytes // 2 ** 20} MiB, restarting it")
+            server.should_exit = True
+
+
+def run_worker(app, sock: socket.socket, slot: int, args) -> int:
+    """Body of a forked worker; returns its exit status."""
+    import uvicorn
+    from app.logging_config import configure_logging, logger, shutdown_logging
+    from app.utils.metrics import attach_shared
+
+    # uvicorn handles SIGTERM/SIGINT while serving and re-raises them once
+    # it has shut down; ignoring them here lets the worker flush its logs.
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+    # The master's log listener thread does not survive fork
+    configure_logging()
+    attach_shared(shared_memory.metrics_segment.writer(slot), shared_memory.metrics_segment.entries)
+
+    max_requests = None
+    if args.max_requests:
+        max_requests = args.max_requests + random.randint(0, args.max_requests_jitter)
+    server = uvicorn.Server(uvicorn.Config(
+        app,
+        lifespan="on",
+        log_config=None,
+        access_log=args.access_log,
+        limit_max_requests=max_requests,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    ))
+    if args.max_memory_mib:
+        threading.Thread(target=watch_memory, args=(server, args.max_memory_mib * 2 ** 20),
+                         name="memory-watchdog", daemon=True).start()
+    status = 0
+    try:
+        server.run(sockets=[sock])
+        if not server.started:
+            logger.error(f"Worker {os.getpid()} failed to start")
+            status = 3
+    except Exception:
+        logger.exception(f"Worker {os.getpid()} crashed")
+        status = 1
+    finally:
+        shutdown_logging()
+    return status
+
+
+class Master:
+    def __init__(self, app, sock: socket.socket, args):
+        from app.logging_config import logger
+
+        self.app = app
+        self.sock = sock
+        self.args = args
+        self.logger = logger
+        self.workers: Dict[int, int] = {}  # pid -> slot
+        self.started_at: Dict[int, float] = {}  # slot -> last spawn time
+        self.failures: Dict[int, int] = {}  # slot -> consecutive failed starts
+        self.respawn_at: Dict[int, float] = {}  # slot -> when to respawn it
+        self.stopping = False
+        self.reload = False
+
+    def spawn(self, slot: int) -> None:
+        from app.logging_config import configure_logging, shutdown_logging
+
+        # Fork with the log listener stopped, so no thread holds its queue lock
+        shutdown_logging()
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                status = run_worker(self.app, self.sock, slot, self.args)
+            finally:
+                os._exit(status)
+        configure_logging()
+        self.workers[pid] = slot
+        self.started_at[slot] = time.monotonic()
+        self.logger.info(f"Started worker {pid} in slot {slot}")
+
+    def reap(self) -> None:
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = self.workers.pop(pid, None)
+            if slot is None or self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            uptime = time.monotonic() - self.started_at[slot]
+            if code != 0 and uptime < MIN_WORKER_UPTIME_SECONDS:
+                self.failures[slot] = self.failures.get(slot, 0) + 1
+            else:
+                self.failures[slot] = 0
+            delay = min(MAX_RESPAWN_BACKOFF_SECONDS, 2 ** self.failures[slot] - 1)
+            self.respawn_at[slot] = time.monotonic() + delay
+            log = self.logger.warning if code != 0 else self.logger.info
+            log(f"Worker {pid} in slot {slot} exited with status {code} after {uptime:.0f}s; "
+                f"respawning in {delay}s")
+
+    def signal_workers(self, sig: int) -> None:
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+        for slot in range(self.args.workers):
+            self.spawn(slot)
+        while not self.stopping:
+            time.sleep(0.2)
+            if self.reload:
+                self.reload = False
+                self.logger.info("Restarting all workers")
+                self.signal_workers(signal.SIGTERM)
+            self.reap()
+            now = time.monotonic()
+            for slot, when in list(self.respawn_at.items()):
+                if when <= now and not self.stopping:
+                    del self.respawn_at[slot]
+                    self.spawn(slot)
+        return self.stop()
+
+    def stop(self) -> int:
+        self.logger.info(f"Stopping {len(self.workers)} workers")
+        self.signal_workers(signal.SIGTERM)
+        # uvicorn's own timeout covers requests; leave room for lifespan shutdown
+        deadline = time.monotonic() + self.args.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            time.sleep(0.1)
+            self.reap()
+        if self.workers:
+            self.logger.warning(f"Killing {len(self.workers)} workers that did not stop in time")
+            self.signal_workers(signal.SIGKILL)
+            while self.workers:
+                pid, _ = os.waitpid(-1, 0)
+                self.workers.pop(pid, None)
+        self.sock.close()
+        return 0
+
+    def _on_stop(self, sig, frame) -> None:
+        self.stopping = True
+
+    def _on_reload(self, sig, frame) -> None:
+        self.reload = True
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY or cpu_limit())
+    parser.add_argument("--backlog", type=int, default=SERVER_BACKLOG)
+    parser.add_argument("--max-requests", type=int, default=SERVER_MAX_REQUESTS,
+                        help="restart a worker after this many requests (0: never)")
+    parser.add_argument("--max-requests-jitter", type=int, default=SERVER_MAX_REQUESTS_JITTER)
+    parser.add_argument("--max-memory-mib", type=int, default=SERVER_MAX_MEMORY_MIB,
+                        help="restart a worker whose RSS exceeds this (0: never)")
+    parser.add_argument("--graceful-timeout", type=float, default=SERVER_GRACEFUL_TIMEOUT_SECONDS)
+    parser.add_argument("--access-log", action="store_true", help="log every request (uvicorn access log)")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("SESSION_BACKEND", "shared")
+    if args.workers > 1 and os.environ["SESSION_BACKEND"] == "memory":
+        parser.error("SESSION_BACKEND=memory keeps OAuth state in one worker, so callbacks served by the "
+                     "others fail; use shared or redis, or --workers 1")
+    shared_memory.init(args.workers, METRICS_SHM_ENTRIES, RATE_LIMIT_SHM_SLOTS, RATE_LIMIT_SHM_SHARDS,
+                       SESSION_SHM_SLOTS, SESSION_SHM_VALUE_BYTES)
+    os.environ.setdefault("RATE_LIMIT_BACKEND", "shared")
+    # Preload: everything imported here is shared copy-on-write by the workers
+    from app.main import app
+    from app.logging_config import logger
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+    logger.info(f"Serving on {args.host}:{args.port} with {args.workers} workers")
+    return Master(app, sock, args).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Bulk user import/export from the command line.
+
+    python -m app.cli.users import partners.csv
+    python -m app.cli.users import caregivers.jsonl --chunk-size 2000 --errors errors.jsonl
+    python -m app.cli.users export --format jsonl --output users.jsonl
+"""
+import argparse
+import asyncio
+import sys
+
+from app.database import SessionLocal
+from app.services.bulk_user_service import (
+    BULK_IMPORT_CHUNK_SIZE,
+    FORMATS,
+    UserImporter,
+    detect_format,
+    export_users,
+    shutdown_hash_executor,
+)
+
+
+async def run_import(args) -> int:
+    fmt = args.format or detect_format(args.path)
+    with open(args.path, encoding="utf-8-sig", newline="") as lines:
+        async with SessionLocal() as db:
+            report = await UserImporter(db, chunk_size=args.chunk_size, max_errors=sys.maxsize).run(lines, fmt)
+    if args.errors:
+        with open(args.errors, "w") as out:
+            for error in report.errors:
+                out.write(error.model_dump_json() + "\n")
+    else:
+        for error in report.errors:
+            print(f"line {error.line} ({error.email}): {'; '.join(error.errors)}", file=sys.stderr)
+    print(f"{report.created} created, {report.failed} failed, {report.total} rows")
+    return 1 if report.failed else 0
+
+
+async def run_export(args) -> int:
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        async with SessionLocal() as db:
+            async for chunk in export_users(db, args.format):
+                out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="create users from a CSV or JSON lines file")
+    importer.add_argument("path")
+    importer.add_argument("--format", choices=FORMATS, help="default: guessed from the file extension")
+    importer.add_argument("--chunk-size", type=int, default=BULK_IMPORT_CHUNK_SIZE)
+    importer.add_argument("--errors", help="write per-row errors here as JSON lines instead of stderr")
+
+    exporter = commands.add_parser("export", help="write every user as CSV or JSON lines")
+    exporter.add_argument("--format", choices=FORMATS, default="csv")
+    exporter.add_argument("--output", help="default: stdout")
+
+    args = parser.parse_args()
+    try:
+        return asyncio.run(run_import(args) if args.command == "import" else run_export(args))
+    finally:
+        shutdown_hash_executor()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import json
+from datetime import date, datetime
+from typing import List, Optional, Sequence
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.audit_model import AuditEvent, AuditEventType
+from app.utils.instrumentation import span
+
+# Column order of the tuples handed to ``insert_events``
+AUDIT_COLUMNS = ("occurred_at", "event", "success", "user_id", "email", "ip_address", "user_agent", "detail")
+
+PARTITION_PREFIX = "audit_events_p"
+
+async def insert_events(db: AsyncSession, rows: Sequence[tuple]) -> None:
+    """Write a batch of events in one round trip; the caller commits.
+
+    On asyncpg this is a binary COPY; elsewhere a multi-row INSERT.
+    """
+    conn = await db.connection()
+    with span("db"):
+        if conn.dialect.driver == "asyncpg":
+            raw = await conn.get_raw_connection()
+            # SQLAlchemy's jsonb codec on the connection takes the serialized text
+            records = [row[:-1] + (json.dumps(row[-1]) if row[-1] is not None else None,) for row in rows]
+            await raw.driver_connection.copy_records_to_table(
+                AuditEvent.__tablename__, records=records, columns=AUDIT_COLUMNS
+            )
+        else:
+            await db.execute(insert(AuditEvent), [dict(zip(AUDIT_COLUMNS, row)) for row in rows])
+
+async def list_events(
+    db: AsyncSession,
+    *,
+    user_id: Optional[int] = None,
+    email: Optional[str] = None,
+    event: Optional[AuditEventType] = None,
+    success: Optional[bool] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    limit: int = 50,
+) -> List[AuditEvent]:
+    """One keyset page, newest first: ``WHERE id < before_id ... ORDER BY id DESC LIMIT n``.
+
+    ``since``/``until`` bound ``occurred_at``, which prunes partitions.
+    """
+    stmt = select(AuditEvent)
+    if user_id is not None:
+        stmt = stmt.where(AuditEvent.user_id == user_id)
+    if email is not None:
+        stmt = stmt.where(AuditEvent.email == email)
+    if event is not None:
+        stmt = stmt.where(AuditEvent.event == event.value)
+    if success is not None:
+        stmt = stmt.where(AuditEvent.success == success)
+    if since is not None:
+        stmt = stmt.where(AuditEvent.occurred_at >= since)
+    if until is not None:
+        stmt = stmt.where(AuditEvent.occurred_at < until)
+    if before_id is not None:
+        stmt = stmt.where(AuditEvent.id < before_id)
+    stmt = stmt.order_by(AuditEvent.id.desc()).limit(limit).execution_options(use_replica=True)
+    with span("db"):
+        result = await db.execute(stmt)
+    return list(result.scalars().all())
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+async def create_partition(db: AsyncSession, month: date) -> None:
+    """Create the monthly partition starting at ``month`` (the 1st) unless it exists; PostgreSQL only."""
+    upper = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    with span("db"):
+        await db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF audit_events "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+
+async def list_partitions(db: AsyncSession) -> List[str]:
+    with span("db"):
+        result = await db.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = 'audit_events'"
+        ))
+    return [name for name in result.scalars() if name.startswith(PARTITION_PREFIX)]
+
+async def drop_partition(db: AsyncSession, name: str) -> None:
+    """Drop a whole month of events; far cheaper than a DELETE and leaves no bloat."""
+    with span("db"):
+        await db.execute(text(f"DROP TABLE IF EXISTS {name}"))
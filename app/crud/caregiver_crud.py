@@ -0,0 +1,66 @@
+from typing import AsyncIterator, List, Optional, Tuple
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.models.caregiver_model import AvailabilitySlot, CaregiverProfile
+from app.models.user_model import User, UserRole
+from app.utils.instrumentation import span
+
+async def get_profile(db: AsyncSession, user_id: int) -> Optional[CaregiverProfile]:
+    with span("db"):
+        result = await db.execute(
+            select(CaregiverProfile)
+            .where(CaregiverProfile.user_id == user_id)
+            .options(selectinload(CaregiverProfile.slots))
+        )
+    return result.scalars().first()
+
+async def upsert_profile(db: AsyncSession, user_id: int, values: dict) -> CaregiverProfile:
+    profile = await get_profile(db, user_id)
+    if profile is None:
+        profile = CaregiverProfile(user_id=user_id, rating=0.0, slots=[])
+        db.add(profile)
+    for key, value in values.items():
+        setattr(profile, key, value)
+    with span("db"):
+        await db.commit()
+    return profile
+
+async def replace_slots(db: AsyncSession, profile: CaregiverProfile, slots: List[Tuple[int, int]]) -> None:
+    with span("db"):
+        await db.execute(delete(AvailabilitySlot).where(AvailabilitySlot.caregiver_id == profile.id))
+        db.add_all([
+            AvailabilitySlot(caregiver_id=profile.id, start_minute=start, end_minute=end) for start, end in slots
+        ])
+        await db.commit()
+        await db.refresh(profile, ["slots"])
+
+async def set_approval(db: AsyncSession, user_id: int, approved: bool) -> Optional[User]:
+    with span("db"):
+        result = await db.execute(
+            update(User)
+            .where(User.id == user_id, User.role == UserRole.caregiver)
+            .values(is_approved=approved)
+            .returning(User)
+        )
+        user = result.scalars().first()
+        await db.commit()
+    return user
+
+def matchable_caregivers_query():
+    """Approved, active caregivers with a profile, plus their slots."""
+    return (
+        select(CaregiverProfile, User.full_name)
+        .join(User, User.id == CaregiverProfile.user_id)
+        .where(User.role == UserRole.caregiver, User.is_approved.is_(True), User.is_active.is_(True))
+        .options(selectinload(CaregiverProfile.slots))
+    )
+
+async def stream_matchable_caregivers(db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[Tuple[CaregiverProfile, str]]:
+    with span("db"):
+        result = await db.stream(
+            matchable_caregivers_query().order_by(CaregiverProfile.id)
+            .execution_options(yield_per=batch_size, use_replica=True)
+        )
+    async for profile, full_name in result:
+        yield profile, full_name
@@ -0,0 +1,159 @@
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.models.care_plan_model import CarePlan, CarePlanSlot, CarePlanStatus, Visit, VisitStatus
+from app.utils.instrumentation import span
+
+OPEN_VISIT_STATUSES = (VisitStatus.unassigned, VisitStatus.scheduled)
+# First key of the per-caregiver advisory locks taken while assigning visits
+CAREGIVER_LOCK_CLASS = 7201
+
+async def create_care_plan(db: AsyncSession, customer_id: int, values: dict, slots: List[dict]) -> CarePlan:
+    plan = CarePlan(customer_id=customer_id, slots=[CarePlanSlot(**slot) for slot in slots], **values)
+    db.add(plan)
+    with span("db"):
+        await db.commit()
+        await db.refresh(plan, ["slots"])
+    return plan
+
+async def get_care_plan(db: AsyncSession, plan_id: int, skip_locked: bool = False) -> Optional[CarePlan]:
+    """Load a plan with its slots; ``skip_locked`` locks the row and returns None if another transaction holds it."""
+    stmt = select(CarePlan).where(CarePlan.id == plan_id).options(selectinload(CarePlan.slots))
+    if skip_locked:
+        stmt = stmt.with_for_update(skip_locked=True, of=CarePlan)
+    with span("db"):
+        result = await db.execute(stmt)
+    return result.scalars().first()
+
+async def care_plans_due(db: AsyncSession, until: date, after_id: int, limit: int) -> List[int]:
+    """Ids of active plans whose visits stop short of ``until`` and of their end date, one keyset page."""
+    stmt = (
+        select(CarePlan.id)
+        .where(
+            CarePlan.status == CarePlanStatus.active,
+            CarePlan.id > after_id,
+            or_(
+                CarePlan.scheduled_until.is_(None),
+                (CarePlan.scheduled_until < until)
+                & (CarePlan.end_date.is_(None) | (CarePlan.scheduled_until <= CarePlan.end_date)),
+            ),
+        )
+        .order_by(CarePlan.id)
+        .limit(limit)
+    )
+    with span("db"):
+        result = await db.execute(stmt)
+    return list(result.scalars().all())
+
+async def care_plans_with_unassigned_visits(db: AsyncSession, start: datetime, end: datetime,
+                                            after_id: int, limit: int) -> List[int]:
+    """Ids of plans with unassigned visits starting in [start, end), one keyset page."""
+    stmt = (
+        select(Visit.care_plan_id)
+        .where(
+            Visit.status == VisitStatus.unassigned,
+            Visit.starts_at >= start,
+            Visit.starts_at < end,
+            Visit.care_plan_id > after_id,
+        )
+        .group_by(Visit.care_plan_id)
+        .order_by(Visit.care_plan_id)
+        .limit(limit)
+    )
+    with span("db"):
+        result = await db.execute(stmt)
+    return list(result.scalars().all())
+
+async def list_care_plans(db: AsyncSession, customer_id: int) -> List[CarePlan]:
+    with span("db"):
+        result = await db.execute(
+            select(CarePlan)
+            .where(CarePlan.customer_id == customer_id)
+            .options(selectinload(CarePlan.slots))
+            .order_by(CarePlan.id)
+            .execution_options(use_replica=True)
+        )
+    return list(result.scalars().all())
+
+async def insert_visits(db: AsyncSession, rows: List[dict]) -> None:
+    """Insert generated visits; ones that already exist are skipped (caller commits)."""
+    if not rows:
+        return
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    with span("db"):
+        await db.execute(
+            insert(Visit).values(rows).on_conflict_do_nothing(
+                index_elements=[Visit.care_plan_id, Visit.slot_id, Visit.starts_at]
+            )
+        )
+
+async def get_visit(db: AsyncSession, visit_id: int) -> Optional[Visit]:
+    with span("db"):
+        return await db.get(Visit, visit_id)
+
+async def list_visits(db: AsyncSession, plan_id: int, start: datetime, end: datetime) -> List[Visit]:
+    with span("db"):
+        result = await db.execute(
+            select(Visit)
+            .where(Visit.care_plan_id == plan_id, Visit.starts_at >= start, Visit.starts_at < end)
+            .order_by(Visit.starts_at)
+            .execution_options(use_replica=True)
+        )
+    return list(result.scalars().all())
+
+async def open_visits_in_window(db: AsyncSession, start: datetime, end: datetime,
+                                plan_ids: Optional[Sequence[int]] = None,
+                                caregiver_id: Optional[int] = None) -> List[Tuple[Visit, float, float]]:
+    """Unassigned/scheduled visits overlapping [start, end), with their plan's location."""
+    stmt = (
+        select(Visit, CarePlan.latitude, CarePlan.longitude)
+        .join(CarePlan, CarePlan.id == Visit.care_plan_id)
+        .where(Visit.status.in_(OPEN_VISIT_STATUSES), Visit.starts_at < end, Visit.ends_at > start)
+    )
+    if plan_ids is not None:
+        stmt = stmt.where(Visit.care_plan_id.in_(plan_ids))
+    if caregiver_id is not None:
+        stmt = stmt.where(Visit.caregiver_id == caregiver_id)
+    with span("db"):
+        result = await db.execute(stmt)
+    return [tuple(row) for row in result.all()]
+
+async def caregiver_commitments(
+    db: AsyncSession, start: datetime, end: datetime, exclude_ids: Iterable[int] = (),
+    caregiver_ids: Optional[Sequence[int]] = None,
+) -> List[Tuple[int, datetime, datetime, int]]:
+    """(caregiver_id, starts_at, ends_at, visit_id) of assigned visits overlapping [start, end)."""
+    stmt = select(Visit.caregiver_id, Visit.starts_at, Visit.ends_at, Visit.id).where(
+        Visit.caregiver_id.is_not(None),
+        Visit.status.in_((VisitStatus.scheduled, VisitStatus.completed)),
+        Visit.starts_at < end,
+        Visit.ends_at > start,
+    )
+    if caregiver_ids is not None:
+        stmt = stmt.where(Visit.caregiver_id.in_(caregiver_ids))
+    exclude_ids = list(exclude_ids)
+    if exclude_ids:
+        stmt = stmt.where(Visit.id.not_in(exclude_ids))
+    with span("db"):
+        result = await db.execute(stmt)
+    return [tuple(row) for row in result.all()]
+
+async def lock_caregivers(db: AsyncSession, caregiver_ids: Iterable[int]) -> None:
+    """Hold each caregiver's scheduling lock until the transaction ends (PostgreSQL only).
+
+    Taken in id order, so two transactions locking overlapping sets cannot deadlock.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    with span("db"):
+        for caregiver_id in sorted(set(caregiver_ids)):
+            await db.execute(select(func.pg_advisory_xact_lock(CAREGIVER_LOCK_CLASS, caregiver_id)))
+
+async def update_visit_assignments(db: AsyncSession, assignments: List[dict]) -> None:
+    """Bulk UPDATE by primary key: dicts of id, caregiver_id, status (caller commits)."""
+    if assignments:
+        with span("db"):
+            await db.execute(update(Visit), assignments)
@@ -0,0 +1,190 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.token_model import AuthToken, RefreshToken, RevokedToken, TokenPurpose
+from app.models.user_model import User
+from app.utils.auth_utils import generate_verification_token
+from app.utils.instrumentation import span
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _insert(db: AsyncSession):
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+async def create_token(db: AsyncSession, user_id: int, purpose: TokenPurpose, ttl: timedelta) -> str:
+    """Issue a new token for ``purpose``, replacing any earlier one, and return the plaintext.
+
+    One upsert on (user_id, purpose); the caller commits.
+    """
+    token = generate_verification_token()
+    stmt = _insert(db)(AuthToken).values(
+        user_id=user_id,
+        token_hash=hash_token(token),
+        purpose=purpose,
+        expires_at=datetime.now(timezone.utc) + ttl,
+    )
+    with span("db"):
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[AuthToken.user_id, AuthToken.purpose],
+            set_={
+                "token_hash": stmt.excluded.token_hash,
+                "expires_at": stmt.excluded.expires_at,
+                "created_at": func.now(),
+            },
+        ))
+    return token
+
+async def redeem_token(db: AsyncSession, token: str, purpose: TokenPurpose, values: dict,
+                       *conditions) -> Optional[Tuple[int, str]]:
+    """Consume a live token and apply ``values`` to its user; returns the user's (id, email).
+
+    On PostgreSQL this is a single statement (the DELETE of the token in a
+    CTE feeding an UPDATE ... FROM), so a token can only be redeemed once.
+    ``conditions`` further restrict which users may be updated; the token
+    is consumed either way. Returns None for unknown or expired tokens.
+    The caller commits.
+    """
+    consume = (
+        delete(AuthToken)
+        .where(
+            AuthToken.token_hash == hash_token(token),
+            AuthToken.purpose == purpose,
+            AuthToken.expires_at > datetime.now(timezone.utc),
+        )
+        .returning(AuthToken.user_id)
+    )
+    with span("db"):
+        if db.get_bind().dialect.name == "postgresql":
+            consumed = consume.cte("consumed")
+            result = await db.execute(
+                update(User).where(User.id == consumed.c.user_id, *conditions)
+                .values(**values).returning(User.id, User.email)
+            )
+        else:
+            # No data-modifying CTEs elsewhere (SQLite): two statements
+            user_id = (await db.execute(consume)).scalar()
+            if user_id is None:
+                return None
+            result = await db.execute(
+                update(User).where(User.id == user_id, *conditions)
+                .values(**values).returning(User.id, User.email)
+            )
+    row = result.first()
+    return tuple(row) if row is not None else None
+
+async def delete_expired_tokens(db: AsyncSession, batch_size: int) -> int:
+    """Delete up to ``batch_size`` expired tokens and commit; returns how many went."""
+    expired_ids = (
+        select(AuthToken.id)
+        .where(AuthToken.expires_at <= datetime.now(timezone.utc))
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    result = await db.execute(delete(AuthToken).where(AuthToken.id.in_(expired_ids)))
+    await db.commit()
+    return result.rowcount
+
+async def create_refresh_token(db: AsyncSession, user_id: int, token: str, family_id: str, access_jti: str,
+                               access_expires_at: datetime, expires_at: datetime) -> None:
+    """Store a refresh token by hash; the caller commits."""
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=hash_token(token),
+        family_id=family_id,
+        access_jti=access_jti,
+        access_expires_at=access_expires_at,
+        expires_at=expires_at,
+    ))
+
+async def claim_refresh_token(db: AsyncSession, token: str) -> Optional[Tuple[int, str]]:
+    """Mark a live refresh token used and return its (user_id, family_id).
+
+    A single conditional UPDATE, so two concurrent refreshes with the same
+    token cannot both succeed. Returns None for unknown, expired, revoked
+    or already used tokens. The caller commits.
+    """
+    with span("db"):
+        result = await db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == hash_token(token),
+                RefreshToken.used_at.is_(None),
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.expires_at > datetime.now(timezone.utc),
+            )
+            .values(used_at=datetime.now(timezone.utc))
+            .returning(RefreshToken.user_id, RefreshToken.family_id)
+        )
+    row = result.first()
+    return tuple(row) if row is not None else None
+
+async def get_refresh_token(db: AsyncSession, token: str) -> Optional[RefreshToken]:
+    with span("db"):
+        result = await db.execute(select(RefreshToken).where(RefreshToken.token_hash == hash_token(token)))
+    return result.scalars().first()
+
+async def revoke_refresh_tokens(db: AsyncSession, *, family_id: Optional[str] = None,
+                                user_id: Optional[int] = None) -> List[Tuple[str, datetime]]:
+    """Revoke a family's (or a user's) live refresh tokens; the caller commits.
+
+    Returns (access_jti, access_expires_at) of the access tokens they issued.
+    """
+    stmt = update(RefreshToken).where(RefreshToken.revoked_at.is_(None))
+    if family_id is not None:
+        stmt = stmt.where(RefreshToken.family_id == family_id)
+    if user_id is not None:
+        stmt = stmt.where(RefreshToken.user_id == user_id)
+    with span("db"):
+        result = await db.execute(
+            stmt.values(revoked_at=datetime.now(timezone.utc))
+            .returning(RefreshToken.access_jti, RefreshToken.access_expires_at)
+        )
+    return [tuple(row) for row in result.all()]
+
+async def revoke_access_tokens(db: AsyncSession, tokens: Iterable[Tuple[str, datetime]]) -> None:
+    """Record access tokens as revoked by jti (already revoked ones are skipped); the caller commits."""
+    now = datetime.now(timezone.utc)
+    rows = [{"jti": jti, "expires_at": expires_at} for jti, expires_at in tokens if expires_at > now]
+    if not rows:
+        return
+    with span("db"):
+        await db.execute(_insert(db)(RevokedToken).values(rows).on_conflict_do_nothing(index_elements=[RevokedToken.jti]))
+
+async def revoked_since(db: AsyncSession, since: Optional[datetime]) -> List[Tuple[str, datetime]]:
+    """(jti, revoked_at) of unexpired revocations recorded at or after ``since`` (all when None)."""
+    stmt = select(RevokedToken.jti, RevokedToken.revoked_at).where(
+        RevokedToken.expires_at > datetime.now(timezone.utc)
+    )
+    if since is not None:
+        stmt = stmt.where(RevokedToken.revoked_at >= since)
+    with span("db"):
+        result = await db.execute(stmt.execution_options(use_replica=True))
+    return [tuple(row) for row in result.all()]
+
+async def delete_expired_refresh_tokens(db: AsyncSession, batch_size: int) -> int:
+    """Delete up to ``batch_size`` expired refresh tokens and commit; returns how many went."""
+    expired_ids = (
+        select(RefreshToken.id)
+        .where(RefreshToken.expires_at <= datetime.now(timezone.utc))
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    result = await db.execute(delete(RefreshToken).where(RefreshToken.id.in_(expired_ids)))
+    await db.commit()
+    return result.rowcount
+
+async def delete_expired_revocations(db: AsyncSession, batch_size: int) -> int:
+    """Delete up to ``batch_size`` revocations of access tokens that have expired anyway, and commit."""
+    expired_ids = (
+        select(RevokedToken.id)
+        .where(RevokedToken.expires_at <= datetime.now(timezone.utc))
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    result = await db.execute(delete(RevokedToken).where(RevokedToken.id.in_(expired_ids)))
+    await db.commit()
+    return result.rowcount
@@ -1,50 +1,160 @@
+import os
+from functools import partial
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import any_, bindparam, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.models.user_model import User, AuthProvider
+from app.database import SessionLocal
+from app.models.user_model import User, AuthProvider, UserRole
 from app.schemas import user_schemas
-from app.utils.auth_utils import generate_verification_token
-import secrets
+from app.auth.user_cache import user_from_dict, user_to_dict
+from app.utils.batching import BatchLoader
+from app.utils.instrumentation import span
 
-async def get_user_by_email(db: AsyncSession, email: str):
-    result = await db.execute(select(User).filter(User.email == email))
+load_dotenv()
+
+# Coalesce concurrent lookups of users by email/id across requests
+USER_LOOKUP_BATCHING = os.getenv("USER_LOOKUP_BATCHING", "true").lower() == "true"
+USER_LOOKUP_MAX_BATCH = int(os.getenv("USER_LOOKUP_MAX_BATCH", "500"))
+
+async def _load_users(column, keys: list) -> Dict[object, dict]:
+    """One query for every user whose ``column`` is in ``keys``, as plain dicts."""
+    async with SessionLocal() as db:
+        if db.get_bind().dialect.name == "postgresql":
+            # One array parameter, so every batch size shares a prepared statement
+            condition = column == any_(bindparam("keys", keys, type_=ARRAY(column.type)))
+        else:
+            condition = column.in_(keys)
+        with span("db"):
+            result = await db.execute(select(User).where(condition).execution_options(use_replica=True))
+        return {getattr(user, column.key): user_to_dict(user) for user in result.scalars()}
+
+users_by_email = BatchLoader("users_by_email", partial(_load_users, User.email), USER_LOOKUP_MAX_BATCH)
+users_by_id = BatchLoader("users_by_id", partial(_load_users, User.id), USER_LOOKUP_MAX_BATCH)
+
+async def _attach(db: AsyncSession, data: Optional[dict]) -> Optional[User]:
+    return await db.merge(user_from_dict(data), load=False) if data is not None else None
+
+async def get_user_by_email(db: AsyncSession, email: str, *, primary: bool = False) -> Optional[User]:
+    """Look up a user by email.
+
+    By default the lookup may be batched with concurrent ones and read
+    from the replica, on a session of its own: it sees committed rows
+    only, possibly slightly behind. Pass ``primary=True`` when a write
+    depends on the result (a login, a token issued for the user, a row
+    that just conflicted); that reads in ``db``'s own transaction.
+    """
+    if primary:
+        with span("db"):
+            result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
+    if USER_LOOKUP_BATCHING:
+        return await _attach(db, await users_by_email.load(email))
+    with span("db"):
+        result = await db.execute(
+            select(User).filter(User.email == email).execution_options(use_replica=True)
+        )
+    return result.scalars().first()
+
+async def get_user_by_id(db: AsyncSession, user_id: int, *, primary: bool = False) -> Optional[User]:
+    """Look up a user by id; see ``get_user_by_email`` for ``primary``."""
+    if primary:
+        with span("db"):
+            result = await db.execute(select(User).where(User.id == user_id))
+        return result.scalars().first()
+    if USER_LOOKUP_BATCHING:
+        return await _attach(db, await users_by_id.load(user_id))
+    with span("db"):
+        result = await db.execute(select(User).where(User.id == user_id).execution_options(use_replica=True))
     return result.scalars().first()
 
-async def create_user(db: AsyncSession, user: user_schemas.UserCreate):
+async def create_user(db: AsyncSession, user: user_schemas.UserCreate) -> Optional[User]:
+    """Insert a user and return the row, or None if the email is taken.
+
+    A single ``INSERT ... ON CONFLICT (email) DO NOTHING RETURNING``, so
+    there is no check-then-insert race and no reload after the insert.
+    The caller commits.
+    """
     if user.auth_provider == AuthProvider.email:
         hashed_password = user.password
         is_verified = False
-        verification_token = generate_verification_token()
     else:
         hashed_password = None
         is_verified = True
-        verification_token = None
-
-    db_user = User(
-        email=user.email,
-        hashed_password=hashed_password,
-        full_name=user.full_name,
-        role=user.role,
-        is_verified=is_verified,
-        verification_token=verification_token,
-        auth_provider=user.auth_provider
-    )
-    db.add(db_user)
-    await db.commit()
-    await db.refresh(db_user)
-    return db_user
 
-async def get_user_by_verification_token(db: AsyncSession, token: str) -> User:
-    result = await db.execute(select(User).where(User.verification_token == token))
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    stmt = (
+        insert(User)
+        .values(
+            email=user.email,
+            hashed_password=hashed_password,
+            full_name=user.full_name,
+            role=user.role,
+            is_verified=is_verified,
+            auth_provider=user.auth_provider,
+        )
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User)
+    )
+    with span("db"):
+        result = await db.execute(stmt)
     return result.scalars().first()
 
-async def verify_user_email(db: AsyncSession, user: User) -> None:
-    user.is_verified = True
-    user.verification_token = None
-    db.add(user)
-    await db.commit()
-    
-async def update_verification_token(db: AsyncSession, user: User) -> str:
-    user.verification_token = secrets.token_urlsafe(32)
-    db.add(user)
-    await db.commit()
-    return user.verification_token
\ No newline at end of file
+async def replace_password_hash(db: AsyncSession, user_id: int, old_hash: str, new_hash: str) -> bool:
+    """Swap in a rehashed password unless the hash changed meanwhile (e.g. a reset); the caller commits."""
+    with span("db"):
+        result = await db.execute(
+            update(User)
+            .where(User.id == user_id, User.hashed_password == old_hash)
+            .values(hashed_password=new_hash)
+        )
+    return result.rowcount == 1
+
+async def stream_password_hashes(db: AsyncSession, batch_size: int = 5000):
+    """Yield every stored password hash (None for social-login users), streamed in batches."""
+    stream = await db.stream_scalars(
+        select(User.hashed_password).execution_options(yield_per=batch_size, use_replica=True)
+    )
+    async for hashed_password in stream:
+        yield hashed_password
+
+def _prefix_pattern(prefix: str) -> str:
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+async def list_users(
+    db: AsyncSession,
+    *,
+    role: Optional[UserRole] = None,
+    is_verified: Optional[bool] = None,
+    is_active: Optional[bool] = None,
+    auth_provider: Optional[AuthProvider] = None,
+    q: Optional[str] = None,
+    after_id: Optional[int] = None,
+    limit: int = 50,
+) -> List[User]:
+    """One keyset page ordered by id: ``WHERE id > after_id ... LIMIT n``.
+
+    Unlike OFFSET, the cost does not grow with how deep the page is.
+    """
+    stmt = select(User)
+    if role is not None:
+        stmt = stmt.where(User.role == role)
+    if is_verified is not None:
+        stmt = stmt.where(User.is_verified == is_verified)
+    if is_active is not None:
+        stmt = stmt.where(User.is_active == is_active)
+    if auth_provider is not None:
+        stmt = stmt.where(User.auth_provider == auth_provider)
+    if q:
+        pattern = _prefix_pattern(q)
+        stmt = stmt.where(or_(User.email.ilike(pattern, escape="\\"), User.full_name.ilike(pattern, escape="\\")))
+    if after_id is not None:
+        stmt = stmt.where(User.id > after_id)
+    stmt = stmt.order_by(User.id).limit(limit).execution_options(use_replica=True)
+    with span("db"):
+        result = await db.execute(stmt)
+    return list(result.scalars().all())
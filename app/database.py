@@ -1,22 +1,164 @@
+import asyncio
 import os
+import time
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from dotenv import load_dotenv
+from app.utils.metrics import metrics
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional streaming replica; read-only crud lookups are routed to it.
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
 
-engine = create_async_engine(DATABASE_URL, future=True, echo=True)
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_CONNECT_TIMEOUT = float(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+DB_COMMAND_TIMEOUT = float(os.getenv("DB_COMMAND_TIMEOUT", "30"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))
+# Connections opened during startup warm-up, before the app reports ready
+DB_POOL_WARM_CONNECTIONS = int(os.getenv("DB_POOL_WARM_CONNECTIONS", "4"))
 
-SessionLocal = sessionmaker(
-    bind=engine,
+pool_wait = metrics.histogram("db_pool_wait_seconds", "Time spent waiting for a pooled connection.")
+pool_checkout = metrics.histogram("db_connection_checkout_seconds", "Time a connection stays checked out of the pool.")
+pool_checked_out = metrics.gauge("db_pool_checked_out", "Connections currently checked out of the pool.")
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait for a connection."""
+
+    label = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait.observe(time.perf_counter() - start, engine=self.label)
+
+
+def engine_options(url: str) -> dict:
+    options = {"future": True, "echo": DB_ECHO}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        # SQLite (benchmarks, local runs) keeps SQLAlchemy's default pool
+        return options
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    if parsed.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "timeout": DB_CONNECT_TIMEOUT,
+            "command_timeout": DB_COMMAND_TIMEOUT,
+        }
+    return options
+
+
+def _instrument(engine, label: str) -> None:
+    engine.sync_engine.pool.label = label
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        pool_checked_out.inc(engine=label)
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            pool_checkout.observe(time.perf_counter() - checked_out_at, engine=label)
+            pool_checked_out.dec(engine=label)
+
+
+def create_engine_for(url: str, label: str):
+    engine = create_async_engine(url, **engine_options(url))
+    _instrument(engine, label)
+    return engine
+
+
+_engine = None
+_replica_engine = None
+
+
+def get_engine():
+    """The primary engine, created on first use so importing this module needs no settings."""
+    global _engine, _replica_engine
+    if _engine is None:
+        if not DATABASE_URL:
+            raise RuntimeError("DATABASE_URL is not set")
+        _engine = create_engine_for(DATABASE_URL, "primary")
+        if DATABASE_REPLICA_URL:
+            _replica_engine = create_engine_for(DATABASE_REPLICA_URL, "replica")
+    return _engine
+
+
+def get_replica_engine():
+    get_engine()
+    return _replica_engine
+
+
+def __getattr__(name: str):
+    # ``from app.database import engine`` keeps working, creating it lazily
+    if name == "engine":
+        return get_engine()
+    if name == "replica_engine":
+        return get_replica_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def warm_pool(connections: int = DB_POOL_WARM_CONNECTIONS) -> None:
+    """Open pooled connections up front so the first requests skip the connect handshake."""
+    engine = get_engine()
+
+    async def ping():
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(max(1, connections))))
+
+
+class RoutingSession(Session):
+    """Sends statements marked with ``execution_options(use_replica=True)`` to the replica."""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            _replica_engine is not None
+            and clause is not None
+            and clause.get_execution_options().get("use_replica")
+        ):
+            return _replica_engine.sync_engine
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+class LazySessionMaker(sessionmaker):
+    """Binds to the engine when the first session is opened rather than at import."""
+
+    def __call__(self, **local_kw) -> AsyncSession:
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = LazySessionMaker(
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
     expire_on_commit=False,
 )
 
-Base = declarative_base()
-
 async def get_db():
     async with SessionLocal() as session:
         try:
@@ -37,4 +37,14 @@ async def invalid_auth_provider_handler(request: Request, exc: InvalidAuthProvid
 
 async def email_not_verified_handler(request: Request, exc: EmailNotVerifiedException):
     logger.warning(f"Email not verified: {exc.detail}")
-    return JSONResponse(status_code=400, content={"detail": exc.detail})
\ No newline at end of file
+    return JSONResponse(status_code=400, content={"detail": exc.detail})
+
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusyException):
+    logger.warning(f"Password hashing pool saturated: {exc.detail}")
+    return JSONResponse(status_code=503, content={"detail": exc.detail}, headers={"Retry-After": "1"})
+
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceededException):
+    logger.warning(f"Rate limit exceeded for {request.url.path}")
+    return JSONResponse(
+        status_code=429, content={"detail": exc.detail}, headers={"Retry-After": str(max(1, int(exc.retry_after)))}
+    )
\ No newline at end of file
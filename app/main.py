@@ -1,17 +1,20 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.sessions import SessionMiddleware
-# from app.routers import customers, caregivers
+from app.routers import customers, caregivers
 from app.auth import router as auth
-from app.database import engine, Base
+from app.routers import metrics, admin_users, admin_audit, jwks, health
 from app.exception_handlers import *
 from app.auth.exceptions import *
 from app.logging_config import logger
+from app.utils.instrumentation import RequestMetricsMiddleware
+from app.auth.sessions import ServerSessionMiddleware, create_backend as create_session_backend
+from app.startup import lifespan
 
 # Create the database tables
 # Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 app.add_exception_handler(UserAlreadyExistsException, user_already_exists_handler)
 app.add_exception_handler(InvalidRoleException, invalid_role_handler)
@@ -22,6 +25,8 @@ app.add_exception_handler(EmailAlreadyVerifiedException, email_already_verified_
 app.add_exception_handler(UserNotFoundException, user_not_found_handler)
 app.add_exception_handler(InvalidAuthProviderException, invalid_auth_provider_handler)
 app.add_exception_handler(EmailAlreadyVerifiedException, email_already_verified_handler)
+app.add_exception_handler(PasswordHashingBusyException, password_hashing_busy_handler)
+app.add_exception_handler(RateLimitExceededException, rate_limit_exceeded_handler)
 
 # Allow CORS (adjust origins in production)
 app.add_middleware(
@@ -32,12 +37,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.add_middleware(
-    SessionMiddleware,
-    secret_key="your-secret-key",  # Replace with a secure random key in production
-)
+# Holds the OAuth state between /auth/{google,facebook} and the callback;
+# other routes skip it (see app.auth.sessions)
+app.add_middleware(ServerSessionMiddleware, backend=create_session_backend())
+
+# Outermost, so the recorded latency covers the other middleware too
+app.add_middleware(RequestMetricsMiddleware)
 
 # Include routers
 app.include_router(auth.router)
-# app.include_router(customers.router)
-# app.include_router(caregivers.router)
+app.include_router(health.router)
+app.include_router(metrics.router)
+app.include_router(jwks.router)
+app.include_router(admin_users.router)
+app.include_router(admin_audit.router)
+app.include_router(customers.router)
+app.include_router(caregivers.router)
@@ -1,3 +1,7 @@
 from app.models.user_model import User
-# from app.models.caregiver_model import Caregiver
+from app.models.outbox_model import EmailOutbox
+from app.models.token_model import AuthToken, RefreshToken, RevokedToken
+from app.models.caregiver_model import CaregiverProfile, AvailabilitySlot
+from app.models.care_plan_model import CarePlan, CarePlanSlot, Visit
 
+from app.models.audit_model import AuditEvent
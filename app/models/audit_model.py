@@ -0,0 +1,41 @@
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Index, Integer, JSON, String
+from sqlalchemy.dialects.postgresql import JSONB
+from app.models.base import Base
+import enum
+
+class AuditEventType(str, enum.Enum):
+    signup = "signup"
+    login = "login"
+    email_verification = "email_verification"
+    password_reset_request = "password_reset_request"
+    password_reset = "password_reset"
+    oauth_login = "oauth_login"
+    auth_provider_switch = "auth_provider_switch"
+
+class AuditEvent(Base):
+    """Append-only security log, written in batches by ``app.utils.audit_log``.
+
+    On PostgreSQL the table is range-partitioned by month on ``occurred_at``
+    with a BRIN index on it (see the migration), so time-window queries touch
+    only the matching partitions and old months can be dropped whole. The
+    primary key there is ``(id, occurred_at)``, as partitioning requires.
+    """
+    __tablename__ = 'audit_events'
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    # Plain strings rather than a PG enum: new event types need no migration
+    event = Column(String(32), nullable=False)
+    success = Column(Boolean, nullable=False)
+    # No foreign key: the log outlives deleted users
+    user_id = Column(Integer, nullable=True, index=True)
+    email = Column(String, nullable=True, index=True)
+    ip_address = Column(String(45), nullable=True)
+    user_agent = Column(String(256), nullable=True)
+    detail = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+
+    __table_args__ = (
+        # Rows arrive in time order, so a BRIN index (a few pages per
+        # partition) narrows time ranges almost as well as a btree
+        Index('ix_audit_events_occurred_at', 'occurred_at', postgresql_using='brin'),
+    )
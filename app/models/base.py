@@ -0,0 +1,5 @@
+from sqlalchemy.orm import declarative_base
+
+# Kept apart from app.database so migrations can load the models without
+# creating an engine or reading any settings.
+Base = declarative_base()
@@ -0,0 +1,70 @@
+from sqlalchemy import Column, Integer, String, Text, Float, Date, DateTime, ForeignKey, Enum as SQLAlchemyEnum, Index, UniqueConstraint, CheckConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.models.base import Base
+import enum
+
+class CarePlanStatus(str, enum.Enum):
+    active = "active"
+    paused = "paused"
+    ended = "ended"
+
+class VisitStatus(str, enum.Enum):
+    unassigned = "unassigned"
+    scheduled = "scheduled"
+    cancelled = "cancelled"
+    completed = "completed"
+
+class CarePlan(Base):
+    __tablename__ = 'care_plans'
+
+    id = Column(Integer, primary_key=True)
+    customer_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    title = Column(String, nullable=False)
+    notes = Column(Text, nullable=True)
+    # Where visits take place
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=True)
+    status = Column(SQLAlchemyEnum(CarePlanStatus), nullable=False, default=CarePlanStatus.active)
+    # Visits have been generated up to (excluding) this date
+    scheduled_until = Column(Date, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    slots = relationship('CarePlanSlot', cascade='all, delete-orphan', order_by='CarePlanSlot.weekday')
+
+class CarePlanSlot(Base):
+    """A weekly recurring visit: every ``weekday`` at ``start_minute`` (local time)."""
+    __tablename__ = 'care_plan_slots'
+
+    id = Column(Integer, primary_key=True)
+    care_plan_id = Column(Integer, ForeignKey('care_plans.id', ondelete='CASCADE'), nullable=False, index=True)
+    weekday = Column(Integer, nullable=False)
+    start_minute = Column(Integer, nullable=False)
+    duration_minutes = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint('weekday BETWEEN 0 AND 6 AND start_minute BETWEEN 0 AND 1439 AND duration_minutes > 0',
+                        name='ck_care_plan_slots_range'),
+    )
+
+class Visit(Base):
+    __tablename__ = 'visits'
+
+    id = Column(Integer, primary_key=True)
+    care_plan_id = Column(Integer, ForeignKey('care_plans.id', ondelete='CASCADE'), nullable=False)
+    slot_id = Column(Integer, ForeignKey('care_plan_slots.id', ondelete='SET NULL'), nullable=True)
+    caregiver_id = Column(Integer, ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    starts_at = Column(DateTime(timezone=True), nullable=False)
+    ends_at = Column(DateTime(timezone=True), nullable=False)
+    status = Column(SQLAlchemyEnum(VisitStatus), nullable=False, default=VisitStatus.unassigned)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Generating the same recurring visit twice is a no-op
+        UniqueConstraint('care_plan_id', 'slot_id', 'starts_at', name='uq_visits_care_plan_id_slot_id_starts_at'),
+        Index('ix_visits_care_plan_id_starts_at', 'care_plan_id', 'starts_at'),
+        Index('ix_visits_caregiver_id_starts_at', 'caregiver_id', 'starts_at'),
+        Index('ix_visits_status_starts_at', 'status', 'starts_at'),
+    )
@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, JSON, Index, CheckConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.models.base import Base
+
+# Availability is stored as weekly recurring slots in "minute of week":
+# Monday 00:00 is 0, Sunday 23:59 is 10079.
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+class CaregiverProfile(Base):
+    __tablename__ = 'caregiver_profiles'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, unique=True, index=True)
+    bio = Column(Text, nullable=True)
+    services = Column(JSON, nullable=False, default=list)
+    languages = Column(JSON, nullable=False, default=list)
+    hourly_rate = Column(Float, nullable=False)
+    years_experience = Column(Integer, nullable=False, default=0)
+    rating = Column(Float, nullable=False, default=0.0)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    service_radius_km = Column(Float, nullable=False, default=25.0)
+    # Cell of the matching grid (see app.services.matching_engine), so a
+    # region can also be prefiltered in SQL
+    grid_cell = Column(String(32), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+
+    slots = relationship('AvailabilitySlot', cascade='all, delete-orphan', order_by='AvailabilitySlot.start_minute')
+
+class AvailabilitySlot(Base):
+    __tablename__ = 'availability_slots'
+
+    id = Column(Integer, primary_key=True)
+    caregiver_id = Column(Integer, ForeignKey('caregiver_profiles.id', ondelete='CASCADE'), nullable=False)
+    start_minute = Column(Integer, nullable=False)
+    end_minute = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint('start_minute >= 0 AND start_minute < end_minute AND end_minute <= 10080',
+                        name='ck_availability_slots_week_range'),
+        Index('ix_availability_slots_caregiver_id_start_minute', 'caregiver_id', 'start_minute'),
+        Index('ix_availability_slots_start_minute_end_minute', 'start_minute', 'end_minute'),
+    )
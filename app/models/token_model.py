@@ -0,0 +1,52 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Enum as SQLAlchemyEnum
+from sqlalchemy.sql import func
+from app.models.base import Base
+import enum
+
+class TokenPurpose(str, enum.Enum):
+    email_verification = "email_verification"
+    password_reset = "password_reset"
+
+class AuthToken(Base):
+    __tablename__ = 'auth_tokens'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    # SHA-256 hex digest; the plaintext token exists only in the email link, and
+    # the outbox clears the email body once it is sent
+    token_hash = Column(String(64), nullable=False, unique=True, index=True)
+    purpose = Column(SQLAlchemyEnum(TokenPurpose), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        # A user has at most one live token per purpose; issuing a new one replaces it
+        Index('uq_auth_tokens_user_id_purpose', 'user_id', 'purpose', unique=True),
+    )
+
+class RefreshToken(Base):
+    __tablename__ = 'refresh_tokens'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True, index=True)
+    # Every token rotated from one login shares a family; reuse of a rotated
+    # token revokes the whole family.
+    family_id = Column(String(32), nullable=False, index=True)
+    # The access token issued together with this refresh token, so revoking
+    # the family also revokes the access tokens it handed out.
+    access_jti = Column(String(32), nullable=False)
+    access_expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    used_at = Column(DateTime(timezone=True), nullable=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+
+class RevokedToken(Base):
+    """Access tokens revoked before their expiry, by ``jti``; kept until they expire anyway."""
+    __tablename__ = 'revoked_tokens'
+
+    id = Column(Integer, primary_key=True)
+    jti = Column(String(32), nullable=False, unique=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
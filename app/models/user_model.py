@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, Enum as SQLAlchemyEnum
-from app.database import Base
+from sqlalchemy import Column, Integer, String, Boolean, Enum as SQLAlchemyEnum, Index, false
+from app.models.base import Base
 import enum
 
 class UserRole(str, enum.Enum):
@@ -22,5 +22,16 @@ class User(Base):
     role = Column(SQLAlchemyEnum(UserRole), nullable=False)
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False, nullable=False)
-    verification_token = Column(String, nullable=True)
+    # Caregivers can only log in (and be matched) once an admin approves them
+    is_approved = Column(Boolean, default=False, nullable=False, server_default=false())
     auth_provider = Column(SQLAlchemyEnum(AuthProvider), default=AuthProvider.email)
+
+    # Admin listings filter on these columns and page by id (keyset), so
+    # every composite ends in id; the trigram indexes serve prefix search.
+    __table_args__ = (
+        Index('ix_users_role_id', 'role', 'id'),
+        Index('ix_users_role_is_verified_is_active_id', 'role', 'is_verified', 'is_active', 'id'),
+        Index('ix_users_auth_provider_id', 'auth_provider', 'id'),
+        Index('ix_users_email_trgm', 'email', postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}),
+        Index('ix_users_full_name_trgm', 'full_name', postgresql_using='gin', postgresql_ops={'full_name': 'gin_trgm_ops'}),
+    )
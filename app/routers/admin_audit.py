@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.auth.dependencies import require_admin
+from app.crud.audit_crud import list_events
+from app.database import get_db
+from app.models.audit_model import AuditEventType
+from app.schemas.audit_schemas import AuditEventPage, AuditEventResponse
+from app.services.user_listing_service import decode_cursor, encode_cursor
+
+router = APIRouter(
+    prefix="/admin/audit-events",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+)
+
+@router.get("", response_model=AuditEventPage)
+async def list_audit_events(
+    user_id: Optional[int] = None,
+    email: Optional[str] = None,
+    event: Optional[AuditEventType] = None,
+    success: Optional[bool] = None,
+    since: Optional[datetime] = Query(None, description="Inclusive; bounding the time range keeps the query to few partitions"),
+    until: Optional[datetime] = Query(None, description="Exclusive"),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+):
+    """Audit events, newest first. Events reach the table within ``AUDIT_FLUSH_INTERVAL_SECONDS``."""
+    # One extra row tells us whether another page exists.
+    events = await list_events(
+        db, user_id=user_id, email=email, event=event, success=success, since=since, until=until,
+        before_id=decode_cursor(cursor), limit=limit + 1,
+    )
+    has_more = len(events) > limit
+    events = events[:limit]
+    return AuditEventPage(
+        items=[AuditEventResponse.model_validate(event) for event in events],
+        next_cursor=encode_cursor(events[-1].id) if has_more else None,
+    )
@@ -0,0 +1,71 @@
+import io
+from typing import Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.auth.dependencies import require_admin
+from app.database import SessionLocal, get_db
+from app.models.user_model import UserRole
+from app.schemas.bulk_schemas import ImportReport
+from app.schemas.user_schemas import UserPage
+from app.services.bulk_user_service import FORMATS, UserImporter, detect_format, export_users
+from app.services.user_listing_service import list_users_response, user_filters
+from app.utils.password_hashing import password_hash_report
+
+router = APIRouter(
+    prefix="/admin/users",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+)
+
+MEDIA_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+@router.get("", response_model=UserPage)
+async def list_all_users(
+    request: Request,
+    role: Optional[UserRole] = None,
+    filters: dict = Depends(user_filters),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+):
+    return await list_users_response(request, db, role, filters, cursor, limit)
+
+@router.post("/import", response_model=ImportReport)
+async def import_users(
+    file: UploadFile = File(...),
+    fmt: str = Query(None, alias="format", description="csv or jsonl; guessed from the file name if omitted"),
+    db: AsyncSession = Depends(get_db),
+):
+    fmt = fmt or detect_format(file.filename)
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}'")
+    # The upload is spooled to disk by Starlette; the importer reads it
+    # line by line in a worker thread.
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return await UserImporter(db).run(lines, fmt)
+    finally:
+        lines.detach()
+
+@router.get("/export")
+async def export(fmt: str = Query("csv", alias="format")):
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}'")
+
+    async def body():
+        # Own session: request-scoped dependencies are closed before the body streams.
+        async with SessionLocal() as db:
+            async for chunk in export_users(db, fmt):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="users.{fmt}"'},
+    )
+
+@router.get("/password-hashes")
+async def password_hashes(db: AsyncSession = Depends(get_db)):
+    """Stored password hashes by scheme; ``legacy`` counts those still to be upgraded at login."""
+    return await password_hash_report(db)
@@ -1 +1,67 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.auth.dependencies import require_admin, require_role
+from app.database import get_db
+from app.models.user_model import User, UserRole
+from app.schemas.caregiver_schemas import (
+    AvailabilityUpdate,
+    CaregiverMatch,
+    CaregiverProfileResponse,
+    CaregiverProfileUpdate,
+    MatchRequest,
+    WeeklySlot,
+)
+from app.schemas.user_schemas import UserAdminResponse, UserPage
+from app.services.caregiver_service import CaregiverService, weekly_slots
+from app.services.user_listing_service import list_users_response, user_filters
 
+router = APIRouter(
+    prefix="/caregivers",
+    tags=["caregivers"],
+)
+
+@router.get("/", response_model=UserPage, dependencies=[Depends(require_admin)])
+async def list_caregivers(
+    request: Request,
+    filters: dict = Depends(user_filters),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+):
+    """Admin listing; send `Accept: application/x-ndjson` (or `format=ndjson`) to stream every match."""
+    return await list_users_response(request, db, UserRole.caregiver, filters, cursor, limit)
+
+@router.get("/me/profile", response_model=CaregiverProfileResponse)
+async def get_my_profile(
+    user: User = Depends(require_role(UserRole.caregiver)),
+    db: AsyncSession = Depends(get_db),
+):
+    return await CaregiverService(db).get_profile(user)
+
+@router.put("/me/profile", response_model=CaregiverProfileResponse)
+async def update_my_profile(
+    data: CaregiverProfileUpdate,
+    user: User = Depends(require_role(UserRole.caregiver)),
+    db: AsyncSession = Depends(get_db),
+):
+    return await CaregiverService(db).update_profile(user, data)
+
+@router.put("/me/availability", response_model=List[WeeklySlot])
+async def set_my_availability(
+    data: AvailabilityUpdate,
+    user: User = Depends(require_role(UserRole.caregiver)),
+    db: AsyncSession = Depends(get_db),
+):
+    """Replace the weekly availability; overlapping slots are merged."""
+    profile = await CaregiverService(db).set_availability(user, data)
+    return weekly_slots((slot.start_minute, slot.end_minute) for slot in profile.slots)
+
+@router.post("/match", response_model=List[CaregiverMatch],
+             dependencies=[Depends(require_role(UserRole.customer, UserRole.admin))])
+async def match_caregivers(request: MatchRequest, db: AsyncSession = Depends(get_db)):
+    return CaregiverService(db).match(request)
+
+@router.post("/{user_id}/approve", response_model=UserAdminResponse, dependencies=[Depends(require_admin)])
+async def approve_caregiver(user_id: int, approved: bool = True, db: AsyncSession = Depends(get_db)):
+    return await CaregiverService(db).set_approval(user_id, approved)
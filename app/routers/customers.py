@@ -1 +1,83 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.auth.dependencies import require_admin, require_role
+from app.database import get_db
+from app.models.user_model import User, UserRole
+from app.schemas.care_plan_schemas import CarePlanCreate, CarePlanResponse, ScheduleReport, VisitConflict, VisitResponse, VisitUpdate
+from app.schemas.user_schemas import UserPage
+from app.services.customer_service import SCHEDULE_HORIZON_DAYS, CarePlanService
+from app.services.user_listing_service import list_users_response, user_filters
 
+router = APIRouter(
+    prefix="/customers",
+    tags=["customers"],
+)
+
+@router.get("/", response_model=UserPage, dependencies=[Depends(require_admin)])
+async def list_customers(
+    request: Request,
+    filters: dict = Depends(user_filters),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+):
+    """Admin listing; send `Accept: application/x-ndjson` (or `format=ndjson`) to stream every match."""
+    return await list_users_response(request, db, UserRole.customer, filters, cursor, limit)
+
+@router.post("/me/care-plans", response_model=CarePlanResponse, status_code=201)
+async def create_care_plan(
+    data: CarePlanCreate,
+    user: User = Depends(require_role(UserRole.customer)),
+    db: AsyncSession = Depends(get_db),
+):
+    """Create a recurring care plan; its visits for the scheduling horizon are generated and staffed."""
+    return await CarePlanService(db).create_plan(user, data)
+
+@router.get("/me/care-plans", response_model=List[CarePlanResponse])
+async def list_care_plans(
+    user: User = Depends(require_role(UserRole.customer)),
+    db: AsyncSession = Depends(get_db),
+):
+    return await CarePlanService(db).list_plans(user)
+
+@router.get("/me/care-plans/{plan_id}/visits", response_model=List[VisitResponse])
+async def list_care_plan_visits(
+    plan_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user: User = Depends(require_role(UserRole.customer)),
+    db: AsyncSession = Depends(get_db),
+):
+    return await CarePlanService(db).list_visits(user, plan_id, start, end)
+
+@router.post("/me/care-plans/{plan_id}/schedule", response_model=ScheduleReport)
+async def extend_care_plan_schedule(
+    plan_id: int,
+    days: int = Query(SCHEDULE_HORIZON_DAYS, ge=1, le=180),
+    user: User = Depends(require_role(UserRole.customer)),
+    db: AsyncSession = Depends(get_db),
+):
+    """Generate and staff visits up to `days` ahead; only the newly generated window is solved."""
+    service = CarePlanService(db)
+    return await service.extend_schedule(await service.get_plan(user, plan_id), days)
+
+@router.patch("/me/visits/{visit_id}", response_model=VisitResponse)
+async def update_visit(
+    visit_id: int,
+    data: VisitUpdate,
+    user: User = Depends(require_role(UserRole.customer)),
+    db: AsyncSession = Depends(get_db),
+):
+    """Move or cancel one visit; only visits around its old and new time are re-solved."""
+    return await CarePlanService(db).update_visit(user, visit_id, data)
+
+@router.get("/schedule/conflicts", response_model=List[VisitConflict], dependencies=[Depends(require_admin)])
+async def schedule_conflicts(
+    start: Optional[datetime] = None,
+    days: int = Query(SCHEDULE_HORIZON_DAYS, ge=1, le=180),
+    db: AsyncSession = Depends(get_db),
+):
+    start = start or datetime.now(timezone.utc)
+    return await CarePlanService(db).conflicts(start, start + timedelta(days=days))
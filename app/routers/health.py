@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
+from app.startup import readiness
+
+router = APIRouter(tags=["health"])
+
+@router.get("/health/live", include_in_schema=False)
+async def live():
+    """The process is up and serving; says nothing about its dependencies."""
+    return {"status": "ok"}
+
+@router.get("/health/ready", include_in_schema=False)
+async def ready():
+    """200 once startup warm-up has finished, 503 before that and while shutting down."""
+    if not readiness.ready:
+        return ORJSONResponse({"status": "starting", "warmed": sorted(readiness.steps)}, status_code=503)
+    return {"status": "ready", "warmup_seconds": readiness.steps}
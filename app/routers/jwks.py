@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Request, Response
+from app.auth.keyring import JWKS_MAX_AGE_SECONDS, keyring
+
+router = APIRouter(tags=["auth"])
+
+@router.get("/.well-known/jwks.json")
+async def jwks(request: Request):
+    """Public keys that verify our access tokens, looked up by the token's ``kid``."""
+    body, etag = keyring.jwks()
+    headers = {"Cache-Control": f"public, max-age={JWKS_MAX_AGE_SECONDS}", "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from starlette.responses import PlainTextResponse
+from app.utils.metrics import render_prometheus
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
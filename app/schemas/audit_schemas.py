@@ -0,0 +1,22 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+
+class AuditEventResponse(BaseModel):
+    id: int
+    occurred_at: datetime
+    event: str
+    success: bool
+    user_id: Optional[int] = None
+    email: Optional[str] = None
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    detail: Optional[Dict[str, Any]] = None
+
+    class Config:
+        from_attributes = True
+
+class AuditEventPage(BaseModel):
+    items: List[AuditEventResponse]
+    # Pass back as ``cursor`` for the next (older) page; null on the last page
+    next_cursor: Optional[str] = None
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class RowError(BaseModel):
+    line: int
+    email: Optional[str] = None
+    errors: List[str]
+
+class ImportReport(BaseModel):
+    total: int = 0
+    created: int = 0
+    failed: int = 0
+    errors: List[RowError] = []
+    errors_truncated: bool = False
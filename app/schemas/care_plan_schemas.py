@@ -0,0 +1,73 @@
+from datetime import date, datetime, time
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
+from app.models.care_plan_model import CarePlanStatus, VisitStatus
+from app.schemas.caregiver_schemas import Location
+
+class CarePlanSlotIn(BaseModel):
+    weekday: int = Field(..., ge=0, le=6, description="0 = Monday")
+    start: time
+    duration_minutes: int = Field(..., ge=15, le=720)
+
+class CarePlanSlotResponse(BaseModel):
+    weekday: int
+    start_minute: int
+    duration_minutes: int
+
+    class Config:
+        from_attributes = True
+
+class CarePlanCreate(Location):
+    title: str = Field(..., max_length=200)
+    notes: Optional[str] = Field(None, max_length=4000)
+    start_date: date
+    end_date: Optional[date] = None
+    slots: List[CarePlanSlotIn] = Field(..., min_length=1, max_length=50)
+
+    @model_validator(mode="after")
+    def check_dates(self):
+        if self.end_date is not None and self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        return self
+
+class CarePlanResponse(BaseModel):
+    id: int
+    title: str
+    notes: Optional[str] = None
+    latitude: float
+    longitude: float
+    start_date: date
+    end_date: Optional[date] = None
+    status: CarePlanStatus
+    scheduled_until: Optional[date] = None
+    slots: List[CarePlanSlotResponse]
+
+    class Config:
+        from_attributes = True
+
+class VisitResponse(BaseModel):
+    id: int
+    care_plan_id: int
+    caregiver_id: Optional[int] = None
+    starts_at: datetime
+    ends_at: datetime
+    status: VisitStatus
+
+    class Config:
+        from_attributes = True
+
+class VisitUpdate(BaseModel):
+    starts_at: Optional[datetime] = None
+    duration_minutes: Optional[int] = Field(None, ge=15, le=720)
+    cancel: bool = False
+
+class ScheduleReport(BaseModel):
+    window_start: datetime
+    window_end: datetime
+    kept: int = 0
+    assigned: int = 0
+    unassigned: int = 0
+
+class VisitConflict(BaseModel):
+    caregiver_id: int
+    visit_ids: List[int]
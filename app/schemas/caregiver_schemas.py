@@ -0,0 +1,55 @@
+from datetime import time
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
+
+# Rough bounding box of Ontario; locations outside it are rejected.
+ONTARIO_LATITUDE = (41.6, 57.0)
+ONTARIO_LONGITUDE = (-95.2, -74.3)
+
+class Location(BaseModel):
+    latitude: float = Field(..., ge=ONTARIO_LATITUDE[0], le=ONTARIO_LATITUDE[1])
+    longitude: float = Field(..., ge=ONTARIO_LONGITUDE[0], le=ONTARIO_LONGITUDE[1])
+
+class CaregiverProfileUpdate(Location):
+    bio: Optional[str] = Field(None, max_length=4000)
+    services: List[str] = []
+    languages: List[str] = []
+    hourly_rate: float = Field(..., gt=0, le=1000)
+    years_experience: int = Field(0, ge=0, le=80)
+    service_radius_km: float = Field(25.0, gt=0, le=200)
+
+class CaregiverProfileResponse(CaregiverProfileUpdate):
+    user_id: int
+    rating: float
+
+    class Config:
+        from_attributes = True
+
+class WeeklySlot(BaseModel):
+    """A recurring weekly slot; ``end`` of 00:00 means midnight at the end of the day."""
+    weekday: int = Field(..., ge=0, le=6, description="0 = Monday")
+    start: time
+    end: time
+
+    @model_validator(mode="after")
+    def check_order(self):
+        if self.end != time(0) and self.end <= self.start:
+            raise ValueError("end must be after start")
+        return self
+
+class AvailabilityUpdate(BaseModel):
+    slots: List[WeeklySlot] = Field(..., max_length=200)
+
+class MatchRequest(Location, WeeklySlot):
+    max_distance_km: float = Field(25.0, gt=0, le=200)
+    max_hourly_rate: Optional[float] = Field(None, gt=0)
+    limit: int = Field(20, ge=1, le=100)
+
+class CaregiverMatch(BaseModel):
+    user_id: int
+    full_name: Optional[str] = None
+    distance_km: float
+    hourly_rate: float
+    rating: float
+    years_experience: int
+    score: float
@@ -1,7 +1,8 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 from app.models.user_model import AuthProvider
+from app.utils.responses import compile_serializer
 
 class LoginRequest(BaseModel):
     username: str
@@ -31,3 +32,16 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+class UserAdminResponse(UserResponse):
+    is_active: Optional[bool] = None
+    is_verified: bool
+    is_approved: bool = False
+    auth_provider: Optional[AuthProvider] = None
+
+class UserPage(BaseModel):
+    items: List[UserAdminResponse]
+    # Pass back as ``cursor`` for the next page; null on the last page
+    next_cursor: Optional[str] = None
+
+# Trusted ORM rows -> UserResponse-shaped dicts without re-validation
+serialize_user = compile_serializer(UserResponse)
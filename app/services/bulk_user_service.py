@@ -0,0 +1,256 @@
+"""Bulk import and export of users (CSV or JSON lines).
+
+Imports are processed in chunks: each chunk is validated with
+``UserCreate``, its passwords are hashed in parallel on a process pool, and
+it is written with one multi-row ``INSERT ... ON CONFLICT (email) DO
+NOTHING RETURNING email`` and committed, so memory is bounded by the chunk
+size and a bad row never aborts the rest of the file. Exports stream rows
+from a server-side cursor.
+"""
+import asyncio
+import csv
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user_model import AuthProvider, User
+from app.schemas.bulk_schemas import ImportReport, RowError
+from app.schemas.user_schemas import UserCreate
+from app.utils.auth_utils import get_password_hash
+from app.utils.instrumentation import span
+from app.utils.metrics import metrics
+from app.logging_config import logger
+
+load_dotenv()
+
+BULK_IMPORT_CHUNK_SIZE = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "1000"))
+BULK_IMPORT_HASH_WORKERS = int(os.getenv("BULK_IMPORT_HASH_WORKERS", os.cpu_count() or 1))
+BULK_IMPORT_MAX_ERRORS = int(os.getenv("BULK_IMPORT_MAX_ERRORS", "1000"))
+BULK_EXPORT_BATCH_SIZE = int(os.getenv("BULK_EXPORT_BATCH_SIZE", "1000"))
+
+# SQLite's default limit (PostgreSQL/asyncpg allow one more); every row of
+# a chunk binds one parameter per inserted column.
+MAX_BIND_PARAMETERS = 32766
+IMPORT_INSERT_COLUMNS = 7
+MAX_IMPORT_CHUNK_SIZE = MAX_BIND_PARAMETERS // IMPORT_INSERT_COLUMNS
+
+FORMATS = ("csv", "jsonl")
+IMPORT_ROLES = ("customer", "caregiver")
+EXPORT_COLUMNS = ("id", "email", "full_name", "role", "is_active", "is_verified", "auth_provider")
+
+users_imported = metrics.counter("bulk_import_rows_total", "Rows processed by bulk user imports, by outcome.")
+
+_hash_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        logger.info(f"Starting bulk import hash pool with {BULK_IMPORT_HASH_WORKERS} processes")
+        # Not fork: a forked child would inherit the event loop, pool connections and held locks
+        _hash_executor = ProcessPoolExecutor(max_workers=BULK_IMPORT_HASH_WORKERS,
+                                             mp_context=multiprocessing.get_context("forkserver"))
+    return _hash_executor
+
+
+def shutdown_hash_executor() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=True)
+        _hash_executor = None
+
+
+def _hash_batch(passwords: List[str]) -> List[str]:
+    return [get_password_hash(password) for password in passwords]
+
+
+async def hash_passwords(passwords: List[str], workers: int = BULK_IMPORT_HASH_WORKERS) -> List[str]:
+    """Hash ``passwords`` (order preserved), one slice per pool process."""
+    if not passwords:
+        return []
+    loop = asyncio.get_running_loop()
+    executor = _get_hash_executor()
+    size = -(-len(passwords) // workers)
+    slices = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    with span("password_hash_bulk"):
+        results = await asyncio.gather(*(loop.run_in_executor(executor, _hash_batch, part) for part in slices))
+    return [hashed for part in results for hashed in part]
+
+
+def detect_format(filename: Optional[str], default: str = "csv") -> str:
+    if filename and filename.lower().endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if filename and filename.lower().endswith(".csv"):
+        return "csv"
+    return default
+
+
+def iter_records(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield ``(line, record, parse_error)`` for every data row."""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            # Empty cells mean "not given", so schema defaults apply.
+            yield reader.line_num, {k: v for k, v in record.items() if k and v not in ("", None)}, None
+    elif fmt == "jsonl":
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, None, "Expected a JSON object"
+                continue
+            yield line_no, record, None
+    else:
+        raise ValueError(f"Unsupported format '{fmt}'")
+
+
+def _chunks(records: Iterator, size: int) -> Iterator[list]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert(db: AsyncSession):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(User)
+    if dialect == "sqlite":
+        return sqlite.insert(User)
+    raise RuntimeError(f"Bulk import does not support the '{dialect}' dialect")
+
+
+class UserImporter:
+    def __init__(self, db: AsyncSession, chunk_size: int = BULK_IMPORT_CHUNK_SIZE,
+                 max_errors: int = BULK_IMPORT_MAX_ERRORS):
+        self.db = db
+        if chunk_size > MAX_IMPORT_CHUNK_SIZE:
+            logger.warning(f"Bulk import chunk size {chunk_size} exceeds the statement parameter limit; "
+                           f"using {MAX_IMPORT_CHUNK_SIZE}")
+        self.chunk_size = max(1, min(chunk_size, MAX_IMPORT_CHUNK_SIZE))
+        self.max_errors = max_errors
+        self.report = ImportReport()
+
+    def _error(self, line: int, email: Optional[str], *errors: str) -> None:
+        self.report.failed += 1
+        users_imported.inc(outcome="failed")
+        if len(self.report.errors) < self.max_errors:
+            self.report.errors.append(RowError(line=line, email=email, errors=list(errors)))
+        else:
+            self.report.errors_truncated = True
+
+    def _validate(self, chunk) -> List[Tuple[int, UserCreate]]:
+        valid, seen = [], set()
+        for line, record, parse_error in chunk:
+            self.report.total += 1
+            if parse_error:
+                self._error(line, None, parse_error)
+                continue
+            try:
+                user = UserCreate(**record)
+            except ValidationError as e:
+                self._error(line, record.get("email"), *(
+                    f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+                ))
+                continue
+            email = user.email
+            if user.role not in IMPORT_ROLES:
+                self._error(line, email, f"role: must be one of {', '.join(IMPORT_ROLES)}")
+            elif email in seen:
+                self._error(line, email, "email: duplicated in this chunk")
+            else:
+                seen.add(email)
+                valid.append((line, user))
+        return valid
+
+    async def import_chunk(self, chunk) -> None:
+        valid = self._validate(chunk)
+        if not valid:
+            return
+        to_hash = [user.password for _, user in valid if user.auth_provider == AuthProvider.email and user.password]
+        hashes = iter(await hash_passwords(to_hash))
+        rows: Dict[str, dict] = {}
+        lines: Dict[str, int] = {}
+        for line, user in valid:
+            email = user.email
+            is_password_user = user.auth_provider == AuthProvider.email
+            rows[email] = {
+                "email": email,
+                # Email users imported without a password set one via forgot-password.
+                "hashed_password": next(hashes) if is_password_user and user.password else None,
+                "full_name": user.full_name,
+                "role": user.role,
+                "is_active": True,
+                "is_verified": bool(user.is_verified) or not is_password_user,
+                "auth_provider": user.auth_provider,
+            }
+            lines[email] = line
+        stmt = (
+            _insert(self.db)
+            .values(list(rows.values()))
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.email)
+        )
+        with span("db"):
+            created = set((await self.db.execute(stmt)).scalars().all())
+            await self.db.commit()
+        self.report.created += len(created)
+        users_imported.inc(len(created), outcome="created")
+        for email in rows.keys() - created:
+            self._error(lines[email], email, "email: already registered")
+
+    async def run(self, lines: Iterable[str], fmt: str) -> ImportReport:
+        chunks = _chunks(iter_records(lines, fmt), self.chunk_size)
+        # Reading ``lines`` blocks (uploads are spooled to disk), so each
+        # chunk is read and parsed off the event loop.
+        while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+            await self.import_chunk(chunk)
+        logger.info(
+            f"Bulk import finished: {self.report.created} created, {self.report.failed} failed "
+            f"of {self.report.total} rows"
+        )
+        return self.report
+
+
+def _csv_rows(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def _export_value(value):
+    return value.value if hasattr(value, "value") else value
+
+
+async def export_users(db: AsyncSession, fmt: str, batch_size: int = BULK_EXPORT_BATCH_SIZE) -> AsyncIterator[str]:
+    """Yield the users table as CSV or JSON lines, one cursor batch at a time."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'")
+    columns = [getattr(User, name) for name in EXPORT_COLUMNS]
+    stmt = select(*columns).order_by(User.id).execution_options(yield_per=batch_size, use_replica=True)
+    if fmt == "csv":
+        yield _csv_rows([EXPORT_COLUMNS])
+    result = await db.stream(stmt)
+    async for rows in result.partitions():
+        if fmt == "csv":
+            yield _csv_rows([_export_value(value) for value in row] for row in rows)
+        else:
+            yield "".join(
+                json.dumps(dict(zip(EXPORT_COLUMNS, map(_export_value, row)))) + "\n" for row in rows
+            )
@@ -0,0 +1,191 @@
+import asyncio
+import os
+from datetime import time
+from typing import Callable, List, Optional, Tuple
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.caregiver_crud import get_profile, replace_slots, set_approval, stream_matchable_caregivers, upsert_profile
+from app.database import SessionLocal
+from app.models.caregiver_model import CaregiverProfile, MINUTES_PER_DAY
+from app.models.user_model import User
+from app.schemas.caregiver_schemas import AvailabilityUpdate, CaregiverMatch, CaregiverProfileUpdate, MatchRequest, WeeklySlot
+from app.services.customer_service import CarePlanService
+from app.services.matching_engine import CaregiverEntry, MatchingEngine, grid_cell_id, matching_engine, normalize_slots
+from app.auth.user_cache import user_cache
+from app.logging_config import logger
+
+load_dotenv()
+
+MATCHING_REFRESH_SECONDS = float(os.getenv("MATCHING_REFRESH_SECONDS", "300"))
+
+
+def _minute_of_day(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def slot_minutes(slot: WeeklySlot):
+    """Convert a weekday/time slot to a [start, end) range in minutes of the week."""
+    day = slot.weekday * MINUTES_PER_DAY
+    end = _minute_of_day(slot.end) or MINUTES_PER_DAY
+    return day + _minute_of_day(slot.start), day + end
+
+
+def weekly_slots(ranges) -> List[WeeklySlot]:
+    """Inverse of ``slot_minutes``; merged ranges spanning midnight are split per day."""
+    slots = []
+    for start, end in ranges:
+        while start < end:
+            weekday, offset = divmod(start, MINUTES_PER_DAY)
+            day_end = min(end, (weekday + 1) * MINUTES_PER_DAY)
+            end_offset = day_end - weekday * MINUTES_PER_DAY
+            slots.append(WeeklySlot(
+                weekday=weekday,
+                start=time(offset // 60, offset % 60),
+                end=time(0) if end_offset == MINUTES_PER_DAY else time(end_offset // 60, end_offset % 60),
+            ))
+            start = day_end
+    return slots
+
+
+def entry_from_profile(profile: CaregiverProfile, full_name: Optional[str]) -> CaregiverEntry:
+    return CaregiverEntry(
+        user_id=profile.user_id,
+        full_name=full_name,
+        latitude=profile.latitude,
+        longitude=profile.longitude,
+        service_radius_km=profile.service_radius_km,
+        rating=profile.rating,
+        hourly_rate=profile.hourly_rate,
+        years_experience=profile.years_experience,
+        slots=[(slot.start_minute, slot.end_minute) for slot in profile.slots],
+    )
+
+
+class CaregiverService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_profile(self, user: User) -> CaregiverProfile:
+        profile = await get_profile(self.db, user.id)
+        if profile is None:
+            raise HTTPException(status_code=404, detail="Caregiver profile not found")
+        return profile
+
+    async def update_profile(self, user: User, data: CaregiverProfileUpdate) -> CaregiverProfile:
+        values = data.model_dump()
+        values["grid_cell"] = grid_cell_id(data.latitude, data.longitude)
+        profile = await upsert_profile(self.db, user.id, values)
+        self._reindex(user, profile)
+        return profile
+
+    async def set_availability(self, user: User, data: AvailabilityUpdate) -> CaregiverProfile:
+        profile = await self.get_profile(user)
+        await replace_slots(self.db, profile, normalize_slots(slot_minutes(slot) for slot in data.slots))
+        self._reindex(user, profile)
+        await CarePlanService(self.db).reschedule_caregiver(user.id)
+        return profile
+
+    async def set_approval(self, user_id: int, approved: bool) -> User:
+        user = await set_approval(self.db, user_id, approved)
+        if user is None:
+            raise HTTPException(status_code=404, detail="Caregiver not found")
+        await user_cache.invalidate(user.email)
+        profile = await get_profile(self.db, user_id)
+        if profile is not None:
+            self._reindex(user, profile)
+            await CarePlanService(self.db).reschedule_caregiver(user_id)
+        return user
+
+    def match(self, request: MatchRequest) -> List[CaregiverMatch]:
+        start, end = slot_minutes(request)
+        results = matching_engine.match(
+            request.latitude, request.longitude, start, end,
+            max_distance_km=request.max_distance_km,
+            limit=request.limit,
+            max_hourly_rate=request.max_hourly_rate,
+        )
+        return [CaregiverMatch(**result._asdict()) for result in results]
+
+    def _reindex(self, user: User, profile: CaregiverProfile) -> None:
+        if user.is_approved and user.is_active:
+            matching_index.upsert(entry_from_profile(profile, user.full_name))
+        else:
+            matching_index.remove(user.id)
+
+
+class MatchingIndexRefresher:
+    """Loads the matching index at startup and reloads it periodically.
+
+    Changes made through ``CaregiverService`` update this process's index
+    immediately; the periodic reload picks up changes made by other workers.
+    Changes made while a reload runs may be missing from the snapshot it
+    read, so they are recorded and applied again after the swap.
+    """
+
+    def __init__(self, session_factory, interval: float):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        # (MatchingEngine method, argument) for each change made during a reload
+        self._changes: Optional[List[Tuple[Callable, object]]] = None
+
+    def upsert(self, entry: CaregiverEntry) -> None:
+        matching_engine.upsert(entry)
+        if self._changes is not None:
+            self._changes.append((MatchingEngine.upsert, entry))
+
+    def remove(self, user_id: int) -> None:
+        matching_engine.remove(user_id)
+        if self._changes is not None:
+            self._changes.append((MatchingEngine.remove, user_id))
+
+    async def refresh(self) -> int:
+        self._changes = []
+        try:
+            async with self.session_factory() as db:
+                entries = [
+                    entry_from_profile(profile, full_name)
+                    async for profile, full_name in stream_matchable_caregivers(db)
+                ]
+            fresh = MatchingEngine(matching_engine.cell_km)
+            # Building 100k entries takes a while; keep it off the event loop.
+            await asyncio.to_thread(fresh.rebuild, entries, len(entries))
+            matching_engine.swap(fresh)
+            for apply, argument in self._changes:
+                apply(matching_engine, argument)
+        finally:
+            self._changes = None
+        return len(entries)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                count = await self.refresh()
+                logger.debug(f"Matching index reloaded with {count} caregivers")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Matching index reload failed: {e}")
+
+    async def start(self) -> None:
+        if self._task is None:
+            try:
+                count = await self.refresh()
+                logger.info(f"Matching index loaded with {count} caregivers")
+            except Exception as e:
+                logger.error(f"Matching index load failed, will retry: {e}")
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+matching_index = MatchingIndexRefresher(SessionLocal, MATCHING_REFRESH_SECONDS)
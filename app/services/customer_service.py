@@ -0,0 +1,311 @@
+import asyncio
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.customer_crud import (
+    care_plans_due,
+    care_plans_with_unassigned_visits,
+    caregiver_commitments,
+    create_care_plan,
+    get_care_plan,
+    get_visit,
+    insert_visits,
+    list_care_plans,
+    list_visits,
+    lock_caregivers,
+    open_visits_in_window,
+    update_visit_assignments,
+)
+from app.database import SessionLocal
+from app.models.care_plan_model import CarePlan, CarePlanStatus, Visit, VisitStatus
+from app.models.user_model import User, UserRole
+from app.schemas.care_plan_schemas import CarePlanCreate, ScheduleReport, VisitConflict, VisitUpdate
+from app.services.scheduling_engine import SCHEDULE_TIMEZONE, ScheduledVisit, Scheduler, as_utc, find_conflicts
+from app.logging_config import logger
+
+load_dotenv()
+
+SCHEDULE_HORIZON_DAYS = int(os.getenv("SCHEDULE_HORIZON_DAYS", "28"))
+SCHEDULE_EXTEND_INTERVAL_SECONDS = float(os.getenv("SCHEDULE_EXTEND_INTERVAL_SECONDS", "3600"))
+SCHEDULE_EXTEND_BATCH_SIZE = int(os.getenv("SCHEDULE_EXTEND_BATCH_SIZE", "100"))
+
+
+def _today() -> date:
+    return datetime.now(SCHEDULE_TIMEZONE).date()
+
+
+def generate_visit_rows(plan: CarePlan, start: date, end: date) -> List[dict]:
+    """Rows for every occurrence of the plan's weekly slots on days in [start, end)."""
+    if plan.end_date is not None:
+        end = min(end, plan.end_date + timedelta(days=1))
+    start = max(start, plan.start_date)
+    rows = []
+    day = start
+    while day < end:
+        for slot in plan.slots:
+            if slot.weekday != day.weekday():
+                continue
+            local = datetime.combine(day, time(slot.start_minute // 60, slot.start_minute % 60), SCHEDULE_TIMEZONE)
+            starts_at = local.astimezone(timezone.utc)
+            rows.append({
+                "care_plan_id": plan.id,
+                "slot_id": slot.id,
+                "starts_at": starts_at,
+                "ends_at": starts_at + timedelta(minutes=slot.duration_minutes),
+                "status": VisitStatus.unassigned,
+            })
+        day += timedelta(days=1)
+    return rows
+
+
+class CarePlanService:
+    def __init__(self, db: AsyncSession, scheduler: Optional[Scheduler] = None):
+        self.db = db
+        self.scheduler = scheduler or Scheduler()
+
+    async def get_plan(self, user: User, plan_id: int) -> CarePlan:
+        plan = await get_care_plan(self.db, plan_id)
+        if plan is None or (plan.customer_id != user.id and user.role != UserRole.admin):
+            raise HTTPException(status_code=404, detail="Care plan not found")
+        return plan
+
+    async def list_plans(self, user: User) -> List[CarePlan]:
+        return await list_care_plans(self.db, user.id)
+
+    async def create_plan(self, user: User, data: CarePlanCreate) -> CarePlan:
+        values = data.model_dump(exclude={"slots"})
+        slots = [
+            {"weekday": slot.weekday, "start_minute": slot.start.hour * 60 + slot.start.minute,
+             "duration_minutes": slot.duration_minutes}
+            for slot in data.slots
+        ]
+        plan = await create_care_plan(self.db, user.id, values, slots)
+        await self.extend_schedule(plan)
+        return plan
+
+    async def extend_schedule(self, plan: CarePlan, days: int = SCHEDULE_HORIZON_DAYS) -> ScheduleReport:
+        """Generate the plan's visits up to ``days`` ahead and staff just those."""
+        start = max(plan.scheduled_until or plan.start_date, _today())
+        end = _today() + timedelta(days=days)
+        if plan.status != CarePlanStatus.active or start >= end:
+            now = datetime.now(timezone.utc)
+            return ScheduleReport(window_start=now, window_end=now)
+        await insert_visits(self.db, generate_visit_rows(plan, start, end))
+        plan.scheduled_until = end
+        await self.db.commit()
+        window_start = datetime.combine(start, time(0), SCHEDULE_TIMEZONE)
+        window_end = datetime.combine(end, time(0), SCHEDULE_TIMEZONE)
+        return await self.solve_window(window_start, window_end, plan_ids=[plan.id])
+
+    async def solve_window(self, start: datetime, end: datetime, plan_ids: Optional[Sequence[int]] = None,
+                           caregiver_id: Optional[int] = None,
+                           release_ids: Sequence[int] = ()) -> ScheduleReport:
+        """Re-solve the open visits overlapping [start, end) and save what changed.
+
+        Visits outside the selection only constrain the result, as fixed
+        commitments of their caregivers. ``release_ids`` are visits whose
+        caregiver should be re-picked (kept as a preference) after every
+        other assignment has been validated, e.g. a visit that just moved.
+        """
+        rows = await open_visits_in_window(self.db, start, end, plan_ids=plan_ids, caregiver_id=caregiver_id)
+        release = set(release_ids)
+        preferred: Dict[int, int] = {}
+        for visit, _, _ in sorted(rows, key=lambda row: as_utc(row[0].starts_at)):
+            if visit.caregiver_id is not None:
+                preferred[visit.care_plan_id] = visit.caregiver_id
+        visits = []
+        for visit, latitude, longitude in rows:
+            scheduled = ScheduledVisit(
+                visit.id, visit.care_plan_id, visit.starts_at, visit.ends_at, latitude, longitude,
+                caregiver_id=visit.caregiver_id, preferred_caregiver_id=preferred.get(visit.care_plan_id),
+            )
+            if visit.id in release:
+                scheduled.preferred_caregiver_id = visit.caregiver_id or scheduled.preferred_caregiver_id
+                scheduled.caregiver_id = None
+                scheduled.changed = True
+            visits.append(scheduled)
+
+        buffer = timedelta(seconds=self.scheduler.buffer)
+        commitments = [
+            (caregiver, int(as_utc(starts_at).timestamp()), int(as_utc(ends_at).timestamp()), visit_id)
+            for caregiver, starts_at, ends_at, visit_id in await caregiver_commitments(
+                self.db, start - buffer, end + buffer, exclude_ids=[visit.id for visit in visits]
+            )
+        ]
+        stats = self.scheduler.solve(visits, commitments)
+        await self._confirm_assignments(visits, start - buffer, end + buffer, stats)
+        await update_visit_assignments(self.db, [
+            {
+                "id": visit.id,
+                "caregiver_id": visit.caregiver_id,
+                "status": VisitStatus.scheduled if visit.caregiver_id is not None else VisitStatus.unassigned,
+            }
+            for visit in visits if visit.changed
+        ])
+        await self.db.commit()
+        logger.debug(f"Solved schedule window {start} - {end}: {stats}")
+        return ScheduleReport(window_start=start, window_end=end, **stats)
+
+    async def _confirm_assignments(self, visits: Sequence[ScheduledVisit], start: datetime, end: datetime,
+                                   stats: Dict[str, int]) -> None:
+        """Lock the caregivers this solve newly assigned and re-check their calendars.
+
+        The solve read commitments without locks, so a concurrent solve may
+        have booked the same caregiver since. With their locks held until
+        the commit, each new assignment is checked against what the
+        caregiver has now; one that collides is left unassigned for the
+        schedule extender's next pass.
+        """
+        assigned = sorted((visit for visit in visits if visit.changed and visit.caregiver_id is not None),
+                          key=lambda visit: visit.start)
+        if not assigned:
+            return
+        caregiver_ids = sorted({visit.caregiver_id for visit in assigned})
+        await lock_caregivers(self.db, caregiver_ids)
+        current = await caregiver_commitments(
+            self.db, start, end, exclude_ids=[visit.id for visit in visits], caregiver_ids=caregiver_ids
+        )
+        scheduler = self.scheduler
+        scheduler.calendars = {}
+        for caregiver, starts_at, ends_at, visit_id in current:
+            scheduler.reserve(caregiver, int(as_utc(starts_at).timestamp()), int(as_utc(ends_at).timestamp()), visit_id)
+        for visit in assigned:
+            if scheduler.is_free(visit.caregiver_id, *visit.span):
+                scheduler.reserve(visit.caregiver_id, *visit.span, visit.id)
+                continue
+            logger.warning(f"Caregiver {visit.caregiver_id} was booked by a concurrent solve; "
+                           f"leaving visit {visit.id} unassigned")
+            visit.caregiver_id = None
+            stats["assigned"] -= 1
+            stats["unassigned"] += 1
+
+    async def list_visits(self, user: User, plan_id: int, start: Optional[datetime],
+                          end: Optional[datetime]) -> List[Visit]:
+        plan = await self.get_plan(user, plan_id)
+        start = start or datetime.now(timezone.utc)
+        end = end or start + timedelta(days=SCHEDULE_HORIZON_DAYS)
+        return await list_visits(self.db, plan.id, start, end)
+
+    async def update_visit(self, user: User, visit_id: int, data: VisitUpdate) -> Visit:
+        visit = await get_visit(self.db, visit_id)
+        if visit is None:
+            raise HTTPException(status_code=404, detail="Visit not found")
+        await self.get_plan(user, visit.care_plan_id)
+        if visit.status not in (VisitStatus.unassigned, VisitStatus.scheduled):
+            raise HTTPException(status_code=409, detail=f"Visit is {visit.status.value}")
+
+        old_start, old_end = as_utc(visit.starts_at), as_utc(visit.ends_at)
+        if data.cancel:
+            visit.status = VisitStatus.cancelled
+            visit.caregiver_id = None
+            await self.db.commit()
+            return visit
+
+        new_start = as_utc(data.starts_at) if data.starts_at else old_start
+        duration = timedelta(minutes=data.duration_minutes) if data.duration_minutes else old_end - old_start
+        visit.starts_at, visit.ends_at = new_start, new_start + duration
+        await self.db.commit()
+        # Only the span the visit left and the span it moved into can change.
+        await self.solve_window(min(old_start, new_start), max(old_end, visit.ends_at), release_ids=[visit.id])
+        await self.db.refresh(visit)
+        return visit
+
+    async def reschedule_caregiver(self, caregiver_id: int) -> ScheduleReport:
+        """Re-check a caregiver's upcoming visits after their availability or approval changed."""
+        start = datetime.now(timezone.utc)
+        end = start + timedelta(days=SCHEDULE_HORIZON_DAYS + 7)
+        return await self.solve_window(start, end, caregiver_id=caregiver_id)
+
+    async def conflicts(self, start: datetime, end: datetime) -> List[VisitConflict]:
+        """Caregivers double-booked in [start, end), found with a sort-and-sweep per caregiver."""
+        by_caregiver: Dict[int, list] = {}
+        for caregiver, starts_at, ends_at, visit_id in await caregiver_commitments(self.db, start, end):
+            by_caregiver.setdefault(caregiver, []).append(
+                (int(as_utc(starts_at).timestamp()), int(as_utc(ends_at).timestamp()), visit_id)
+            )
+        return [
+            VisitConflict(caregiver_id=caregiver, visit_ids=[first, second])
+            for caregiver, intervals in by_caregiver.items()
+            for first, second in find_conflicts(intervals)
+        ]
+
+
+class ScheduleExtender:
+    """Keeps visits generated ``SCHEDULE_HORIZON_DAYS`` ahead for every active plan.
+
+    Every ``interval`` seconds it extends the plans whose visits stop short
+    of the horizon (so a plan keeps producing visits without its customer
+    asking) and re-solves plans that still have unassigned visits in it.
+    Each plan is extended under a ``SKIP LOCKED`` row lock, so workers
+    running this at the same time split the plans rather than repeat them.
+    """
+
+    def __init__(self, session_factory, interval: float, batch_size: int):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def extend(self) -> int:
+        """Extend every plan due; returns how many were extended."""
+        until = _today() + timedelta(days=SCHEDULE_HORIZON_DAYS)
+        extended, after_id = 0, 0
+        while True:
+            async with self.session_factory() as db:
+                plan_ids = await care_plans_due(db, until, after_id, self.batch_size)
+            for plan_id in plan_ids:
+                async with self.session_factory() as db:
+                    plan = await get_care_plan(db, plan_id, skip_locked=True)
+                    if plan is not None:
+                        await CarePlanService(db).extend_schedule(plan)
+                        extended += 1
+            if len(plan_ids) < self.batch_size:
+                return extended
+            after_id = plan_ids[-1]
+
+    async def staff_unassigned(self) -> int:
+        """Re-solve plans with unassigned visits before the horizon; returns how many visits got a caregiver."""
+        start = datetime.now(timezone.utc)
+        end = start + timedelta(days=SCHEDULE_HORIZON_DAYS)
+        assigned, after_id = 0, 0
+        while True:
+            async with self.session_factory() as db:
+                plan_ids = await care_plans_with_unassigned_visits(db, start, end, after_id, self.batch_size)
+                if plan_ids:
+                    report = await CarePlanService(db).solve_window(start, end, plan_ids=plan_ids)
+                    assigned += report.assigned
+            if len(plan_ids) < self.batch_size:
+                return assigned
+            after_id = plan_ids[-1]
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                extended = await self.extend()
+                assigned = await self.staff_unassigned()
+                if extended or assigned:
+                    logger.info(f"Schedule extender extended {extended} care plans, assigned {assigned} visits")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Schedule extender error: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+schedule_extender = ScheduleExtender(SessionLocal, SCHEDULE_EXTEND_INTERVAL_SECONDS, SCHEDULE_EXTEND_BATCH_SIZE)
@@ -0,0 +1,301 @@
+"""In-memory index for matching customers to nearby, available caregivers.
+
+A match query goes through three stages:
+
+1. a uniform grid over Ontario (``MATCHING_GRID_CELL_KM`` cells) yields the
+   caregivers in the cells that intersect the search radius;
+2. an interval index over weekly availability -- a 168-bit mask per
+   caregiver with one bit per hour of the week that some slot overlaps --
+   drops everyone who cannot be free for the requested hours, with one
+   vectorized AND per 64 hours;
+3. distance, service radius and price filters and the score are computed
+   for all remaining candidates at once with numpy; candidates are then
+   taken in score order and a bisect over their merged slots confirms the
+   exact minutes until ``limit`` are found.
+
+Caregiver attributes live in flat numpy columns indexed by row, so only
+the final ``limit``-sized loop touches Python objects. The index is rebuilt from the database at
+startup and periodically, and updated in place when a profile or its
+availability changes in this process.
+"""
+import math
+import os
+from bisect import bisect_right
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from app.models.caregiver_model import MINUTES_PER_WEEK
+from app.utils.instrumentation import span
+from app.utils.metrics import metrics
+
+load_dotenv()
+
+MATCHING_GRID_CELL_KM = float(os.getenv("MATCHING_GRID_CELL_KM", "10"))
+MATCHING_BUCKET_MINUTES = 60
+_MASK_WORDS = -(-MINUTES_PER_WEEK // MATCHING_BUCKET_MINUTES // 64)
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+# Longitude cells are sized at this latitude (southern Ontario, where most
+# users are) so cell ids do not depend on the query; further north cells
+# are narrower in km, which only means a few more cells per query.
+GRID_REFERENCE_LATITUDE = 44.0
+_REFERENCE_COS = math.cos(math.radians(GRID_REFERENCE_LATITUDE))
+
+# Score weights: closeness to the customer, rating, experience (capped at 10 years).
+SCORE_DISTANCE_WEIGHT = 0.5
+SCORE_RATING_WEIGHT = 0.3
+SCORE_EXPERIENCE_WEIGHT = 0.2
+
+match_candidates = metrics.histogram(
+    "matching_candidates", "Caregivers left after each prefilter stage of a match query.",
+    buckets=(0, 10, 50, 100, 500, 1000, 5000, 10000, 50000),
+)
+
+
+class CaregiverEntry(NamedTuple):
+    user_id: int
+    full_name: Optional[str]
+    latitude: float
+    longitude: float
+    service_radius_km: float
+    rating: float
+    hourly_rate: float
+    years_experience: int
+    slots: Sequence[Tuple[int, int]]
+
+
+class MatchResult(NamedTuple):
+    user_id: int
+    full_name: Optional[str]
+    distance_km: float
+    hourly_rate: float
+    rating: float
+    years_experience: int
+    score: float
+
+
+def normalize_slots(slots: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sort weekly slots and merge overlapping or touching ones."""
+    merged: List[List[int]] = []
+    for start, end in sorted(slots):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def grid_cell(latitude: float, longitude: float, cell_km: float = MATCHING_GRID_CELL_KM) -> Tuple[int, int]:
+    return (
+        math.floor(longitude * _REFERENCE_COS * KM_PER_DEGREE / cell_km),
+        math.floor(latitude * KM_PER_DEGREE / cell_km),
+    )
+
+
+def grid_cell_id(latitude: float, longitude: float, cell_km: float = MATCHING_GRID_CELL_KM) -> str:
+    x, y = grid_cell(latitude, longitude, cell_km)
+    return f"{x}:{y}"
+
+
+def haversine_km(lat1, lon1, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    lat1, lon1 = math.radians(lat1), math.radians(lon1)
+    lat2, lon2 = np.radians(lat2), np.radians(lon2)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class MatchingEngine:
+    def __init__(self, cell_km: float = MATCHING_GRID_CELL_KM):
+        self.cell_km = cell_km
+        self._reset(0)
+
+    def _reset(self, capacity: int) -> None:
+        capacity = max(capacity, 1024)
+        self._rows: Dict[int, int] = {}  # user id -> row
+        self._free: List[int] = []
+        self._size = 0
+        self.user_ids = np.zeros(capacity, dtype=np.int64)
+        self.latitude = np.zeros(capacity)
+        self.longitude = np.zeros(capacity)
+        self.radius_km = np.zeros(capacity)
+        self.rating = np.zeros(capacity)
+        self.hourly_rate = np.zeros(capacity)
+        self.experience = np.zeros(capacity)
+        self.hours = np.zeros((capacity, _MASK_WORDS), dtype=np.uint64)
+        self.names: List[Optional[str]] = [None] * capacity
+        self.slot_starts: List[Tuple[int, ...]] = [()] * capacity
+        self.slot_ends: List[Tuple[int, ...]] = [()] * capacity
+        self.cells: List[Optional[Tuple[int, int]]] = [None] * capacity
+        self._grid: Dict[Tuple[int, int], Set[int]] = {}
+        self._grid_arrays: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._rows
+
+    def _grow(self) -> None:
+        capacity = len(self.user_ids) * 2
+        for name in ("user_ids", "latitude", "longitude", "radius_km", "rating", "hourly_rate", "experience", "hours"):
+            column = getattr(self, name)
+            grown = np.zeros((capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+        extra = capacity - len(self.names)
+        self.names.extend([None] * extra)
+        self.slot_starts.extend([()] * extra)
+        self.slot_ends.extend([()] * extra)
+        self.cells.extend([None] * extra)
+
+    @staticmethod
+    def hour_mask(slots: Iterable[Tuple[int, int]]) -> List[int]:
+        """Bit per hour of the week that any of ``slots`` overlaps, split into 64-bit words."""
+        bits = 0
+        for start, end in slots:
+            first, last = start // MATCHING_BUCKET_MINUTES, (end - 1) // MATCHING_BUCKET_MINUTES
+            bits |= ((1 << (last - first + 1)) - 1) << first
+        return [(bits >> (64 * word)) & 0xFFFFFFFFFFFFFFFF for word in range(_MASK_WORDS)]
+
+    def rebuild(self, entries: Iterable[CaregiverEntry], size_hint: int = 0) -> None:
+        """Replace the whole index (e.g. after reloading from the database)."""
+        self._reset(size_hint)
+        for entry in entries:
+            self.upsert(entry)
+
+    def swap(self, other: "MatchingEngine") -> None:
+        """Take over ``other``'s contents (a freshly rebuilt index) in one step."""
+        self.__dict__.update(other.__dict__)
+
+    def upsert(self, entry: CaregiverEntry) -> None:
+        self.remove(entry.user_id)
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self._size == len(self.user_ids):
+                self._grow()
+            row = self._size
+            self._size += 1
+        self._rows[entry.user_id] = row
+        self.user_ids[row] = entry.user_id
+        self.latitude[row] = entry.latitude
+        self.longitude[row] = entry.longitude
+        self.radius_km[row] = entry.service_radius_km
+        self.rating[row] = entry.rating
+        self.hourly_rate[row] = entry.hourly_rate
+        self.experience[row] = entry.years_experience
+        self.names[row] = entry.full_name
+        slots = normalize_slots(entry.slots)
+        self.slot_starts[row] = tuple(start for start, _ in slots)
+        self.slot_ends[row] = tuple(end for _, end in slots)
+        self.hours[row] = self.hour_mask(slots)
+        cell = grid_cell(entry.latitude, entry.longitude, self.cell_km)
+        self.cells[row] = cell
+        self._grid.setdefault(cell, set()).add(row)
+        self._grid_arrays.pop(cell, None)
+
+    def remove(self, user_id: int) -> None:
+        row = self._rows.pop(user_id, None)
+        if row is None:
+            return
+        cell = self.cells[row]
+        cell_rows = self._grid.get(cell)
+        if cell_rows is not None:
+            cell_rows.discard(row)
+            if not cell_rows:
+                del self._grid[cell]
+        self._grid_arrays.pop(cell, None)
+        self.cells[row] = None
+        self.names[row] = None
+        self.slot_starts[row] = self.slot_ends[row] = ()
+        self.hours[row] = 0
+        self._free.append(row)
+
+    def _cell_rows(self, cell: Tuple[int, int]) -> Optional[np.ndarray]:
+        rows = self._grid_arrays.get(cell)
+        if rows is None:
+            members = self._grid.get(cell)
+            if not members:
+                return None
+            rows = self._grid_arrays[cell] = np.fromiter(members, dtype=np.int64, count=len(members))
+        return rows
+
+    def _rows_near(self, latitude: float, longitude: float, radius_km: float) -> np.ndarray:
+        x0, y0 = grid_cell(latitude, longitude, self.cell_km)
+        dy = math.ceil(radius_km / self.cell_km)
+        # Longitude degrees shrink towards the pole: size the x range for
+        # the northernmost latitude the search circle reaches.
+        north = min(abs(latitude) + radius_km / KM_PER_DEGREE, 89.0)
+        dx = math.ceil(radius_km * _REFERENCE_COS / (math.cos(math.radians(north)) * self.cell_km))
+        arrays = [
+            rows
+            for x in range(x0 - dx, x0 + dx + 1)
+            for y in range(y0 - dy, y0 + dy + 1)
+            if (rows := self._cell_rows((x, y))) is not None
+        ]
+        return np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int64)
+
+    def _available(self, row: int, start: int, end: int) -> bool:
+        starts = self.slot_starts[row]
+        # Slots are merged, so only the last slot starting at or before
+        # ``start`` can cover the interval.
+        i = bisect_right(starts, start) - 1
+        return i >= 0 and self.slot_ends[row][i] >= end
+
+    def is_available(self, user_id: int, start_minute: int, end_minute: int) -> bool:
+        """Whether an indexed caregiver's weekly slots cover [start_minute, end_minute)."""
+        row = self._rows.get(user_id)
+        return row is not None and self._available(row, start_minute, end_minute)
+
+    def match(self, latitude: float, longitude: float, start_minute: int, end_minute: int,
+              max_distance_km: float = 25.0, limit: int = 20,
+              max_hourly_rate: Optional[float] = None) -> List[MatchResult]:
+        with span("matching"):
+            idx = self._rows_near(latitude, longitude, max_distance_km)
+            match_candidates.observe(len(idx), stage="grid")
+
+            hours = self.hours[idx]
+            keep = np.ones(len(idx), dtype=bool)
+            for word, bits in enumerate(self.hour_mask([(start_minute, end_minute)])):
+                if bits:
+                    bits = np.uint64(bits)
+                    keep &= (hours[:, word] & bits) == bits
+            idx = idx[keep]
+            match_candidates.observe(len(idx), stage="availability")
+
+            distance = haversine_km(latitude, longitude, self.latitude[idx], self.longitude[idx])
+            keep = distance <= np.minimum(max_distance_km, self.radius_km[idx])
+            if max_hourly_rate is not None:
+                keep &= self.hourly_rate[idx] <= max_hourly_rate
+            idx, distance = idx[keep], distance[keep]
+            match_candidates.observe(len(idx), stage="distance")
+
+            score = (
+                SCORE_DISTANCE_WEIGHT * (1 - distance / max_distance_km)
+                + SCORE_RATING_WEIGHT * self.rating[idx] / 5
+                + SCORE_EXPERIENCE_WEIGHT * np.minimum(self.experience[idx], 10) / 10
+            )
+            results: List[MatchResult] = []
+            # The hour mask only says a slot touches every requested hour;
+            # check the exact minutes, best score first, until we have enough.
+            for i in np.argsort(-score, kind="stable"):
+                row = int(idx[i])
+                if not self._available(row, start_minute, end_minute):
+                    continue
+                results.append(MatchResult(
+                    user_id=int(self.user_ids[row]),
+                    full_name=self.names[row],
+                    distance_km=round(float(distance[i]), 2),
+                    hourly_rate=float(self.hourly_rate[row]),
+                    rating=float(self.rating[row]),
+                    years_experience=int(self.experience[row]),
+                    score=round(float(score[i]), 4),
+                ))
+                if len(results) == limit:
+                    break
+            return results
+
+
+matching_engine = MatchingEngine()
@@ -0,0 +1,230 @@
+"""Caregiver assignment for care-plan visits.
+
+``Scheduler.solve`` takes the visits of one time window plus the
+caregivers' commitments around it, keeps every existing assignment that is
+still valid, and greedily assigns the rest (earliest visit first,
+preferring the caregiver the care plan already has, then the matching
+engine's ranking). Callers pass only the window a change touched -- the
+old and new time of a moved visit, the future visits of a caregiver whose
+availability changed -- so a change never re-solves the whole schedule.
+
+Each caregiver's commitments live in an ``IntervalSet``: intervals sorted
+by start, so "is this caregiver free from a to b" is a bisect plus a scan
+of the few neighbouring intervals rather than a comparison against every
+visit they have.
+"""
+import os
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+from dotenv import load_dotenv
+from app.models.caregiver_model import MINUTES_PER_DAY, MINUTES_PER_WEEK
+from app.services.matching_engine import MatchingEngine, matching_engine
+from app.utils.instrumentation import span
+from app.utils.metrics import metrics
+
+load_dotenv()
+
+SCHEDULE_TIMEZONE = ZoneInfo(os.getenv("SCHEDULE_TIMEZONE", "America/Toronto"))
+SCHEDULE_TRAVEL_BUFFER_MINUTES = int(os.getenv("SCHEDULE_TRAVEL_BUFFER_MINUTES", "30"))
+SCHEDULE_MAX_DISTANCE_KM = float(os.getenv("SCHEDULE_MAX_DISTANCE_KM", "25"))
+SCHEDULE_CANDIDATES = int(os.getenv("SCHEDULE_CANDIDATES", "20"))
+
+visits_solved = metrics.counter("schedule_visits_total", "Visits processed by the scheduler, by outcome.")
+
+
+def as_utc(moment: datetime) -> datetime:
+    # SQLite hands timezone-aware columns back naive; everything is stored in UTC.
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment.astimezone(timezone.utc)
+
+
+def minute_of_week(moment: datetime) -> int:
+    local = as_utc(moment).astimezone(SCHEDULE_TIMEZONE)
+    return local.weekday() * MINUTES_PER_DAY + local.hour * 60 + local.minute
+
+
+class IntervalSet:
+    """Half-open intervals ``[start, end)`` with keys, sorted by start.
+
+    Overlap queries bisect to the first interval that could reach the query
+    (tracking the longest interval stored bounds how far back that is) and
+    scan forward while intervals still start before the query ends.
+    """
+
+    __slots__ = ("_items", "_longest")
+
+    def __init__(self):
+        self._items: List[Tuple[int, int, int]] = []  # (start, end, key)
+        self._longest = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, start: int, end: int, key: int) -> None:
+        insort(self._items, (start, end, key))
+        self._longest = max(self._longest, end - start)
+
+    def remove(self, start: int, end: int, key: int) -> None:
+        i = bisect_left(self._items, (start, end, key))
+        if i < len(self._items) and self._items[i] == (start, end, key):
+            del self._items[i]
+
+    def overlapping(self, start: int, end: int) -> List[int]:
+        items = self._items
+        i = bisect_left(items, (start - self._longest,))
+        keys = []
+        while i < len(items) and items[i][0] < end:
+            if items[i][1] > start:
+                keys.append(items[i][2])
+            i += 1
+        return keys
+
+
+def find_conflicts(intervals: Iterable[Tuple[int, int, int]]) -> List[Tuple[int, int]]:
+    """Pairs of keys whose intervals overlap, via one sort and a sweep.
+
+    Each interval is reported against the earlier interval that reaches
+    furthest, which is enough to flag every interval involved in a conflict.
+    """
+    conflicts = []
+    reach_end, reach_key = None, None
+    for start, end, key in sorted(intervals):
+        if reach_end is not None and start < reach_end:
+            conflicts.append((reach_key, key))
+        if reach_end is None or end > reach_end:
+            reach_end, reach_key = end, key
+    return conflicts
+
+
+class ScheduledVisit:
+    __slots__ = ("id", "care_plan_id", "start", "end", "latitude", "longitude", "caregiver_id",
+                 "preferred_caregiver_id", "changed")
+
+    def __init__(self, id: int, care_plan_id: int, start: datetime, end: datetime, latitude: float,
+                 longitude: float, caregiver_id: Optional[int] = None, preferred_caregiver_id: Optional[int] = None):
+        self.id = id
+        self.care_plan_id = care_plan_id
+        self.start = as_utc(start)
+        self.end = as_utc(end)
+        self.latitude = latitude
+        self.longitude = longitude
+        self.caregiver_id = caregiver_id
+        self.preferred_caregiver_id = preferred_caregiver_id
+        self.changed = False
+
+    @property
+    def span(self) -> Tuple[int, int]:
+        return int(self.start.timestamp()), int(self.end.timestamp())
+
+
+class Scheduler:
+    def __init__(self, engine: MatchingEngine = matching_engine,
+                 buffer_minutes: int = SCHEDULE_TRAVEL_BUFFER_MINUTES,
+                 max_distance_km: float = SCHEDULE_MAX_DISTANCE_KM,
+                 candidates: int = SCHEDULE_CANDIDATES):
+        self.engine = engine
+        self.buffer = buffer_minutes * 60
+        self.max_distance_km = max_distance_km
+        self.candidates = candidates
+        self.calendars: Dict[int, IntervalSet] = {}
+
+    def reserve(self, caregiver_id: int, start: int, end: int, key: int) -> None:
+        calendar = self.calendars.get(caregiver_id)
+        if calendar is None:
+            calendar = self.calendars[caregiver_id] = IntervalSet()
+        calendar.add(start, end, key)
+
+    def is_free(self, caregiver_id: int, start: int, end: int) -> bool:
+        calendar = self.calendars.get(caregiver_id)
+        # Leave travel time between consecutive visits
+        return calendar is None or not calendar.overlapping(start - self.buffer, end + self.buffer)
+
+    def _weekly_range(self, visit: ScheduledVisit) -> Optional[Tuple[int, int]]:
+        start = minute_of_week(visit.start)
+        end = start + int((visit.end - visit.start).total_seconds() // 60)
+        # Availability is weekly; a visit running past Sunday midnight is never covered.
+        return (start, end) if end <= MINUTES_PER_WEEK else None
+
+    def fits(self, visit: ScheduledVisit, caregiver_id: int) -> bool:
+        weekly = self._weekly_range(visit)
+        start, end = visit.span
+        return (
+            weekly is not None
+            and self.engine.is_available(caregiver_id, *weekly)
+            and self.is_free(caregiver_id, start, end)
+        )
+
+    def _pick(self, visit: ScheduledVisit, plan_caregivers: Sequence[int] = ()) -> Optional[int]:
+        for caregiver_id in (visit.preferred_caregiver_id, *plan_caregivers):
+            if caregiver_id is not None and self.fits(visit, caregiver_id):
+                return caregiver_id
+        weekly = self._weekly_range(visit)
+        if weekly is None:
+            return None
+        start, end = visit.span
+        tried = 0
+        # Ranked candidates are available by construction; only the calendar
+        # can rule them out. Widen the candidate list once if all are busy.
+        for limit in (self.candidates, self.candidates * 4):
+            matches = self.engine.match(visit.latitude, visit.longitude, *weekly,
+                                        max_distance_km=self.max_distance_km, limit=limit)
+            for match in matches[tried:]:
+                if self.is_free(match.user_id, start, end):
+                    return match.user_id
+            if len(matches) < limit:
+                return None
+            tried = len(matches)
+        return None
+
+    def solve(self, visits: Sequence[ScheduledVisit],
+              commitments: Iterable[Tuple[int, int, int, int]] = ()) -> Dict[str, int]:
+        """Assign ``visits`` around fixed ``commitments`` of (caregiver_id, start, end, key).
+
+        Sets ``changed`` on every visit whose caregiver was changed or cleared.
+        """
+        with span("schedule_solve"):
+            self.calendars = {}
+            for caregiver_id, start, end, key in commitments:
+                self.reserve(caregiver_id, start, end, key)
+
+            ordered = sorted(visits, key=lambda visit: visit.start)
+            kept = 0
+            # Existing assignments first, in time order: each must still be
+            # covered by the caregiver's availability and not collide with
+            # what is already on their calendar.
+            for visit in ordered:
+                if visit.caregiver_id is None:
+                    continue
+                if self.fits(visit, visit.caregiver_id):
+                    self.reserve(visit.caregiver_id, *visit.span, visit.id)
+                    kept += 1
+                else:
+                    visit.preferred_caregiver_id = visit.preferred_caregiver_id or visit.caregiver_id
+                    visit.caregiver_id = None
+                    visit.changed = True
+
+            assigned = unassigned = 0
+            # Caregivers already staffing each plan in this solve are tried
+            # before a match query: a recurring slot usually fits the person
+            # who took its previous week, and the customer keeps that person.
+            plan_caregivers: Dict[int, List[int]] = {}
+            for visit in ordered:
+                if visit.caregiver_id is not None:
+                    continue
+                staff = plan_caregivers.setdefault(visit.care_plan_id, [])
+                caregiver_id = self._pick(visit, staff)
+                if caregiver_id is None:
+                    unassigned += 1
+                    continue
+                if caregiver_id not in staff:
+                    staff.append(caregiver_id)
+                visit.caregiver_id = caregiver_id
+                visit.changed = True
+                self.reserve(caregiver_id, *visit.span, visit.id)
+                assigned += 1
+
+        visits_solved.inc(kept, outcome="kept")
+        visits_solved.inc(assigned, outcome="assigned")
+        visits_solved.inc(unassigned, outcome="unassigned")
+        return {"kept": kept, "assigned": assigned, "unassigned": unassigned}
@@ -0,0 +1,115 @@
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.auth.exceptions import InvalidTokenException, UnapprovedCaregiverException
+from app.auth.revocation import revocation_index
+from app.crud.token_crud import (
+    claim_refresh_token,
+    create_refresh_token,
+    get_refresh_token,
+    revoke_access_tokens,
+    revoke_refresh_tokens,
+)
+from app.crud.user_crud import get_user_by_id
+from app.models.user_model import User
+from app.schemas.token_schemas import Token
+from app.utils.auth_utils import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    REFRESH_TOKEN_EXPIRE_DAYS,
+    create_access_token,
+    new_token_id,
+    revoke_cached_tokens,
+)
+from app.utils.metrics import metrics
+from app.logging_config import logger
+
+refresh_reuse = metrics.counter("refresh_token_reuse_total", "Rotated refresh tokens presented again (family revoked).")
+
+
+class TokenService:
+    """Issues access/refresh token pairs, rotates refresh tokens and revokes them.
+
+    Refresh tokens are single use: each refresh marks the presented token
+    used and issues a new pair in the same family. Presenting a used token
+    again means it leaked (or a client kept a stale copy), so the whole
+    family and every access token it issued are revoked.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def issue(self, user: User, family_id: Optional[str] = None) -> Token:
+        """New access/refresh pair; starts a new family unless ``family_id`` is given. Commits."""
+        now = datetime.now(timezone.utc)
+        access_ttl = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        jti = new_token_id()
+        access_token = create_access_token({"sub": user.email, "role": user.role, "jti": jti}, access_ttl)
+        refresh_token = secrets.token_urlsafe(32)
+        await create_refresh_token(
+            self.db, user.id, refresh_token,
+            family_id=family_id or new_token_id(),
+            access_jti=jti,
+            access_expires_at=now + access_ttl,
+            expires_at=now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+        await self.db.commit()
+        return Token(
+            access_token=access_token,
+            token_type="bearer",
+            refresh_token=refresh_token,
+            expires_in=int(access_ttl.total_seconds()),
+        )
+
+    async def refresh(self, refresh_token: str) -> Token:
+        claimed = await claim_refresh_token(self.db, refresh_token)
+        if claimed is None:
+            await self._check_reuse(refresh_token)
+            raise InvalidTokenException("Invalid or expired refresh token.")
+        user_id, family_id = claimed
+        user = await get_user_by_id(self.db, user_id, primary=True)
+        if user is None or not user.is_active:
+            await self.revoke_family(family_id)
+            raise InvalidTokenException("Invalid or expired refresh token.")
+        if user.role == "caregiver" and not user.is_approved:
+            await self.revoke_family(family_id)
+            raise UnapprovedCaregiverException()
+        return await self.issue(user, family_id)
+
+    async def _check_reuse(self, refresh_token: str) -> None:
+        stored = await get_refresh_token(self.db, refresh_token)
+        if stored is not None and stored.used_at is not None and stored.revoked_at is None:
+            refresh_reuse.inc()
+            logger.warning(f"Refresh token reuse for user {stored.user_id}; revoking token family {stored.family_id}")
+            await self.revoke_family(stored.family_id)
+
+    async def revoke_family(self, family_id: str) -> None:
+        await self._revoke(await revoke_refresh_tokens(self.db, family_id=family_id))
+
+    async def revoke_user(self, user_id: int) -> None:
+        """Log a user out everywhere (e.g. after a password reset)."""
+        await self._revoke(await revoke_refresh_tokens(self.db, user_id=user_id))
+
+    async def logout(self, access_payload: dict, refresh_token: Optional[str] = None) -> None:
+        revoked = []
+        jti, exp = access_payload.get("jti"), access_payload.get("exp")
+        if jti and exp:
+            revoked.append((jti, datetime.fromtimestamp(exp, timezone.utc)))
+        if refresh_token:
+            stored = await get_refresh_token(self.db, refresh_token)
+            if stored is not None:
+                revoked += await revoke_refresh_tokens(self.db, family_id=stored.family_id)
+        await self._revoke(revoked)
+
+    async def _revoke(self, access_tokens) -> None:
+        access_tokens = [(jti, _as_utc(expires_at)) for jti, expires_at in access_tokens]
+        await revoke_access_tokens(self.db, access_tokens)
+        await self.db.commit()
+        # Effective in this process at once; other workers catch up on their next sync.
+        revocation_index.add(jti for jti, _ in access_tokens)
+        revoke_cached_tokens(jti for jti, _ in access_tokens)
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # SQLite returns timezone-aware columns naive; they are stored in UTC
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment
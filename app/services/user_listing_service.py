@@ -0,0 +1,80 @@
+"""Admin user listings: keyset pages as JSON, or the whole result as NDJSON.
+
+Cursors are opaque to clients (base64 of the last id seen). NDJSON streams
+walk the same keyset pages with a fresh query per page, so a long export
+neither holds a transaction open nor slows down as it goes deeper.
+"""
+import base64
+import binascii
+import os
+from typing import AsyncIterator, Optional
+from fastapi import HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.user_crud import list_users
+from app.database import SessionLocal
+from app.models.user_model import AuthProvider, UserRole
+from app.schemas.user_schemas import UserAdminResponse, UserPage
+
+USER_LIST_STREAM_BATCH_SIZE = int(os.getenv("USER_LIST_STREAM_BATCH_SIZE", "1000"))
+
+NDJSON = "application/x-ndjson"
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def user_filters(
+    is_verified: Optional[bool] = None,
+    is_active: Optional[bool] = None,
+    auth_provider: Optional[AuthProvider] = None,
+    q: Optional[str] = Query(None, min_length=1, max_length=100, description="Email or full name prefix"),
+) -> dict:
+    return {"is_verified": is_verified, "is_active": is_active, "auth_provider": auth_provider, "q": q}
+
+
+def wants_ndjson(request: Request) -> bool:
+    return request.query_params.get("format") == "ndjson" or NDJSON in request.headers.get("accept", "")
+
+
+async def get_page(db: AsyncSession, role: Optional[UserRole], filters: dict,
+                   cursor: Optional[str], limit: int) -> UserPage:
+    # One extra row tells us whether another page exists.
+    users = await list_users(db, role=role, after_id=decode_cursor(cursor), limit=limit + 1, **filters)
+    has_more = len(users) > limit
+    users = users[:limit]
+    return UserPage(
+        items=[UserAdminResponse.model_validate(user) for user in users],
+        next_cursor=encode_cursor(users[-1].id) if has_more else None,
+    )
+
+
+async def stream_users(role: Optional[UserRole], filters: dict, after_id: Optional[int],
+                       batch_size: int = USER_LIST_STREAM_BATCH_SIZE) -> AsyncIterator[str]:
+    while True:
+        # Own session: request-scoped dependencies are closed before the body streams.
+        async with SessionLocal() as db:
+            users = await list_users(db, role=role, after_id=after_id, limit=batch_size, **filters)
+        if not users:
+            return
+        yield "".join(UserAdminResponse.model_validate(user).model_dump_json() + "\n" for user in users)
+        if len(users) < batch_size:
+            return
+        after_id = users[-1].id
+
+
+async def list_users_response(request: Request, db: AsyncSession, role: Optional[UserRole],
+                              filters: dict, cursor: Optional[str], limit: int):
+    if wants_ndjson(request):
+        return StreamingResponse(stream_users(role, filters, decode_cursor(cursor)), media_type=NDJSON)
+    return await get_page(db, role, filters, cursor, limit)
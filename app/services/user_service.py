@@ -1,103 +1,147 @@
+from datetime import timedelta
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.user_schemas import UserCreate, LoginRequest
 from app.schemas.token_schemas import Token
 from app.crud.user_crud import *
-from app.utils.auth_utils import get_password_hash, verify_password, create_access_token, send_verification_email, send_password_reset_email
+from app.crud.token_crud import create_token, redeem_token
+from app.models.token_model import TokenPurpose
+from app.models.user_model import User
+from app.utils.auth_utils import send_verification_email, send_password_reset_email, VERIFICATION_TOKEN_EXPIRE_HOURS, PASSWORD_RESET_TOKEN_EXPIRE_MINUTES
 from app.auth.exceptions import InvalidCredentialsException, EmailNotVerifiedException, UnapprovedCaregiverException, UserNotFoundException, InvalidTokenException, EmailAlreadyVerifiedException, InvalidAuthProviderException
+from app.utils.password_hashing import password_hasher, password_rehasher
+from app.auth.user_cache import user_cache
 from app.logging_config import logger
-from app.auth.oauth import oauth
+from app.auth.oauth import oauth, google_metadata
+from app.utils.instrumentation import span
+from app.services.token_service import TokenService
+from app.models.audit_model import AuditEventType
+from app.utils.audit_log import audit_log
 
 class UserService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
     async def signup(self, user_data: UserCreate):
-        existing_user = await get_user_by_email(self.db, user_data.email)
-        if existing_user:
-            raise HTTPException(
-                status_code=400, detail="Email already registered"
-            )
-            
         if user_data.role not in ["customer", "caregiver"]:
+            audit_log.record(AuditEventType.signup, False, email=user_data.email, reason="invalid_role")
             raise HTTPException(
                 status_code=403, detail="Invalid role for signup"
             )
             
-        user_data.password = get_password_hash(user_data.password)
+        user_data.password = await password_hasher.hash(user_data.password)
+        # INSERT ... ON CONFLICT DO NOTHING: an existing email comes back as None
         user = await create_user(self.db, user_data)
-        await send_verification_email(user.email, user.verification_token)
+        if user is None:
+            audit_log.record(AuditEventType.signup, False, email=user_data.email, reason="email_taken")
+            raise HTTPException(
+                status_code=400, detail="Email already registered"
+            )
+        token = await self._issue_verification_token(user)
+        # Commits the user, the token and the queued email together
+        await send_verification_email(self.db, user.email, token)
+        audit_log.record(AuditEventType.signup, True, user.id, user.email, role=user.role)
         return user
     
     async def login(self, login_request: LoginRequest) -> Token:
-        user = await get_user_by_email(self.db, login_request.username)
-        logger.debug(f"User found: {user.email}, Hashed password in DB: {repr(user.hashed_password)}")
-        if not user or not verify_password(login_request.password, user.hashed_password):
+        user = await get_user_by_email(self.db, login_request.username, primary=True)
+        if not user:
+            audit_log.record(AuditEventType.login, False, email=login_request.username, reason="unknown_email")
+            raise InvalidCredentialsException()
+        if not await password_hasher.verify(login_request.password, user.hashed_password):
+            audit_log.record(AuditEventType.login, False, user.id, user.email, reason="bad_password")
             raise InvalidCredentialsException()
         
         if user.role == "caregiver" and not user.is_approved: # will implement for caregiver users
+            audit_log.record(AuditEventType.login, False, user.id, user.email, reason="unapproved")
             raise UnapprovedCaregiverException()
         
-        access_token = create_access_token(
-            data={"sub": user.email, "role": user.role}
-        )
-        return Token(access_token=access_token, token_type="bearer")
+        # bcrypt or outdated argon2 parameters: upgrade after responding
+        password_rehasher.schedule(user.id, user.email, login_request.password, user.hashed_password)
+        token = await TokenService(self.db).issue(user)
+        audit_log.record(AuditEventType.login, True, user.id, user.email)
+        return token
     
+    async def _issue_verification_token(self, user) -> str:
+        return await create_token(
+            self.db, user.id, TokenPurpose.email_verification, timedelta(hours=VERIFICATION_TOKEN_EXPIRE_HOURS)
+        )
+
     async def verify_email(self, token: str) -> None:
-        user = await get_user_by_verification_token(self.db, token)
-        if not user:
+        # Verification tokens are deleted once used and never issued to
+        # verified users, so a valid token always belongs to an unverified one.
+        redeemed = await redeem_token(self.db, token, TokenPurpose.email_verification, {"is_verified": True})
+        if not redeemed:
+            audit_log.record(AuditEventType.email_verification, False, reason="invalid_token")
             raise InvalidTokenException()
-        if user.is_verified:
-            raise EmailAlreadyVerifiedException()
-        await verify_user_email(self.db, user)
+        await self.db.commit()
+        audit_log.record(AuditEventType.email_verification, True, *redeemed)
+        await user_cache.invalidate(redeemed[1])
         
     async def resend_verification_email(self, email: str) -> None:
-        user = await get_user_by_email(self.db, email)
+        user = await get_user_by_email(self.db, email, primary=True)
         if not user:
             raise UserNotFoundException()
         if user.is_verified:
             raise EmailAlreadyVerifiedException()
-        token = await update_verification_token(self.db, user)
-        await send_verification_email(user.email, token)
+        token = await self._issue_verification_token(user)
+        await send_verification_email(self.db, user.email, token)
         
     async def request_password_reset(self, email: str) -> None:
-        user = await get_user_by_email(self.db, email)
+        user = await get_user_by_email(self.db, email, primary=True)
         if not user:
+            audit_log.record(AuditEventType.password_reset_request, False, email=email, reason="unknown_email")
             raise UserNotFoundException(email)
         if user.auth_provider != AuthProvider.email:
+            audit_log.record(AuditEventType.password_reset_request, False, user.id, user.email,
+                             reason="social_login")
             raise InvalidAuthProviderException("Password reset is not available for social login users.")
         if not user.is_verified:
+            audit_log.record(AuditEventType.password_reset_request, False, user.id, user.email, reason="unverified")
             raise EmailNotVerifiedException()
-        token = await update_verification_token(self.db, user)
-        await send_password_reset_email(user.email, token)
+        token = await create_token(
+            self.db, user.id, TokenPurpose.password_reset, timedelta(minutes=PASSWORD_RESET_TOKEN_EXPIRE_MINUTES)
+        )
+        await send_password_reset_email(self.db, user.email, token)
+        audit_log.record(AuditEventType.password_reset_request, True, user.id, user.email)
         
     async def reset_password(self, token: str, new_password: str) -> None:
-        user = await get_user_by_verification_token(self.db, token)
-        if not user:
+        hashed_password = await password_hasher.hash(new_password)
+        # Reset links are only sent to verified users; the condition guards the update regardless
+        redeemed = await redeem_token(
+            self.db, token, TokenPurpose.password_reset, {"hashed_password": hashed_password},
+            User.is_verified.is_(True),
+        )
+        if not redeemed:
+            audit_log.record(AuditEventType.password_reset, False, reason="invalid_token")
             raise InvalidTokenException("Invalid or expired token.")
-        # Ensure the user is verified
-        if not user.is_verified:
-            raise EmailNotVerifiedException()
-        # Update the user's password
-        user.hashed_password = get_password_hash(new_password)
-        user.verification_token = None  # Clear the token
-        self.db.add(user)
-        await self.db.commit()
+        user_id, email = redeemed
+        # Sessions opened with the old password end here; commits the new password too
+        await TokenService(self.db).revoke_user(user_id)
+        audit_log.record(AuditEventType.password_reset, True, user_id, email)
+        await user_cache.invalidate(email)
         
     async def authenticate_with_google(self, request):
-        token = await oauth.google.authorize_access_token(request)
+        with span("oauth_token"):
+            token = await oauth.google.authorize_access_token(request)
         logger.debug(f"Token received: {token}")
 
         # Try to get user info from the token
         user_info = token.get('userinfo')
 
-        if not user_info:
+        if not user_info and token.get('id_token'):
+            # Verified locally against the cached JWKS, no userinfo round trip
+            user_info = await google_metadata.verify_id_token(token['id_token'], oauth.google.client_id)
+
+        if not user_info or not user_info.get('email'):
             logger.debug("Fetching user info from userinfo endpoint")
-            resp = await oauth.google.get('userinfo', token=token)
+            with span("oauth_userinfo"):
+                resp = await oauth.google.get('userinfo', token=token)
             user_info = resp.json()
 
         if not user_info:
             logger.error("Failed to obtain user info from Google")
+            audit_log.record(AuditEventType.oauth_login, False, provider="google", reason="no_userinfo")
             raise HTTPException(status_code=400, detail="Failed to obtain user info from Google")
 
         # Extract user information
@@ -105,14 +149,15 @@ class UserService:
         full_name = user_info.get('name')
 
         # Proceed with your existing logic
-        user = await get_user_by_email(self.db, email)
+        user = await get_user_by_email(self.db, email, primary=True)
 
+        switched = False
+        previous_provider = user.auth_provider if user else None
         if user:
             if user.auth_provider != AuthProvider.google:
+                # Flushed by the commit in issue(); no separate round trip
                 user.auth_provider = AuthProvider.google
-                self.db.add(user)
-                await self.db.commit()
-                await self.db.refresh(user)
+                switched = True
         else:
             user_create = UserCreate(
                 email=email,
@@ -121,26 +166,32 @@ class UserService:
                 is_verified=True,
                 role='customer'
             )
-            user = await create_user(self.db, user_create)
+            user = await self._create_social_user(user_create)
 
-        access_token = create_access_token(data={"sub": user.email, "role": user.role})
-        return {"access_token": access_token, "token_type": "bearer"}
+        token = await TokenService(self.db).issue(user)
+        self._audit_oauth_login(user, switched, previous_provider)
+        if switched:
+            await user_cache.invalidate(user.email)
+        return token
 
     async def authenticate_with_facebook(self, request):
-        token = await oauth.facebook.authorize_access_token(request)
-        user_info_response = await oauth.facebook.get('me?fields=id,name,email', token=token)
+        with span("oauth_token"):
+            token = await oauth.facebook.authorize_access_token(request)
+        with span("oauth_userinfo"):
+            user_info_response = await oauth.facebook.get('me?fields=id,name,email', token=token)
         user_info = user_info_response.json()
         email = user_info.get('email')
         full_name = user_info.get('name')
 
-        user = await get_user_by_email(self.db, email)
+        user = await get_user_by_email(self.db, email, primary=True)
 
+        switched = False
+        previous_provider = user.auth_provider if user else None
         if user:
             if user.auth_provider != AuthProvider.facebook:
+                # Flushed by the commit in issue(); no separate round trip
                 user.auth_provider = AuthProvider.facebook
-                self.db.add(user)
-                await self.db.commit()
-                await self.db.refresh(user)
+                switched = True
         else:
             user_create = UserCreate(
                 email=email,
@@ -148,7 +199,25 @@ class UserService:
                 auth_provider=AuthProvider.facebook,
                 role='customer'
             )
-            user = await create_user(self.db, user_create)
+            user = await self._create_social_user(user_create)
 
-        access_token = create_access_token(data={"sub": user.email, "role": user.role})
-        return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+        token = await TokenService(self.db).issue(user)
+        self._audit_oauth_login(user, switched, previous_provider)
+        if switched:
+            await user_cache.invalidate(user.email)
+        return token
+
+    def _audit_oauth_login(self, user: User, switched: bool, previous_provider) -> None:
+        provider = user.auth_provider.value
+        if switched:
+            audit_log.record(AuditEventType.auth_provider_switch, True, user.id, user.email,
+                             **{"from": previous_provider.value if previous_provider else None, "to": provider})
+        audit_log.record(AuditEventType.oauth_login, True, user.id, user.email, provider=provider)
+
+    async def _create_social_user(self, user_create: UserCreate) -> User:
+        user = await create_user(self.db, user_create)
+        if user is None:
+            # A concurrent callback created the same user first (committed by
+            # the time ON CONFLICT returned, though maybe not on the replica yet)
+            user = await get_user_by_email(self.db, user_create.email, primary=True)
+        return user
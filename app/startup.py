@@ -0,0 +1,125 @@
+"""Application startup and shutdown.
+
+Importing ``app.main`` only declares routes. The engine, OAuth clients
+and signing keys are built in ``lifespan`` when the server starts, and
+the slow part -- opening pooled database connections, fetching OAuth
+discovery documents and JWKS, loading the revocation and matching
+indexes -- runs concurrently in the background while the server already
+accepts connections. ``/health/live`` answers at once; ``/health/ready``
+answers 503 until that warm-up has finished, so the load balancer only
+sends traffic to a warmed instance, and again once shutdown begins.
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from dotenv import load_dotenv
+from app.auth.keyring import keyring
+from app.auth.oauth import register_clients
+from app.auth.oauth_metadata import oauth_metadata
+from app.auth.revocation import revocation_index
+from app.database import get_engine, warm_pool
+from app.services.bulk_user_service import shutdown_hash_executor
+from app.utils.audit_log import audit_log
+from app.services.caregiver_service import matching_index
+from app.services.customer_service import schedule_extender
+from app.utils.mail_dispatcher import mail_dispatcher
+from app.utils.metrics import metrics
+from app.utils.password_hashing import password_hasher, password_rehasher
+from app.utils.token_sweeper import token_sweeper
+from app.logging_config import logger
+
+load_dotenv()
+
+# Pause between attempts to reach the database during warm-up
+STARTUP_RETRY_SECONDS = float(os.getenv("STARTUP_RETRY_SECONDS", "2"))
+
+startup_seconds = metrics.gauge("startup_warmup_seconds", "Time from server start until the instance reported ready.")
+
+
+class Readiness:
+    def __init__(self, retry_interval: float):
+        self.retry_interval = retry_interval
+        self.ready = False
+        self.steps: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _timed(self, name: str, step) -> None:
+        start = time.perf_counter()
+        await step
+        self.steps[name] = time.perf_counter() - start
+
+    async def _warm_pool(self) -> None:
+        # Ready means the database is reachable, so keep trying until it is
+        while True:
+            try:
+                return await warm_pool()
+            except Exception as e:
+                logger.error(f"Database warm-up failed, retrying in {self.retry_interval}s: {e}")
+                await asyncio.sleep(self.retry_interval)
+
+    async def _warm_up(self) -> None:
+        start = time.perf_counter()
+        # The indexes and OAuth metadata log and retry their own failures
+        await asyncio.gather(
+            self._timed("db_pool", self._warm_pool()),
+            self._timed("oauth_metadata", oauth_metadata.start()),
+            self._timed("revocation_index", revocation_index.start()),
+            self._timed("matching_index", matching_index.start()),
+        )
+        # Staffing visits needs the matching index, so this starts only now
+        await schedule_extender.start()
+        elapsed = time.perf_counter() - start
+        startup_seconds.set(elapsed)
+        self.ready = True
+        logger.info(f"Ready after {elapsed:.2f}s warm-up "
+                    f"({', '.join(f'{name} {seconds:.2f}s' for name, seconds in self.steps.items())})")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._warm_up())
+
+    async def wait(self) -> None:
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def stop(self) -> None:
+        self.ready = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+readiness = Readiness(STARTUP_RETRY_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Cheap and fail-fast: misconfiguration stops the process here
+    keyring.load()
+    register_clients()
+    get_engine()
+    await mail_dispatcher.start()
+    await token_sweeper.start()
+    await audit_log.start()
+    readiness.start()
+    try:
+        yield
+    finally:
+        await readiness.stop()
+        await schedule_extender.stop()
+        await matching_index.stop()
+        await oauth_metadata.stop()
+        await revocation_index.stop()
+        await token_sweeper.stop()
+        await mail_dispatcher.stop()
+        await password_rehasher.stop()
+        # Last, so events recorded during shutdown are still written
+        await audit_log.stop()
+        password_hasher.shutdown()
+        shutdown_hash_executor()
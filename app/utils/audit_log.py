@@ -0,0 +1,198 @@
+"""Security audit log: record in memory now, write to ``audit_events`` in batches.
+
+``audit_log.record()`` is what services call. It appends a tuple to a
+fixed-size ring buffer and returns; it never awaits, takes no lock and
+touches no connection, so auditing adds nothing measurable to a login. A
+background flusher drains the buffer every ``AUDIT_FLUSH_INTERVAL_SECONDS``
+(or as soon as ``AUDIT_BATCH_SIZE`` events are waiting) with one COPY or
+multi-row INSERT per batch.
+
+If the database falls behind, the buffer fills and the oldest unwritten
+events are overwritten. A batch that fails to write is retried once, one
+event at a time in savepoints, so an event the database rejects is dropped
+on its own rather than taking the batch with it; if the retry cannot reach
+the database the batch is dropped. All of these are counted in
+``audit_events_dropped_total`` by reason, so gaps in the log are visible
+on the metrics endpoint. Events still in
+the buffer are written on shutdown; a crashed worker loses at most one
+buffer's worth.
+
+The flusher also keeps monthly partitions created ``AUDIT_PARTITIONS_AHEAD``
+months in advance and, with ``AUDIT_RETENTION_MONTHS`` set, drops older ones.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
+from typing import Deque, List, Optional, Tuple
+from dotenv import load_dotenv
+from app.crud.audit_crud import create_partition, drop_partition, insert_events, list_partitions, partition_name
+from app.database import SessionLocal
+from app.models.audit_model import AuditEventType
+from app.utils.metrics import metrics
+from app.logging_config import logger
+
+load_dotenv()
+
+AUDIT_BUFFER_SIZE = int(os.getenv("AUDIT_BUFFER_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1"))
+AUDIT_PARTITIONS_AHEAD = int(os.getenv("AUDIT_PARTITIONS_AHEAD", "2"))
+# 0 keeps every month
+AUDIT_RETENTION_MONTHS = int(os.getenv("AUDIT_RETENTION_MONTHS", "0"))
+AUDIT_MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("AUDIT_MAINTENANCE_INTERVAL_SECONDS", "3600"))
+
+events_recorded = metrics.counter("audit_events_recorded_total", "Audit events recorded, by event type.")
+events_written = metrics.counter("audit_events_written_total", "Audit events written to the database.")
+events_dropped = metrics.counter("audit_events_dropped_total", "Audit events lost before reaching the database, by reason.")
+buffered_events = metrics.gauge("audit_events_buffered", "Audit events waiting in memory to be written.")
+flush_latency = metrics.histogram("audit_flush_seconds", "Time to write one batch of audit events.")
+
+# (ip, user agent) of the request being served; set by app.auth.dependencies.audit_request
+audit_client: ContextVar[Tuple[Optional[str], Optional[str]]] = ContextVar("audit_client", default=(None, None))
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class AuditLog:
+    def __init__(self, session_factory, buffer_size: int, batch_size: int, flush_interval: float):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: Deque[tuple] = deque(maxlen=buffer_size)
+        # A batch whose write failed, retried before anything newer
+        self._retry: Optional[List[tuple]] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._maintained_at = float("-inf")
+
+    def record(self, event: AuditEventType, success: bool, user_id: Optional[int] = None,
+               email: Optional[str] = None, **detail) -> None:
+        """Queue one event; ``detail`` keys (e.g. ``reason``) end up in the JSON column."""
+        buffer = self._buffer
+        if len(buffer) == buffer.maxlen:
+            # deque(maxlen) evicts the oldest on append
+            events_dropped.inc(reason="buffer_full")
+        ip, user_agent = audit_client.get()
+        buffer.append((datetime.now(timezone.utc), event.value, success, user_id, email,
+                       ip, user_agent, detail or None))
+        events_recorded.inc(event=event.value)
+        if len(buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def _take_batch(self) -> Tuple[List[tuple], bool]:
+        if self._retry is not None:
+            batch, self._retry = self._retry, None
+            return batch, True
+        buffer = self._buffer
+        return [buffer.popleft() for _ in range(min(self.batch_size, len(buffer)))], False
+
+    async def _write_each(self, batch: List[tuple]) -> int:
+        """Write ``batch`` one event per savepoint, dropping the events that fail; returns how many were written."""
+        written = 0
+        async with self.session_factory() as db:
+            for row in batch:
+                try:
+                    async with db.begin_nested():
+                        await insert_events(db, [row])
+                except Exception as e:
+                    if getattr(e, "connection_invalidated", False):
+                        raise
+                    logger.error(f"Dropping an audit event the database rejected: {e}")
+                    events_dropped.inc(reason="invalid_event")
+                else:
+                    written += 1
+            await db.commit()
+        return written
+
+    async def flush(self) -> int:
+        """Write everything buffered so far; returns the number of events written."""
+        written = 0
+        while self._retry is not None or self._buffer:
+            batch, is_retry = self._take_batch()
+            start = time.perf_counter()
+            try:
+                if is_retry:
+                    count = await self._write_each(batch)
+                else:
+                    async with self.session_factory() as db:
+                        await insert_events(db, batch)
+                        await db.commit()
+                    count = len(batch)
+            except asyncio.CancelledError:
+                # Shutting down mid-write: stop() writes it with the rest
+                self._retry = batch
+                raise
+            except Exception as e:
+                if is_retry:
+                    logger.error(f"Dropping {len(batch)} audit events after a failed retry: {e}")
+                    events_dropped.inc(len(batch), reason="write_failed")
+                else:
+                    logger.error(f"Writing {len(batch)} audit events failed, retrying: {e}")
+                    self._retry = batch
+                break
+            finally:
+                flush_latency.observe(time.perf_counter() - start)
+            written += count
+            events_written.inc(count)
+        buffered_events.set(len(self._buffer))
+        return written
+
+    async def maintain_partitions(self, today: Optional[date] = None) -> None:
+        """Create upcoming monthly partitions and drop expired ones (PostgreSQL only)."""
+        month = (today or datetime.now(timezone.utc).date()).replace(day=1)
+        async with self.session_factory() as db:
+            if db.get_bind().dialect.name != "postgresql":
+                return
+            for ahead in range(AUDIT_PARTITIONS_AHEAD + 1):
+                await create_partition(db, _add_months(month, ahead))
+            if AUDIT_RETENTION_MONTHS > 0:
+                oldest_kept = partition_name(_add_months(month, -AUDIT_RETENTION_MONTHS))
+                for name in await list_partitions(db):
+                    # Names embed YYYYMM, so they compare in date order
+                    if name < oldest_kept:
+                        logger.info(f"Dropping expired audit partition {name}")
+                        await drop_partition(db, name)
+            await db.commit()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if time.monotonic() - self._maintained_at >= AUDIT_MAINTENANCE_INTERVAL_SECONDS:
+                    self._maintained_at = time.monotonic()
+                    await self.maintain_partitions()
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Audit log flusher error: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Whatever is still buffered; a failed write here is retried once more
+        await self.flush()
+        if self._retry is not None:
+            await self.flush()
+
+
+audit_log = AuditLog(SessionLocal, AUDIT_BUFFER_SIZE, AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL_SECONDS)
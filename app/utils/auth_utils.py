@@ -1,34 +1,49 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from app.auth.exceptions import InvalidTokenException
+from typing import Iterable, Optional
+from app.auth.keyring import keyring
 from passlib.context import CryptContext
 from dotenv import load_dotenv
 import os
 from app.logging_config import logger
+from app.utils.cache import TTLCache
+from app.utils.instrumentation import span
+import hashlib
 import secrets
+import time
 from pydantic import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.mail_dispatcher import enqueue_email
 
 load_dotenv()
 
-SECRET_KEY = os.getenv("JWT_SECRET", "fallback-secret-key")
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60  
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+VERIFICATION_TOKEN_EXPIRE_HOURS = int(os.getenv("VERIFICATION_TOKEN_EXPIRE_HOURS", "48"))
+PASSWORD_RESET_TOKEN_EXPIRE_MINUTES = int(os.getenv("PASSWORD_RESET_TOKEN_EXPIRE_MINUTES", "60"))
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Verified-token cache: skips re-parsing and re-checking the signature of tokens
+# we have already accepted. Entries expire at the token's own exp claim.
+TOKEN_CACHE_ENABLED = os.getenv("TOKEN_CACHE_ENABLED", "true").lower() == "true"
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "50000"))
+token_cache = TTLCache(maxsize=TOKEN_CACHE_MAX_ENTRIES, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60, name="tokens")
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=os.getenv("MAIL_USERNAME"),
-    MAIL_PASSWORD=os.getenv("MAIL_PASSWORD"),
-    MAIL_FROM=os.getenv("MAIL_FROM"),
-    MAIL_PORT=os.getenv("MAIL_PORT"),
-    MAIL_SERVER=os.getenv("MAIL_SERVER"),
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True
-)
+# argon2 cost; unset values keep passlib's defaults. Pick them with
+# ``python -m app.cli.passwords calibrate`` on the production CPU limits.
+# Hashes made with other parameters, and bcrypt hashes from before argon2,
+# still verify and are rehashed on the user's next login.
+PASSWORD_ARGON2_TIME_COST = os.getenv("PASSWORD_ARGON2_TIME_COST")
+PASSWORD_ARGON2_MEMORY_KIB = os.getenv("PASSWORD_ARGON2_MEMORY_KIB")
+PASSWORD_ARGON2_PARALLELISM = os.getenv("PASSWORD_ARGON2_PARALLELISM")
+
+def argon2_settings() -> dict:
+    settings = {
+        "argon2__time_cost": PASSWORD_ARGON2_TIME_COST,
+        "argon2__memory_cost": PASSWORD_ARGON2_MEMORY_KIB,
+        "argon2__parallelism": PASSWORD_ARGON2_PARALLELISM,
+    }
+    return {key: int(value) for key, value in settings.items() if value}
+
+pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto", **argon2_settings())
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     is_valid = pwd_context.verify(plain_password, hashed_password)
@@ -37,41 +52,67 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True for bcrypt hashes and argon2 hashes made with other parameters (parses only, no hashing)."""
+    return pwd_context.needs_update(hashed_password)
+
+def new_token_id() -> str:
+    return secrets.token_hex(16)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    # jti identifies the token in the revocation index
+    to_encode.setdefault("jti", new_token_id())
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    with span("jwt_encode"):
+        return keyring.sign(to_encode)
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
 
 def decode_access_token(token: str):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except JWTError as e:
-        raise InvalidTokenException(detail=str(e))
-    
+    if TOKEN_CACHE_ENABLED:
+        digest = _token_digest(token)
+        cached = token_cache.get(digest)
+        if cached is not None:
+            return dict(cached)
+    payload = keyring.decode(token)
+    exp = payload.get("exp")
+    if TOKEN_CACHE_ENABLED and exp is not None:
+        # exp is wall-clock; the cache runs on the monotonic clock
+        token_cache.set(digest, dict(payload), expires_at=time.monotonic() + (exp - time.time()))
+    return payload
+
+def revoke_cached_tokens(jtis: Iterable[str]) -> None:
+    """Drop revoked tokens from this process's verified-token cache, so their next use is decoded again.
+
+    A scan of the cache, but revocations are rare next to decodes.
+    """
+    jtis = set(jtis)
+    if jtis:
+        token_cache.pop_where(lambda payload: payload.get("jti") in jtis)
+
 def generate_verification_token():
     logger.info("Generating verifcation token")
     return secrets.token_urlsafe(32)
 
-async def send_verification_email(email: EmailStr, token: str):
+async def send_verification_email(db: AsyncSession, email: EmailStr, token: str):
+    """Queue the verification email; the mail dispatcher delivers it in the background."""
     verification_link = f"http://yourdomain.com/verify-email?token={token}"
-    message = MessageSchema(
+    await enqueue_email(
+        db,
+        recipient=email,
         subject="Verify your email",
-        recipients=[email],
         body=f"Please verify your email by clicking on the following link: {verification_link}",
-        subtype="plain"
     )
-    fm = FastMail(conf)
-    await fm.send_message(message)
     
-async def send_password_reset_email(email: EmailStr, token: str):
+async def send_password_reset_email(db: AsyncSession, email: EmailStr, token: str):
+    """Queue the password reset email; the mail dispatcher delivers it in the background."""
     reset_link = f"http://yourdomain.com/reset-password?token={token}"
-    message = MessageSchema(
+    await enqueue_email(
+        db,
+        recipient=email,
         subject="Reset Your Password",
-        recipients=[email],
         body=f"Please reset your password by clicking on the following link: {reset_link}",
-        subtype="plain"
-    )
-    fm = FastMail(conf)
-    await fm.send_message(message)
\ No newline at end of file
+    )
\ No newline at end of file
@@ -0,0 +1,98 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Mapping, Optional, TypeVar
+from app.utils.metrics import metrics
+from app.logging_config import logger
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+loader_requests = metrics.counter("batch_loader_requests_total", "Keys requested from batch loaders.")
+loader_coalesced = metrics.counter(
+    "batch_loader_coalesced_total", "Requests that joined an identical lookup queued in the same tick."
+)
+loader_queries = metrics.counter("batch_loader_queries_total", "Batch queries issued by batch loaders.")
+loader_saved = metrics.counter(
+    "batch_loader_queries_saved_total", "Lookups answered without a query of their own (batched or coalesced)."
+)
+loader_batch_size = metrics.histogram(
+    "batch_loader_batch_size", "Distinct keys per batch query.", buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500)
+)
+
+
+class BatchLoader(Generic[K, V]):
+    """Coalesces concurrent single-key lookups into batch queries.
+
+    Keys requested during one event-loop tick are collected and resolved by
+    a single ``batch_fn(keys)`` call (a dict of key to value; missing keys
+    resolve to ``None``) scheduled with ``call_soon``. A key requested twice
+    in the same tick is queried once and both callers share the future.
+    A key whose batch is already running is queried again rather than
+    joined: that query may have started before the caller's own request,
+    so its result can predate a write the caller has seen. Every caller
+    that did not trigger a query of its own is a query saved.
+
+    Results may be shared between tasks, so ``batch_fn`` should return
+    plain values (not objects bound to a session).
+    """
+
+    def __init__(self, name: str, batch_fn: Callable[[List[K]], Awaitable[Mapping[K, V]]],
+                 max_batch_size: int = 500):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._queue: Dict[K, asyncio.Future] = {}
+        self._scheduled = False
+
+    async def load(self, key: K) -> Optional[V]:
+        loader_requests.inc(loader=self.name)
+        future = self._queue.get(key)
+        if future is not None:
+            loader_coalesced.inc(loader=self.name)
+            loader_saved.inc(loader=self.name)
+        else:
+            loop = asyncio.get_running_loop()
+            future = self._queue[key] = loop.create_future()
+            if not self._scheduled:
+                self._scheduled = True
+                loop.call_soon(self._dispatch)
+        # Shielded: one cancelled caller must not cancel the lookup for the others.
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        self._scheduled = False
+        queue, self._queue = self._queue, {}
+        keys = list(queue)
+        for i in range(0, len(keys), self.max_batch_size):
+            batch = {key: queue[key] for key in keys[i:i + self.max_batch_size]}
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: Dict[K, asyncio.Future]) -> None:
+        loader_queries.inc(loader=self.name)
+        loader_batch_size.observe(len(batch), loader=self.name)
+        loader_saved.inc(len(batch) - 1, loader=self.name)
+        try:
+            results = await self.batch_fn(list(batch))
+        except Exception as e:
+            logger.error(f"Batch lookup '{self.name}' for {len(batch)} keys failed: {e}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for key, future in batch.items():
+                if not future.done():
+                    future.set_result(results.get(key))
+        finally:
+            for future in batch.values():
+                if not future.done():
+                    future.cancel()
+                elif not future.cancelled():
+                    # Mark exceptions as retrieved even if every caller has gone away.
+                    future.exception()
+
+    def stats(self) -> dict:
+        return {
+            "requests": loader_requests.value(loader=self.name),
+            "queries": loader_queries.value(loader=self.name),
+            "coalesced": loader_coalesced.value(loader=self.name),
+            "queries_saved": loader_saved.value(loader=self.name),
+        }
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+from app.utils.metrics import metrics
+
+_MISSING = object()
+
+cache_hits = metrics.counter("cache_hits_total", "Cache lookups that found a live entry.")
+cache_misses = metrics.counter("cache_misses_total", "Cache lookups that found nothing or an expired entry.")
+cache_evictions = metrics.counter("cache_evictions_total", "Entries dropped to stay within the size limit.")
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after a TTL.
+
+    Every entry carries its own deadline, so callers can pass an explicit
+    ``expires_at`` (e.g. a token's ``exp``) instead of the default TTL.
+    Expired entries are dropped lazily on access or when they reach the
+    LRU end of the cache.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: str = "default"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    cache_hits.inc(cache=self.name)
+                    return value
+                del self._data[key]
+        cache_misses.inc(cache=self.name)
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None) -> None:
+        """Store ``value``; ``expires_at`` is a ``time.monotonic()`` deadline."""
+        if expires_at is None:
+            expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            evicted = 0
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                evicted += 1
+        if evicted:
+            cache_evictions.inc(evicted, cache=self.name)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[1]
+
+    def purge_expired(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._data.items() if expires_at <= now]
+            for key in expired:
+                del self._data[key]
+        return len(expired)
+
+    def pop_where(self, predicate: Callable[[Any], bool]) -> int:
+        """Drop every entry whose value satisfies ``predicate``; returns how many were dropped."""
+        with self._lock:
+            matching = [key for key, (_, value) in self._data.items() if predicate(value)]
+            for key in matching:
+                del self._data[key]
+        return len(matching)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": cache_hits.value(cache=self.name),
+            "misses": cache_misses.value(cache=self.name),
+            "evictions": cache_evictions.value(cache=self.name),
+        }
@@ -0,0 +1,106 @@
+import os
+import random
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from app.utils.metrics import metrics
+
+load_dotenv()
+
+# Fraction of responses that get a Server-Timing breakdown header (0 disables it).
+METRICS_BREAKDOWN_SAMPLE_RATE = float(os.getenv("METRICS_BREAKDOWN_SAMPLE_RATE", "0"))
+
+request_latency = metrics.histogram(
+    "http_request_duration_seconds", "Request latency by route, method and status."
+)
+span_latency = metrics.histogram(
+    "span_duration_seconds", "Time spent in instrumented sections (db, password_verify, ...) per request and route."
+)
+
+_request_spans: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar("request_spans", default=None)
+
+
+class span:
+    """Times a block of code: ``with span("db"): ...``.
+
+    Inside a request the time is added to that request's breakdown and
+    reported per route when the response finishes; outside a request
+    (background tasks) it is recorded straight away with an empty route.
+    """
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> "span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        record_span(self.name, time.perf_counter() - self.start)
+
+
+def record_span(name: str, duration: float) -> None:
+    spans = _request_spans.get()
+    if spans is None:
+        span_latency.observe(duration, span=name, route="")
+        return
+    totals = spans.get(name)
+    if totals is None:
+        spans[name] = [duration, 1]
+    else:
+        totals[0] += duration
+        totals[1] += 1
+
+
+def server_timing(spans: Dict[str, List[float]], total: float) -> bytes:
+    parts = [f'{name};dur={duration * 1000:.2f};desc="x{count}"' for name, (duration, count) in spans.items()]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts).encode()
+
+
+class RequestMetricsMiddleware:
+    """Records per-route latency and the per-request span breakdown.
+
+    Plain ASGI middleware (no BaseHTTPMiddleware) to keep the per-request
+    cost to a couple of dict operations.
+    """
+
+    def __init__(self, app, sample_rate: float = METRICS_BREAKDOWN_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans: Dict[str, List[float]] = {}
+        token = _request_spans.set(spans)
+        start = time.perf_counter()
+        status = 500
+        breakdown = self.sample_rate > 0 and random.random() < self.sample_rate
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if breakdown:
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (b"server-timing", server_timing(spans, time.perf_counter() - start))
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            _request_spans.reset(token)
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            request_latency.observe(duration, route=path, method=scope["method"], status=status)
+            for name, (total, _) in spans.items():
+                span_latency.observe(total, span=name, route=path)
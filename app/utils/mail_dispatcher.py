@@ -0,0 +1,294 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from typing import List, Optional
+import aiosmtplib
+from dotenv import load_dotenv
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import SessionLocal
+from app.models.outbox_model import EmailOutbox, OutboxStatus
+from app.utils.metrics import metrics
+from app.utils.instrumentation import record_span, span
+from app.logging_config import logger
+
+load_dotenv()
+
+MAIL_USERNAME = os.getenv("MAIL_USERNAME")
+MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
+MAIL_FROM = os.getenv("MAIL_FROM")
+MAIL_PORT = int(os.getenv("MAIL_PORT") or 587)
+MAIL_SERVER = os.getenv("MAIL_SERVER")
+MAIL_STARTTLS = os.getenv("MAIL_STARTTLS", "true").lower() == "true"
+MAIL_SSL_TLS = os.getenv("MAIL_SSL_TLS", "false").lower() == "true"
+MAIL_USE_CREDENTIALS = os.getenv("MAIL_USE_CREDENTIALS", "true").lower() == "true"
+MAIL_VALIDATE_CERTS = os.getenv("MAIL_VALIDATE_CERTS", "true").lower() == "true"
+
+MAIL_POOL_SIZE = int(os.getenv("MAIL_POOL_SIZE", "2"))
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", "50"))
+MAIL_POLL_INTERVAL_SECONDS = float(os.getenv("MAIL_POLL_INTERVAL_SECONDS", "5"))
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", "8"))
+MAIL_BACKOFF_BASE_SECONDS = float(os.getenv("MAIL_BACKOFF_BASE_SECONDS", "2"))
+MAIL_BACKOFF_MAX_SECONDS = float(os.getenv("MAIL_BACKOFF_MAX_SECONDS", "900"))
+MAIL_LEASE_SECONDS = float(os.getenv("MAIL_LEASE_SECONDS", "300"))
+# Sent and failed rows are kept this long (with their body cleared) for troubleshooting
+MAIL_OUTBOX_RETENTION_DAYS = float(os.getenv("MAIL_OUTBOX_RETENTION_DAYS", "7"))
+
+mail_sent = metrics.counter("mail_sent_total", "Emails accepted by the SMTP server.")
+mail_failed = metrics.counter("mail_failed_total", "Email send attempts that failed.")
+mail_send_latency = metrics.histogram("mail_send_seconds", "Time to hand one message to the SMTP server.")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def backoff_delay(attempts: int) -> float:
+    return min(MAIL_BACKOFF_MAX_SECONDS, MAIL_BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+
+
+class SMTPConnectionPool:
+    """Keeps up to ``size`` authenticated SMTP connections open for reuse."""
+
+    def __init__(self, size: int, hostname: str, port: int, **smtp_kwargs):
+        self.size = size
+        self.hostname = hostname
+        self.port = port
+        self.smtp_kwargs = smtp_kwargs
+        self._idle: "asyncio.Queue[aiosmtplib.SMTP]" = asyncio.Queue()
+        self._created = 0
+        self._lock = asyncio.Lock()
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(hostname=self.hostname, port=self.port, **self.smtp_kwargs)
+        # connect() also runs STARTTLS and AUTH when they are configured
+        await smtp.connect()
+        return smtp
+
+    async def acquire(self) -> aiosmtplib.SMTP:
+        async with self._lock:
+            if self._idle.empty() and self._created < self.size:
+                self._created += 1
+                try:
+                    return await self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+        smtp = await self._idle.get()
+        if not smtp.is_connected:
+            try:
+                await smtp.connect()
+            except Exception:
+                self.discard(smtp)
+                raise
+        return smtp
+
+    def release(self, smtp: aiosmtplib.SMTP) -> None:
+        self._idle.put_nowait(smtp)
+
+    def discard(self, smtp: aiosmtplib.SMTP) -> None:
+        """Drop a broken connection so a fresh one can be opened in its place."""
+        smtp.close()
+        self._created -= 1
+
+    async def close(self) -> None:
+        while not self._idle.empty():
+            smtp = self._idle.get_nowait()
+            if smtp.is_connected:
+                try:
+                    await smtp.quit()
+                except aiosmtplib.SMTPException:
+                    smtp.close()
+        self._created = 0
+
+
+def build_message(row: EmailOutbox) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = MAIL_FROM
+    message["To"] = row.recipient
+    message["Subject"] = row.subject
+    message.set_content(row.body, subtype=row.subtype)
+    return message
+
+
+class MailDispatcher:
+    """Sends mail from the ``email_outbox`` table in the background.
+
+    Rows are claimed in batches with ``FOR UPDATE SKIP LOCKED`` and leased
+    for ``MAIL_LEASE_SECONDS`` so several app workers can share the outbox.
+    Each batch is spread over the pooled SMTP connections; failures are
+    retried with exponential backoff until ``MAIL_MAX_ATTEMPTS``. The body
+    (which carries live verification and reset links) is cleared as soon
+    as a row is sent or given up on.
+    """
+
+    def __init__(self, session_factory, pool: SMTPConnectionPool, batch_size: int = MAIL_BATCH_SIZE,
+                 poll_interval: float = MAIL_POLL_INTERVAL_SECONDS, max_attempts: int = MAIL_MAX_ATTEMPTS):
+        self.session_factory = session_factory
+        self.pool = pool
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        """Wake the dispatcher after new mail has been committed to the outbox."""
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.pool.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                sent = await self.dispatch_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Mail dispatcher error: {e}")
+                sent = 0
+            if sent < self.batch_size:
+                # Nothing (or not much) left; sleep until notified or the next poll.
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def _claim_batch(self, db: AsyncSession) -> List[EmailOutbox]:
+        now = _utcnow()
+        result = await db.execute(
+            select(EmailOutbox)
+            .where(EmailOutbox.status == OutboxStatus.pending, EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        rows = list(result.scalars())
+        for row in rows:
+            row.attempts += 1
+            row.next_attempt_at = now + timedelta(seconds=MAIL_LEASE_SECONDS)
+        await db.commit()
+        return rows
+
+    async def _send_worker(self, queue: "asyncio.Queue[EmailOutbox]", outcomes: dict) -> None:
+        smtp = None
+        try:
+            while not queue.empty():
+                row = queue.get_nowait()
+                if smtp is None:
+                    try:
+                        smtp = await self.pool.acquire()
+                    except Exception as e:
+                        outcomes[row.id] = str(e)
+                        continue
+                start = time.perf_counter()
+                try:
+                    await smtp.send_message(build_message(row))
+                    outcomes[row.id] = None
+                    mail_sent.inc()
+                except aiosmtplib.SMTPServerDisconnected as e:
+                    outcomes[row.id] = str(e)
+                    self.pool.discard(smtp)
+                    smtp = None
+                except Exception as e:
+                    outcomes[row.id] = str(e)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    mail_send_latency.observe(elapsed)
+                    record_span("email_send", elapsed)
+        finally:
+            if smtp is not None:
+                self.pool.release(smtp)
+
+    async def dispatch_once(self) -> int:
+        """Claim and send one batch; returns the number of rows claimed."""
+        async with self.session_factory() as db:
+            rows = await self._claim_batch(db)
+            if not rows:
+                return 0
+
+            queue: "asyncio.Queue[EmailOutbox]" = asyncio.Queue()
+            for row in rows:
+                queue.put_nowait(row)
+            outcomes: dict = {}
+            workers = min(self.pool.size, len(rows))
+            await asyncio.gather(*(self._send_worker(queue, outcomes) for _ in range(workers)))
+
+            now = _utcnow()
+            sent_ids = [row_id for row_id, error in outcomes.items() if error is None]
+            if sent_ids:
+                await db.execute(
+                    update(EmailOutbox)
+                    .where(EmailOutbox.id.in_(sent_ids))
+                    .values(status=OutboxStatus.sent, sent_at=now, last_error=None, body="")
+                )
+            for row in rows:
+                error = outcomes.get(row.id)
+                if error is None:
+                    continue
+                mail_failed.inc()
+                row.last_error = error
+                if row.attempts >= self.max_attempts:
+                    logger.error(f"Giving up on email {row.id} to {row.recipient}: {error}")
+                    row.status = OutboxStatus.failed
+                    row.body = ""
+                else:
+                    row.next_attempt_at = now + timedelta(seconds=backoff_delay(row.attempts))
+            await db.commit()
+            return len(rows)
+
+
+async def enqueue_email(db: AsyncSession, recipient: str, subject: str, body: str, subtype: str = "plain") -> EmailOutbox:
+    row = EmailOutbox(recipient=recipient, subject=subject, body=body, subtype=subtype,
+                      status=OutboxStatus.pending, attempts=0, next_attempt_at=_utcnow())
+    db.add(row)
+    with span("email_enqueue"):
+        await db.commit()
+    mail_dispatcher.notify()
+    return row
+
+
+async def delete_finished_emails(db: AsyncSession, batch_size: int) -> int:
+    """Delete up to ``batch_size`` sent or failed emails older than the retention, and commit."""
+    cutoff = _utcnow() - timedelta(days=MAIL_OUTBOX_RETENTION_DAYS)
+    finished_ids = (
+        select(EmailOutbox.id)
+        .where(EmailOutbox.status.in_([OutboxStatus.sent, OutboxStatus.failed]), EmailOutbox.created_at <= cutoff)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    result = await db.execute(delete(EmailOutbox).where(EmailOutbox.id.in_(finished_ids)))
+    await db.commit()
+    return result.rowcount
+
+
+def create_mail_dispatcher() -> MailDispatcher:
+    pool = SMTPConnectionPool(
+        MAIL_POOL_SIZE,
+        MAIL_SERVER,
+        MAIL_PORT,
+        username=MAIL_USERNAME if MAIL_USE_CREDENTIALS else None,
+        password=MAIL_PASSWORD if MAIL_USE_CREDENTIALS else None,
+        start_tls=MAIL_STARTTLS,
+        use_tls=MAIL_SSL_TLS,
+        validate_certs=MAIL_VALIDATE_CERTS,
+    )
+    return MailDispatcher(SessionLocal, pool)
+
+
+mail_dispatcher = create_mail_dispatcher()
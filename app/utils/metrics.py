@@ -0,0 +1,190 @@
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Under the prefork server (app.cli.serve) each worker also mirrors its
+# updates into its slab of a shared-memory segment; see attach_shared().
+_shared = None
+_shared_entries: Optional[Callable[[], Iterable]] = None
+
+
+def _label_key(labels: dict) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Counter:
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+            if _shared is not None:
+                _shared.add((self.name, key, 0), amount)
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._values)
+
+
+class Gauge(Counter):
+    def set(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+            if _shared is not None:
+                _shared.set((self.name, key, 0), value)
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    def __init__(self, name: str, description: str = "", buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # one slot per bucket plus +Inf, then sum and count
+                series = self._series[key] = [0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+            if _shared is not None:
+                _shared.add((self.name, key, index), 1)
+                _shared.add((self.name, key, len(series) - 2), value)
+                _shared.add((self.name, key, len(series) - 1), 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {key: list(series) for key, series in self._series.items()}
+
+
+class MetricsRegistry:
+    """Process-wide registry of counters, gauges and histograms."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        return self._get_or_create(Counter, name, description)
+
+    def gauge(self, name: str, description: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, description)
+
+    def histogram(self, name: str, description: str = "", buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, description, buckets)
+
+    def all(self) -> list:
+        with self._lock:
+            return list(self._metrics.values())
+
+
+metrics = MetricsRegistry()
+
+
+def attach_shared(writer, entries: Callable[[], Iterable]) -> None:
+    """Mirror metric updates into ``writer`` and render from ``entries``.
+
+    Called by each prefork worker after forking. ``writer`` is the worker's
+    own slab (``add``/``set`` by ``(name, label key, part)``) and
+    ``entries()`` yields ``(slot, key, value)`` across every worker's slab.
+    Only updates made after attaching are shared. Gauges left in the slab
+    by a previous worker in the same slot are reset, since they described
+    that process.
+    """
+    global _shared, _shared_entries
+    gauges = {metric.name for metric in metrics.all() if isinstance(metric, Gauge)}
+    for key, _, _ in writer.entries():
+        if key[0] in gauges:
+            writer.set(key, 0)
+    _shared, _shared_entries = writer, entries
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _aggregate_shared(registry: MetricsRegistry) -> Dict[str, dict]:
+    """Per-metric snapshots summed over every worker's slab.
+
+    Counters and histograms add up; gauges stay per worker, labelled with
+    the worker slot.
+    """
+    by_name = {metric.name: metric for metric in registry.all()}
+    snapshots: Dict[str, dict] = {name: {} for name in by_name}
+    for slot, (name, key, part), value in _shared_entries():
+        metric = by_name.get(name)
+        if metric is None:
+            continue
+        values = snapshots[name]
+        if isinstance(metric, Histogram):
+            series = values.get(key)
+            if series is None:
+                series = values[key] = [0] * (len(metric.buckets) + 3)
+            series[part] += value
+        elif isinstance(metric, Gauge):
+            values[key + (("worker", str(slot)),)] = value
+        else:
+            values[key] = values.get(key, 0) + value
+    return snapshots
+
+
+def render_prometheus(registry: MetricsRegistry = metrics) -> str:
+    """Render every registered metric in the Prometheus text exposition format.
+
+    Under the prefork server the values are those of all workers combined.
+    """
+    lines = []
+    shared = _aggregate_shared(registry) if _shared_entries is not None else None
+    for metric in registry.all():
+        kind = "histogram" if isinstance(metric, Histogram) else "gauge" if isinstance(metric, Gauge) else "counter"
+        if metric.description:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {kind}")
+        if isinstance(metric, Histogram):
+            for key, series in (shared.get(metric.name, {}) if shared is not None else metric.snapshot()).items():
+                cumulative = 0
+                for bound, count in zip(metric.buckets, series):
+                    cumulative += count
+                    lines.append(f"{metric.name}_bucket{_format_labels(key, (('le', repr(float(bound))),))} {cumulative}")
+                lines.append(f"{metric.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {series[-1]}")
+                lines.append(f"{metric.name}_sum{_format_labels(key)} {series[-2]}")
+                lines.append(f"{metric.name}_count{_format_labels(key)} {series[-1]}")
+        else:
+            for key, value in (shared.get(metric.name, {}) if shared is not None else metric.snapshot()).items():
+                lines.append(f"{metric.name}{_format_labels(key)} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,160 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.auth.exceptions import PasswordHashingBusyException
+from app.auth.user_cache import user_cache
+from app.crud.user_crud import replace_password_hash, stream_password_hashes
+from app.database import SessionLocal
+from app.utils.auth_utils import get_password_hash, password_needs_rehash, pwd_context, verify_password
+from app.utils.metrics import metrics
+from app.utils.instrumentation import record_span
+from app.logging_config import logger
+
+load_dotenv()
+
+# "thread" is usually enough: argon2-cffi releases the GIL while hashing.
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "64"))
+
+hash_latency = metrics.histogram(
+    "password_hash_seconds", "Time from submission to completion of an argon2 hash/verify call."
+)
+hash_in_flight = metrics.gauge("password_hash_in_flight", "Hash/verify calls running or queued.")
+hash_rejected = metrics.counter("password_hash_rejected_total", "Hash/verify calls rejected because the pool was full.")
+rehashes = metrics.counter("password_rehash_total", "Background rehashes of outdated password hashes by outcome.")
+
+
+class PasswordHasher:
+    """Runs argon2 hashing off the event loop on a bounded worker pool.
+
+    At most ``max_workers + max_queue`` calls are accepted at once; anything
+    beyond that is rejected with ``PasswordHashingBusyException`` instead of
+    piling up behind the pool.
+    """
+
+    def __init__(self, executor_kind: str = "thread", max_workers: int = 1, max_queue: int = 0):
+        if executor_kind not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor '{executor_kind}'")
+        self.executor_kind = executor_kind
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            logger.info(f"Starting password hash {self.executor_kind} pool with {self.max_workers} workers")
+            if self.executor_kind == "process":
+                # Not fork: a forked child would inherit the event loop, pool connections and held locks
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context("forkserver"))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="argon2")
+        return self._executor
+
+    async def _run(self, op: str, fn, *args):
+        if self._in_flight >= self.capacity:
+            hash_rejected.inc(op=op)
+            raise PasswordHashingBusyException()
+        self._in_flight += 1
+        hash_in_flight.set(self._in_flight)
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._in_flight -= 1
+            hash_in_flight.set(self._in_flight)
+            elapsed = time.perf_counter() - start
+            hash_latency.observe(elapsed, op=op)
+            record_span(f"password_{op}", elapsed)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    executor_kind=PASSWORD_HASH_EXECUTOR,
+    max_workers=PASSWORD_HASH_WORKERS,
+    max_queue=PASSWORD_HASH_QUEUE_SIZE,
+)
+
+
+class PasswordRehasher:
+    """Upgrades outdated password hashes after a successful login, off the request path.
+
+    The login response does not wait: the new hash is computed on the
+    shared hash pool in a background task and stored only if the user's
+    hash is still the one that was verified. A rehash that fails (pool
+    busy, database error) is simply retried on the next login.
+    """
+
+    def __init__(self, hasher: PasswordHasher, session_factory):
+        self.hasher = hasher
+        self.session_factory = session_factory
+        self._pending: Dict[int, asyncio.Task] = {}
+
+    def schedule(self, user_id: int, email: str, password: str, old_hash: str) -> None:
+        if user_id in self._pending or not password_needs_rehash(old_hash):
+            return
+        task = asyncio.create_task(self._rehash(user_id, email, password, old_hash))
+        self._pending[user_id] = task
+        task.add_done_callback(lambda _: self._pending.pop(user_id, None))
+
+    async def _rehash(self, user_id: int, email: str, password: str, old_hash: str) -> None:
+        try:
+            new_hash = await self.hasher.hash(password)
+            async with self.session_factory() as db:
+                replaced = await replace_password_hash(db, user_id, old_hash, new_hash)
+                await db.commit()
+            if replaced:
+                await user_cache.invalidate(email)
+            rehashes.inc(outcome="upgraded" if replaced else "superseded")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            rehashes.inc(outcome="failed")
+            logger.warning(f"Rehashing the password of user {user_id} failed: {e}")
+
+    async def stop(self) -> None:
+        """Let in-flight rehashes finish (they are short) before the hash pool shuts down."""
+        if self._pending:
+            await asyncio.gather(*self._pending.values(), return_exceptions=True)
+
+
+password_rehasher = PasswordRehasher(password_hasher, SessionLocal)
+
+
+def hash_scheme(hashed_password: Optional[str]) -> str:
+    if not hashed_password:
+        return "none"
+    scheme = pwd_context.identify(hashed_password)
+    if scheme is None:
+        return "unknown"
+    if scheme == "argon2":
+        return "argon2_outdated" if password_needs_rehash(hashed_password) else "argon2_current"
+    return scheme
+
+
+async def password_hash_report(db: AsyncSession) -> dict:
+    """How many users have current, outdated-argon2, bcrypt or no password hashes."""
+    counts: Counter = Counter()
+    async for hashed_password in stream_password_hashes(db):
+        counts[hash_scheme(hashed_password)] += 1
+    legacy = sum(count for scheme, count in counts.items() if scheme not in ("argon2_current", "none"))
+    return {"schemes": dict(counts), "legacy": legacy, "total": sum(counts.values())}
@@ -0,0 +1,35 @@
+from typing import Any, Callable, Type, Union
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def compile_serializer(model: Type[BaseModel]) -> Callable[[Any], dict]:
+    """Build ``obj -> dict`` reading ``model``'s fields straight off an ORM row.
+
+    The function is generated once per model as a single dict literal, so
+    serializing a row costs one attribute read per field. Nothing is
+    validated: use it only for rows we loaded ourselves, whose columns
+    already satisfy the schema. Enums and datetimes are left for orjson.
+    """
+    fields = list(model.model_fields)
+    for name in fields:
+        if not name.isidentifier():
+            raise ValueError(f"{model.__name__}.{name} is not an attribute name")
+    source = "def serialize(obj):\n    return {" + ", ".join(f"{name!r}: obj.{name}" for name in fields) + "}\n"
+    namespace: dict = {}
+    exec(compile(source, f"<serializer {model.__name__}>", "exec"), namespace)
+    serialize = namespace["serialize"]
+    serialize.__qualname__ = f"serialize_{model.__name__}"
+    return serialize
+
+
+def trusted_response(content: Union[BaseModel, dict], status_code: int = 200) -> ORJSONResponse:
+    """Respond with a payload we built ourselves.
+
+    Returning a response object makes FastAPI skip the route's
+    ``response_model`` validation and ``jsonable_encoder`` pass; the
+    ``response_model`` still documents the endpoint in OpenAPI.
+    """
+    if isinstance(content, BaseModel):
+        content = content.model_dump()
+    return ORJSONResponse(content, status_code=status_code)
@@ -0,0 +1,302 @@
+"""Shared-memory segments for the prefork server (``app.cli.serve``).
+
+The master creates the segments with anonymous ``MAP_SHARED`` mmaps before
+preloading the app and forking, so every worker inherits the same pages and
+no external service is involved. Nothing here is used when the app runs
+under plain uvicorn.
+
+``MetricsSegment`` gives each worker slot its own slab of
+``(key, float)`` entries. A slab has a single writer (the worker in that
+slot), so updates need no cross-process lock; the ``/metrics`` endpoint
+in any worker reads every slab and adds them up. A worker restarted into
+the same slot keeps appending to that slab, so counters never go
+backwards across restarts.
+
+``SharedCounterTable`` is an open-addressing hash table of windowed
+counters for the rate limiter, striped over process-shared locks.
+``SharedSessionTable`` is the same kind of table holding serialized
+sessions, so the OAuth callback finds the state its redirect stored
+whichever worker served the redirect.
+"""
+import hashlib
+import json
+import mmap
+import multiprocessing
+import struct
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.logging_config import logger
+
+# Slab: an 8-byte entry count, then fixed-size entries of
+# value (double) + key length (uint16) + UTF-8 JSON key.
+_SLAB_HEADER = struct.Struct("<q")
+_ENTRY_HEAD = struct.Struct("<dH")
+ENTRY_SIZE = 256
+MAX_KEY_BYTES = ENTRY_SIZE - _ENTRY_HEAD.size
+
+# Counter slot: fingerprint, window index, count, expiry (unix seconds)
+_COUNTER = struct.Struct("<qqqq")
+COUNTER_PROBES = 16
+LOCK_TIMEOUT_SECONDS = 0.1
+
+# Session slot: session ID digest, expiry (unix seconds), value length, then the value
+_SESSION_HEAD = struct.Struct("<16sdI")
+_EMPTY_DIGEST = bytes(16)
+
+MetricKey = Tuple[str, tuple, int]
+
+
+class SlabWriter:
+    """One worker's view of its own slab."""
+
+    def __init__(self, buffer: mmap.mmap, base: int, capacity: int):
+        self.buffer = buffer
+        self.base = base
+        self.capacity = capacity
+        self._offsets: Dict[MetricKey, int] = {}
+        self._lock = threading.Lock()
+        self._full_warned = False
+        # A restarted worker picks up where its predecessor left off
+        for key, offset, _ in self.entries():
+            self._offsets[key] = offset
+
+    def _count(self) -> int:
+        return _SLAB_HEADER.unpack_from(self.buffer, self.base)[0]
+
+    def entries(self) -> Iterator[Tuple[MetricKey, int, float]]:
+        buffer = self.buffer
+        for index in range(min(self._count(), self.capacity)):
+            offset = self.base + _SLAB_HEADER.size + index * ENTRY_SIZE
+            value, length = _ENTRY_HEAD.unpack_from(buffer, offset)
+            start = offset + _ENTRY_HEAD.size
+            name, labels, part = json.loads(buffer[start:start + length])
+            yield (name, tuple(tuple(pair) for pair in labels), part), offset, value
+
+    def _offset(self, key: MetricKey) -> Optional[int]:
+        offset = self._offsets.get(key)
+        if offset is not None:
+            return offset
+        with self._lock:
+            offset = self._allocate(key)
+        if offset is None and not self._full_warned:
+            # Outside the lock: logging can itself update a metric
+            self._full_warned = True
+            logger.warning(f"Shared metrics slab full or key too long, not sharing {key[0]}; "
+                           f"raise METRICS_SHM_ENTRIES")
+        return offset
+
+    def _allocate(self, key: MetricKey) -> Optional[int]:
+        offset = self._offsets.get(key)
+        if offset is not None:
+            return offset
+        encoded = json.dumps(key, separators=(",", ":")).encode()
+        count = self._count()
+        if count >= self.capacity or len(encoded) > MAX_KEY_BYTES:
+            return None
+        offset = self.base + _SLAB_HEADER.size + count * ENTRY_SIZE
+        _ENTRY_HEAD.pack_into(self.buffer, offset, 0.0, len(encoded))
+        self.buffer[offset + _ENTRY_HEAD.size:offset + _ENTRY_HEAD.size + len(encoded)] = encoded
+        # Publish the entry only once its key is in place
+        _SLAB_HEADER.pack_into(self.buffer, self.base, count + 1)
+        self._offsets[key] = offset
+        return offset
+
+    def add(self, key: MetricKey, amount: float) -> None:
+        offset = self._offset(key)
+        if offset is not None:
+            value = struct.unpack_from("<d", self.buffer, offset)[0]
+            struct.pack_into("<d", self.buffer, offset, value + amount)
+
+    def set(self, key: MetricKey, value: float) -> None:
+        offset = self._offset(key)
+        if offset is not None:
+            struct.pack_into("<d", self.buffer, offset, value)
+
+
+class MetricsSegment:
+    def __init__(self, slots: int, entries_per_slot: int):
+        self.slots = slots
+        self.entries_per_slot = entries_per_slot
+        self.slab_size = _SLAB_HEADER.size + entries_per_slot * ENTRY_SIZE
+        self.buffer = mmap.mmap(-1, slots * self.slab_size)
+
+    def writer(self, slot: int) -> SlabWriter:
+        return SlabWriter(self.buffer, slot * self.slab_size, self.entries_per_slot)
+
+    def entries(self) -> Iterator[Tuple[int, MetricKey, float]]:
+        """Every entry of every slot as ``(slot, key, value)``."""
+        for slot in range(self.slots):
+            for key, _, value in SlabWriter(self.buffer, slot * self.slab_size, self.entries_per_slot).entries():
+                yield slot, key, value
+
+
+def _fingerprint(key: str) -> int:
+    fingerprint = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little", signed=True)
+    # 0 marks an empty slot
+    return fingerprint or 1
+
+
+class SharedCounterTable:
+    """Fixed-size table of per-window hit counts shared by all workers.
+
+    A counter lives in one of ``shards`` regions, each guarded by its own
+    process-shared lock, and is found by linear probing from its hash.
+    Slots whose window has expired are reused in place, so the table never
+    needs sweeping. When every probed slot is live the hit is not counted
+    and ``hit`` reports ``None``; size ``slots`` for the number of keys
+    active within two windows. The same happens if a shard's lock cannot
+    be taken within ``LOCK_TIMEOUT_SECONDS`` (a worker killed while
+    holding it), so a stuck shard fails open instead of hanging requests.
+    """
+
+    def __init__(self, slots: int, shards: int):
+        self.shards = shards
+        self.slots_per_shard = max(COUNTER_PROBES, slots // shards)
+        self.buffer = mmap.mmap(-1, shards * self.slots_per_shard * _COUNTER.size)
+        self.locks = [multiprocessing.Lock() for _ in range(shards)]
+
+    def _probe(self, fingerprint: int) -> Tuple[int, List[int]]:
+        shard = fingerprint % self.shards
+        region = shard * self.slots_per_shard
+        start = (fingerprint // self.shards) % self.slots_per_shard
+        offsets = [(region + (start + i) % self.slots_per_shard) * _COUNTER.size for i in range(COUNTER_PROBES)]
+        return shard, offsets
+
+    def hit(self, key: str, window: int, now: float, allow) -> Optional[bool]:
+        """Count a hit on ``key`` if ``allow(previous_count, current_count)`` is true.
+
+        Returns what ``allow`` said, or ``None`` if it allowed the hit but
+        the table had no room to count it.
+        """
+        fingerprint = _fingerprint(f"{window}:{key}")
+        index = int(now // window)
+        shard, offsets = self._probe(fingerprint)
+        buffer = self.buffer
+        lock = self.locks[shard]
+        if not lock.acquire(timeout=LOCK_TIMEOUT_SECONDS):
+            return None if allow(0, 0) else False
+        try:
+            current_offset = free_offset = None
+            previous = current = 0
+            for offset in offsets:
+                slot_fingerprint, slot_index, count, expires = _COUNTER.unpack_from(buffer, offset)
+                if slot_fingerprint == fingerprint and expires > now:
+                    if slot_index == index:
+                        current, current_offset = count, offset
+                    elif slot_index == index - 1:
+                        previous = count
+                elif free_offset is None and (slot_fingerprint == 0 or expires <= now):
+                    free_offset = offset
+            if not allow(previous, current):
+                return False
+            offset = current_offset if current_offset is not None else free_offset
+            if offset is None:
+                return None
+            _COUNTER.pack_into(buffer, offset, fingerprint, index, current + 1, (index + 2) * window)
+            return True
+        finally:
+            lock.release()
+
+
+class SharedSessionTable:
+    """Fixed-size table of serialized sessions shared by all workers.
+
+    Laid out like ``SharedCounterTable``: ``shards`` regions under their
+    own locks, linear probing from a hash of the session ID, expired slots
+    reused in place. Each slot holds up to ``value_bytes`` of session data.
+    ``set`` returns False when the value is too large, every probed slot
+    holds a live session, or the shard's lock is stuck; ``get`` then finds
+    nothing, as for an expired session.
+    """
+
+    def __init__(self, slots: int, shards: int, value_bytes: int):
+        self.shards = shards
+        self.slots_per_shard = max(COUNTER_PROBES, slots // shards)
+        self.value_bytes = value_bytes
+        self.slot_size = _SESSION_HEAD.size + value_bytes
+        self.buffer = mmap.mmap(-1, shards * self.slots_per_shard * self.slot_size)
+        self.locks = [multiprocessing.Lock() for _ in range(shards)]
+
+    def _probe(self, digest: bytes) -> Tuple[int, List[int]]:
+        position = int.from_bytes(digest[:8], "little")
+        shard = position % self.shards
+        region = shard * self.slots_per_shard
+        start = (position // self.shards) % self.slots_per_shard
+        offsets = [(region + (start + i) % self.slots_per_shard) * self.slot_size for i in range(COUNTER_PROBES)]
+        return shard, offsets
+
+    def _find(self, digest: bytes, offsets: List[int], now: float) -> Tuple[Optional[int], Optional[int]]:
+        """The live slot holding ``digest`` and the first free one, as offsets."""
+        free_offset = None
+        for offset in offsets:
+            slot_digest, expires, _ = _SESSION_HEAD.unpack_from(self.buffer, offset)
+            if slot_digest == digest and expires > now:
+                return offset, free_offset
+            if free_offset is None and (slot_digest == _EMPTY_DIGEST or expires <= now):
+                free_offset = offset
+        return None, free_offset
+
+    def get(self, session_id: str) -> Optional[bytes]:
+        digest = hashlib.blake2b(session_id.encode(), digest_size=16).digest()
+        shard, offsets = self._probe(digest)
+        lock = self.locks[shard]
+        if not lock.acquire(timeout=LOCK_TIMEOUT_SECONDS):
+            return None
+        try:
+            offset, _ = self._find(digest, offsets, time.time())
+            if offset is None:
+                return None
+            length = _SESSION_HEAD.unpack_from(self.buffer, offset)[2]
+            start = offset + _SESSION_HEAD.size
+            return self.buffer[start:start + length]
+        finally:
+            lock.release()
+
+    def set(self, session_id: str, value: bytes, ttl: int) -> bool:
+        if len(value) > self.value_bytes:
+            return False
+        digest = hashlib.blake2b(session_id.encode(), digest_size=16).digest()
+        shard, offsets = self._probe(digest)
+        lock = self.locks[shard]
+        if not lock.acquire(timeout=LOCK_TIMEOUT_SECONDS):
+            return False
+        try:
+            now = time.time()
+            offset, free_offset = self._find(digest, offsets, now)
+            offset = offset if offset is not None else free_offset
+            if offset is None:
+                return False
+            start = offset + _SESSION_HEAD.size
+            self.buffer[start:start + len(value)] = value
+            _SESSION_HEAD.pack_into(self.buffer, offset, digest, now + ttl, len(value))
+            return True
+        finally:
+            lock.release()
+
+    def delete(self, session_id: str) -> None:
+        digest = hashlib.blake2b(session_id.encode(), digest_size=16).digest()
+        shard, offsets = self._probe(digest)
+        lock = self.locks[shard]
+        if not lock.acquire(timeout=LOCK_TIMEOUT_SECONDS):
+            return
+        try:
+            offset, _ = self._find(digest, offsets, time.time())
+            if offset is not None:
+                _SESSION_HEAD.pack_into(self.buffer, offset, _EMPTY_DIGEST, 0.0, 0)
+        finally:
+            lock.release()
+
+
+metrics_segment: Optional[MetricsSegment] = None
+counter_table: Optional[SharedCounterTable] = None
+session_table: Optional[SharedSessionTable] = None
+
+
+def init(slots: int, metric_entries: int, counter_slots: int, counter_shards: int,
+         session_slots: int, session_value_bytes: int) -> None:
+    """Create the segments; the master calls this before importing the app and forking."""
+    global metrics_segment, counter_table, session_table
+    metrics_segment = MetricsSegment(slots, metric_entries)
+    counter_table = SharedCounterTable(counter_slots, counter_shards)
+    session_table = SharedSessionTable(session_slots, counter_shards, session_value_bytes)
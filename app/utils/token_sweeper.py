@@ -0,0 +1,81 @@
+import asyncio
+import os
+from typing import Optional
+from dotenv import load_dotenv
+from app.crud.token_crud import delete_expired_refresh_tokens, delete_expired_revocations, delete_expired_tokens
+from app.database import SessionLocal
+from app.utils.mail_dispatcher import delete_finished_emails
+from app.utils.metrics import metrics
+from app.logging_config import logger
+
+load_dotenv()
+
+TOKEN_SWEEP_INTERVAL_SECONDS = float(os.getenv("TOKEN_SWEEP_INTERVAL_SECONDS", "600"))
+TOKEN_SWEEP_BATCH_SIZE = int(os.getenv("TOKEN_SWEEP_BATCH_SIZE", "1000"))
+
+tokens_swept = metrics.counter("auth_tokens_swept_total", "Expired token rows deleted, by table.")
+
+SWEEPS = {
+    "auth_tokens": delete_expired_tokens,
+    "refresh_tokens": delete_expired_refresh_tokens,
+    "revoked_tokens": delete_expired_revocations,
+    "email_outbox": delete_finished_emails,
+}
+
+
+class TokenSweeper:
+    """Periodically deletes expired tokens in small batches.
+
+    Covers verification/reset tokens, refresh tokens, revocations of
+    access tokens that have expired anyway, and sent or failed outbox
+    emails past ``MAIL_OUTBOX_RETENTION_DAYS``. Each batch is its own short
+    transaction, so a large backlog never holds locks for long.
+    """
+
+    def __init__(self, session_factory, interval: float, batch_size: int, pause: float = 0.05):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self._task: Optional[asyncio.Task] = None
+
+    async def sweep(self) -> int:
+        total = 0
+        for table, delete_expired in SWEEPS.items():
+            while True:
+                async with self.session_factory() as db:
+                    deleted = await delete_expired(db, self.batch_size)
+                total += deleted
+                tokens_swept.inc(deleted, table=table)
+                if deleted < self.batch_size:
+                    break
+                await asyncio.sleep(self.pause)
+        return total
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                deleted = await self.sweep()
+                if deleted:
+                    logger.info(f"Token sweeper deleted {deleted} expired rows")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Token sweeper error: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+token_sweeper = TokenSweeper(SessionLocal, TOKEN_SWEEP_INTERVAL_SECONDS, TOKEN_SWEEP_BATCH_SIZE)
@@ -0,0 +1,149 @@
+"""Load test for the auth endpoints, run fully in-process.
+
+Starts the real FastAPI app (with its lifespan, so background workers run)
+behind httpx's ASGI transport, on SQLite by default or on whatever
+``DATABASE_URL`` points at, with a local fake SMTP server standing in for
+the mail relay and a local fake OpenID provider standing in for Google
+(whose metadata the app loads at startup). For each scenario it reports RPS and p50/p95/p99 latency as JSON;
+compare two runs with ``python -m benchmarks.compare old.json new.json``.
+
+    python -m benchmarks.auth_load --requests 500 --concurrency 32 --output results.json
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from collections import Counter
+
+from benchmarks.common import create_schema, emit, setup_env, summarize
+
+# Quiet, console-only logging so the harness measures the app, not the log
+# volume; rate limiting off since every request comes from one client.
+setup_env(LOG_FILE="", LOG_LEVEL="WARNING", RATE_LIMIT_ENABLED="false")
+
+import httpx  # noqa: E402
+from benchmarks.fake_oauth import FakeOAuthProvider  # noqa: E402
+from benchmarks.fake_smtp import FakeSMTPServer  # noqa: E402
+
+SCENARIOS = ("signup", "login", "verify_email", "authenticated")
+PASSWORD = "benchmark-password"
+
+
+async def seed(count: int) -> dict:
+    """Create verified users for login/authenticated and unverified ones with live tokens."""
+    from datetime import timedelta
+    from sqlalchemy import select
+    from app.crud.token_crud import create_token
+    from app.database import SessionLocal
+    from app.models.token_model import TokenPurpose
+    from app.models.user_model import AuthProvider, User, UserRole
+    from app.utils.auth_utils import create_access_token, get_password_hash
+
+    hashed = get_password_hash(PASSWORD)
+    verified = [f"login-{i}@example.com" for i in range(count)]
+    unverified = [f"verify-{i}@example.com" for i in range(count)]
+    async with SessionLocal() as db:
+        db.add_all([
+            User(email=email, hashed_password=hashed, full_name="Bench User", role=UserRole.customer,
+                 is_active=True, is_verified=is_verified, auth_provider=AuthProvider.email)
+            for emails, is_verified in ((verified, True), (unverified, False))
+            for email in emails
+        ])
+        await db.commit()
+        user_ids = dict((await db.execute(select(User.email, User.id))).all())
+        tokens = [
+            await create_token(db, user_ids[email], TokenPurpose.email_verification, timedelta(hours=1))
+            for email in unverified
+        ]
+        await db.commit()
+    return {
+        "emails": verified,
+        "verification_tokens": tokens,
+        "access_tokens": [create_access_token({"sub": email, "role": "customer"}) for email in verified],
+    }
+
+
+def request_factory(scenario: str, data: dict, run_id: str):
+    if scenario == "signup":
+        return lambda client, i: client.post("/auth/signup", json={
+            "email": f"signup-{run_id}-{i}@example.com", "password": PASSWORD, "full_name": "Bench Signup",
+        })
+    if scenario == "login":
+        emails = data["emails"]
+        return lambda client, i: client.post("/auth/login", json={
+            "username": emails[i % len(emails)], "password": PASSWORD,
+        })
+    if scenario == "verify_email":
+        tokens = data["verification_tokens"]
+        # Tokens are single-use: once --users requests (warm-up included) have
+        # gone through, the rest exercise the invalid-token path.
+        return lambda client, i: client.get("/auth/verify-email", params={"token": tokens[i % len(tokens)]})
+    if scenario == "authenticated":
+        tokens = data["access_tokens"]
+        return lambda client, i: client.get(
+            "/auth/me", headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+        )
+    raise ValueError(scenario)
+
+
+async def run_scenario(client: httpx.AsyncClient, make_request, requests: int, concurrency: int) -> dict:
+    durations, statuses = [], Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await make_request(client, i)
+            durations.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "requests_per_second": requests / elapsed,
+        "latency": summarize(durations),
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+async def main(args) -> None:
+    smtp = await FakeSMTPServer().start()
+    os.environ["MAIL_SERVER"] = smtp.host
+    os.environ["MAIL_PORT"] = str(smtp.port)
+    provider = await FakeOAuthProvider(os.environ["GOOGLE_CLIENT_ID"]).start()
+    os.environ["GOOGLE_DISCOVERY_URL"] = provider.discovery_url
+
+    from app.main import app
+
+    await create_schema()
+    results = {}
+    async with app.router.lifespan_context(app):
+        data = await seed(args.users)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            run_id = uuid.uuid4().hex[:8]
+            for scenario in args.scenarios:
+                make_request = request_factory(scenario, data, run_id)
+                if args.warmup:
+                    await run_scenario(client, request_factory(scenario, data, run_id + "w"),
+                                       args.warmup, args.concurrency)
+                results[scenario] = await run_scenario(client, make_request, args.requests, args.concurrency)
+    await smtp.stop()
+    await provider.stop()
+    results["emails_delivered"] = len(smtp.messages)
+    results["config"] = {**vars(args), "database": os.environ["DATABASE_URL"].split("@")[-1]}
+    emit("auth_load", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--users", type=int, default=200, help="seeded users per scenario")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,80 @@
+"""Cost of auditing on the request path and of writing the audit log.
+
+Times ``audit_log.record()`` (what a login pays), then writes ``--events``
+events three ways: one INSERT and commit per event (what a synchronous
+audit row per request would cost), and the batched flusher at
+``--batch-size``. Finally records into a small buffer with no flusher to
+show events being dropped and counted instead of blocking.
+
+Against PostgreSQL (``DATABASE_URL`` with asyncpg, after ``alembic
+upgrade head``) the batched path uses COPY; on SQLite it is a multi-row
+INSERT.
+
+    python -m benchmarks.bench_audit_log --events 20000 --batch-size 500
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from benchmarks.common import create_schema, emit, setup_env
+
+setup_env(LOG_FILE="", LOG_LEVEL="WARNING")
+
+from app.database import SessionLocal, get_engine  # noqa: E402
+from app.models.audit_model import AuditEvent, AuditEventType  # noqa: E402
+from app.utils.audit_log import AuditLog, events_dropped  # noqa: E402
+
+
+def fill(log: AuditLog, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        log.record(AuditEventType.login, i % 7 != 0, i, f"user{i}@example.com", reason="bench")
+    return time.perf_counter() - start
+
+
+async def per_event_inserts(count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        async with SessionLocal() as db:
+            db.add(AuditEvent(occurred_at=datetime.now(timezone.utc), event="login", success=True, user_id=i,
+                              email=f"user{i}@example.com", detail={"reason": "bench"}))
+            await db.commit()
+    return time.perf_counter() - start
+
+
+async def main(args) -> None:
+    if get_engine().dialect.name == "sqlite":
+        await create_schema()
+
+    log = AuditLog(SessionLocal, buffer_size=args.events, batch_size=args.batch_size, flush_interval=1)
+    record_seconds = fill(log, args.events)
+    start = time.perf_counter()
+    written = await log.flush()
+    batched_seconds = time.perf_counter() - start
+
+    sync_events = min(args.events, args.sync_events)
+    sync_seconds = await per_event_inserts(sync_events)
+
+    overloaded = AuditLog(SessionLocal, buffer_size=args.batch_size, batch_size=args.batch_size, flush_interval=1)
+    before = events_dropped.value(reason="buffer_full")
+    fill(overloaded, args.events)
+
+    emit("audit_log", {
+        "record_us": record_seconds / args.events * 1e6,
+        "batched_events_per_second": written / batched_seconds,
+        "per_event_insert_events_per_second": sync_events / sync_seconds,
+        "per_event_insert_ms": sync_seconds / sync_events * 1000,
+        "overload_buffered": len(overloaded._buffer),
+        "overload_dropped": events_dropped.value(reason="buffer_full") - before,
+        "config": vars(args),
+    }, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--sync-events", type=int, default=2000, help="events written one commit each")
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,84 @@
+"""Throughput and memory of the bulk user import and export.
+
+Generates a CSV of ``--rows`` users (a ``--invalid`` fraction of them
+broken), imports it through ``UserImporter`` and streams it back out with
+``export_users``. Reports rows/second for both and the peak Python heap
+(tracemalloc) so you can check that memory stays flat as ``--rows`` grows.
+
+    python -m benchmarks.bench_bulk_import --rows 50000 --chunk-size 1000
+"""
+import argparse
+import asyncio
+import csv
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.common import create_schema, emit, setup_env
+
+setup_env(LOG_FILE="", LOG_LEVEL="WARNING")
+
+
+def write_rows(path: str, rows: int, invalid: float) -> None:
+    with open(path, "w", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["email", "password", "full_name", "role", "is_verified"])
+        for i in range(rows):
+            email = f"import-{i}@example.com" if random.random() >= invalid else f"not-an-email-{i}"
+            writer.writerow([email, f"password-{i}", f"Imported User {i}", random.choice(["customer", "caregiver"]), "true"])
+
+
+async def main(args) -> None:
+    from app.database import SessionLocal
+    from app.services.bulk_user_service import UserImporter, export_users, shutdown_hash_executor
+
+    await create_schema()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.csv")
+        write_rows(path, args.rows, args.invalid)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        with open(path, newline="") as lines:
+            async with SessionLocal() as db:
+                report = await UserImporter(db, chunk_size=args.chunk_size).run(lines, "csv")
+        import_seconds = time.perf_counter() - start
+        _, import_peak = tracemalloc.get_traced_memory()
+
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        exported = 0
+        async with SessionLocal() as db:
+            async for chunk in export_users(db, args.export_format):
+                exported += len(chunk)
+        export_seconds = time.perf_counter() - start
+        _, export_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    shutdown_hash_executor()
+
+    emit("bulk_import", {
+        "import": {
+            "rows_per_second": args.rows / import_seconds,
+            "created": report.created,
+            "failed": report.failed,
+            "peak_heap_mb": import_peak / 2**20,
+        },
+        "export": {
+            "rows_per_second": report.created / export_seconds if export_seconds else 0.0,
+            "bytes": exported,
+            "peak_heap_mb": export_peak / 2**20,
+        },
+        "config": vars(args),
+    }, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--invalid", type=float, default=0.01, help="fraction of rows with a bad email")
+    parser.add_argument("--export-format", choices=("csv", "jsonl"), default="csv")
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,121 @@
+"""Cold import and startup profile, from ``python -X importtime``.
+
+For each module in ``--modules`` a fresh interpreter imports it ``--runs``
+times; reported are the median import time, the median wall time of the
+whole process and the packages with the most self time (from the
+``-X importtime`` trace of the median run). ``app.models`` is what
+``alembic/env.py`` imports. With ``--bare`` the imports run with an empty
+environment, which checks that importing needs no settings at all.
+
+``startup`` times ``lifespan`` start until ``/health/ready`` would answer
+200, against a throwaway SQLite database.
+
+    python -m benchmarks.bench_import_time --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from benchmarks.common import BENCH_ENV, emit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_SCRIPT = """
+import asyncio, time
+start = time.perf_counter()
+from benchmarks.common import create_schema
+from app.main import app
+from app.startup import readiness
+imported = time.perf_counter()
+async def main():
+    await create_schema()
+    began = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        await readiness.wait()
+        print(imported - start, time.perf_counter() - began)
+asyncio.run(main())
+"""
+
+
+def environment(bare: bool) -> dict:
+    env = {"PATH": os.environ.get("PATH", ""), "PYTHONPATH": ROOT}
+    if not bare:
+        env.update({**os.environ, **BENCH_ENV, "LOG_FILE": "", "LOG_LEVEL": "WARNING"})
+    return env
+
+
+def parse_importtime(stderr: str):
+    """(module, self_us, cumulative_us) for every line of an importtime trace."""
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        yield name.strip(), int(own), int(cumulative)
+
+
+def profile(module: str, runs: int, bare: bool) -> dict:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT, env=environment(bare), capture_output=True, text=True,
+        )
+        wall = time.perf_counter() - start
+        if proc.returncode != 0:
+            return {"error": proc.stderr.strip().splitlines()[-1]}
+        entries = list(parse_importtime(proc.stderr))
+        total = next(cumulative for name, _, cumulative in reversed(entries) if name == module)
+        samples.append((total, wall, entries))
+    samples.sort(key=lambda sample: sample[0])
+    total, _, entries = samples[len(samples) // 2]
+    by_package = defaultdict(int)
+    for name, own, _ in entries:
+        by_package[name.split(".")[0]] += own
+    top = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:10]
+    return {
+        "import_ms": total / 1000,
+        "process_ms": statistics.median(wall for _, wall, _ in samples) * 1000,
+        "modules": len(entries),
+        "self_ms_by_package": {name: own / 1000 for name, own in top},
+    }
+
+
+def startup(runs: int) -> dict:
+    imports, warmups = [], []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT], cwd=ROOT, env=environment(False),
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            return {"error": proc.stderr.strip().splitlines()[-1]}
+        imported, ready = map(float, proc.stdout.split())
+        imports.append(imported)
+        warmups.append(ready)
+    if os.path.exists(os.path.join(ROOT, "benchmark.db")):
+        os.remove(os.path.join(ROOT, "benchmark.db"))
+    return {
+        "import_app_ms": statistics.median(imports) * 1000,
+        "lifespan_to_ready_ms": statistics.median(warmups) * 1000,
+    }
+
+
+def main(args) -> None:
+    results = {module: profile(module, args.runs, args.bare) for module in args.modules}
+    results["startup"] = startup(args.runs)
+    results["config"] = vars(args)
+    emit("import_time", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modules", nargs="+", default=["app.main", "app.models"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--bare", action="store_true", help="import with an empty environment")
+    parser.add_argument("--output")
+    main(parser.parse_args())
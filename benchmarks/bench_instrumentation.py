@@ -0,0 +1,67 @@
+"""Overhead of the request metrics middleware and ``span`` timers.
+
+Measures a bare ASGI endpoint with and without RequestMetricsMiddleware
+(and with every response sampled for the Server-Timing breakdown), plus
+the raw cost of one ``with span(...)`` block.
+
+    python -m benchmarks.bench_instrumentation --requests 5000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import emit, setup_env, summarize
+
+setup_env()
+
+import httpx  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.responses import PlainTextResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+from app.utils.instrumentation import RequestMetricsMiddleware, span  # noqa: E402
+
+
+async def endpoint(request):
+    with span("db"):
+        pass
+    with span("password_verify"):
+        pass
+    return PlainTextResponse("ok")
+
+
+async def drive(app, requests: int) -> dict:
+    durations = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(requests):
+            start = time.perf_counter()
+            await client.get("/")
+            durations.append(time.perf_counter() - start)
+    return summarize(durations)
+
+
+def span_cost(iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with span("bench"):
+            pass
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+async def main(args) -> None:
+    bare = Starlette(routes=[Route("/", endpoint)])
+    results = {
+        "bare": await drive(bare, args.requests),
+        "middleware": await drive(RequestMetricsMiddleware(bare, sample_rate=0), args.requests),
+        "middleware_with_breakdown": await drive(RequestMetricsMiddleware(bare, sample_rate=1), args.requests),
+        "span_ns": span_cost(args.span_iterations),
+        "config": vars(args),
+    }
+    emit("instrumentation", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--span-iterations", type=int, default=1_000_000)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
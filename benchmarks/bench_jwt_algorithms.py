@@ -0,0 +1,86 @@
+"""Access-token signing and verification throughput per algorithm.
+
+Signs and verifies ``--iterations`` tokens through ``app.auth.keyring``
+for HS256 (the ``JWT_SECRET`` fallback), ES256 and RS256 with keys
+generated into a temporary directory, the way ``app.cli.keys`` writes
+them. python-jose has no EdDSA, so Ed25519 is measured with authlib's
+JOSE implementation for comparison only. The verified-token cache is not
+involved; this is the cost of every first sight of a token.
+
+    python -m benchmarks.bench_jwt_algorithms --iterations 5000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from benchmarks.common import emit, setup_env
+
+setup_env(LOG_FILE="", LOG_LEVEL="WARNING")
+
+from app.auth.keyring import KeyRing  # noqa: E402
+
+CLAIMS = {"sub": "user@example.com", "role": "customer", "jti": "0" * 32, "exp": 4102444800}
+
+
+def measure(sign, verify, iterations: int) -> dict:
+    start = time.perf_counter()
+    tokens = [sign({**CLAIMS, "n": i}) for i in range(iterations)]
+    signed = time.perf_counter() - start
+    start = time.perf_counter()
+    for token in tokens:
+        verify(token)
+    verified = time.perf_counter() - start
+    return {
+        "sign_per_second": iterations / signed,
+        "verify_per_second": iterations / verified,
+        "sign_us": signed / iterations * 1e6,
+        "verify_us": verified / iterations * 1e6,
+        "token_bytes": len(tokens[0]),
+    }
+
+
+def write_key(keys_dir: Path, kid: str, key) -> None:
+    (keys_dir / f"{kid}.pem").write_bytes(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ))
+
+
+def keyring_for(key) -> KeyRing:
+    keys_dir = Path(tempfile.mkdtemp())
+    write_key(keys_dir, "bench", key)
+    return KeyRing(str(keys_dir), "bench", "benchmark-secret").load()
+
+
+def eddsa(iterations: int) -> dict:
+    from authlib.jose import JsonWebToken, OKPKey
+
+    key = OKPKey.import_key(ed25519.Ed25519PrivateKey.generate().private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ))
+    jwt = JsonWebToken(["EdDSA"])
+    header = {"alg": "EdDSA", "kid": "bench"}
+    return measure(lambda claims: jwt.encode(header, claims, key).decode(),
+                   lambda token: jwt.decode(token, key), iterations)
+
+
+def main(args) -> None:
+    rings = {
+        "HS256": KeyRing(None, None, "benchmark-secret").load(),
+        "ES256": keyring_for(ec.generate_private_key(ec.SECP256R1())),
+        "RS256": keyring_for(rsa.generate_private_key(public_exponent=65537, key_size=args.rsa_bits)),
+    }
+    results = {name: measure(ring.sign, ring.decode, args.iterations) for name, ring in rings.items()}
+    results["EdDSA (authlib)"] = eddsa(args.iterations)
+    emit("jwt_algorithms", {**results, "config": vars(args)}, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--rsa-bits", type=int, default=2048)
+    parser.add_argument("--output")
+    main(parser.parse_args())
@@ -0,0 +1,97 @@
+"""Request latency with the old synchronous logging setup vs. the queue-based pipeline.
+
+Each request to a tiny ASGI app emits ``--records`` log lines (a mix of
+DEBUG and INFO, like the auth flow with SQL echo on). "sync" reproduces the
+old basicConfig(DEBUG) with a FileHandler and StreamHandler; "queue" is
+app.logging_config.configure_logging(). Console output goes to /dev/null so
+terminal speed does not skew the numbers.
+
+    python -m benchmarks.bench_logging --requests 2000 --records 20
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.common import emit, setup_env, summarize
+
+setup_env()
+
+import httpx  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.responses import PlainTextResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+from app import logging_config  # noqa: E402
+
+bench_logger = logging.getLogger("app.bench")
+
+
+def build_app(records: int) -> Starlette:
+    async def endpoint(request):
+        for i in range(records):
+            if i % 2:
+                bench_logger.debug("SELECT users.id, users.email FROM users WHERE users.email = %s", "user@example.com")
+            else:
+                bench_logger.info("Handled step %d for %s", i, request.url.path)
+        return PlainTextResponse("ok")
+
+    return Starlette(routes=[Route("/", endpoint)])
+
+
+def configure_sync(log_file: str, devnull) -> None:
+    logging_config.shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    formatter = logging.Formatter(logging_config.TEXT_FORMAT)
+    for handler in (logging.FileHandler(log_file), logging.StreamHandler(devnull)):
+        handler.setFormatter(formatter)
+        root.addHandler(handler)
+    root.setLevel(logging.DEBUG)
+
+
+def configure_queue(log_file: str, devnull) -> None:
+    handlers = logging_config.build_output_handlers(log_file=log_file)
+    handlers[0].setStream(devnull)
+    logging_config.configure_logging(handlers)
+    logging.getLogger().setLevel(logging.DEBUG)
+
+
+async def drive(app: Starlette, requests: int, concurrency: int) -> dict:
+    durations = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                await client.get("/")
+                durations.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+    return {"requests_per_second": requests / elapsed, "latency": summarize(durations)}
+
+
+async def main(args) -> None:
+    app = build_app(args.records)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        for name, configure in (("sync", configure_sync), ("queue", configure_queue)):
+            configure(os.path.join(tmp, f"{name}.log"), devnull)
+            results[name] = await drive(app, args.requests, args.concurrency)
+            logging_config.shutdown_logging()
+    results["config"] = vars(args)
+    emit("logging", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--records", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,100 @@
+"""Mail throughput: one SMTP connection per message vs. the pooled outbox dispatcher.
+
+The fake SMTP server adds ``--connect-latency`` to every new connection to
+stand in for the TCP/STARTTLS/AUTH handshake of a real relay.
+
+    python -m benchmarks.bench_mail_dispatch --messages 500 --pool-size 4
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import create_schema, emit, setup_env
+
+setup_env()
+
+import aiosmtplib  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from app.models.outbox_model import EmailOutbox, OutboxStatus  # noqa: E402
+from app.utils.mail_dispatcher import MailDispatcher, SMTPConnectionPool, _utcnow  # noqa: E402
+from benchmarks.fake_smtp import FakeSMTPServer  # noqa: E402
+
+
+def make_message(i: int) -> dict:
+    return {
+        "recipient": f"user{i}@example.com",
+        "subject": "Verify your email",
+        "body": f"Please verify your email by clicking on the following link: http://localhost/verify-email?token={i}",
+    }
+
+
+async def connection_per_message(server: FakeSMTPServer, messages: int, concurrency: int) -> dict:
+    from email.message import EmailMessage
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(i: int):
+        data = make_message(i)
+        message = EmailMessage()
+        message["From"] = "bench@example.com"
+        message["To"] = data["recipient"]
+        message["Subject"] = data["subject"]
+        message.set_content(data["body"])
+        async with semaphore:
+            await aiosmtplib.send(message, hostname=server.host, port=server.port, start_tls=False)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(i) for i in range(messages)))
+    elapsed = time.perf_counter() - start
+    return {"messages_per_second": messages / elapsed, "connections": server.connections}
+
+
+async def pooled_dispatcher(server: FakeSMTPServer, messages: int, pool_size: int, batch_size: int) -> dict:
+    async with SessionLocal() as db:
+        now = _utcnow()
+        db.add_all([
+            EmailOutbox(**make_message(i), status=OutboxStatus.pending, attempts=0, next_attempt_at=now)
+            for i in range(messages)
+        ])
+        await db.commit()
+
+    pool = SMTPConnectionPool(pool_size, server.host, server.port, start_tls=False)
+    dispatcher = MailDispatcher(SessionLocal, pool, batch_size=batch_size)
+    connections_before = server.connections
+    start = time.perf_counter()
+    while await dispatcher.dispatch_once():
+        pass
+    elapsed = time.perf_counter() - start
+    await pool.close()
+
+    async with SessionLocal() as db:
+        sent = await db.scalar(
+            select(func.count()).select_from(EmailOutbox).where(EmailOutbox.status == OutboxStatus.sent)
+        )
+    return {
+        "messages_per_second": messages / elapsed,
+        "connections": server.connections - connections_before,
+        "sent": sent,
+    }
+
+
+async def main(args) -> None:
+    await create_schema()
+    results = {}
+    async with FakeSMTPServer(latency=args.message_latency, connect_latency=args.connect_latency) as server:
+        results["connection_per_message"] = await connection_per_message(server, args.messages, args.pool_size)
+    async with FakeSMTPServer(latency=args.message_latency, connect_latency=args.connect_latency) as server:
+        results["pooled_dispatcher"] = await pooled_dispatcher(server, args.messages, args.pool_size, args.batch_size)
+    results["config"] = vars(args)
+    emit("mail_dispatch", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--connect-latency", type=float, default=0.05)
+    parser.add_argument("--message-latency", type=float, default=0.002)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,128 @@
+"""Match query latency against a synthetic Ontario caregiver population.
+
+Builds the in-memory matching index for ``--caregivers`` caregivers
+clustered around Ontario cities (each with a few weekly availability
+slots), then runs ``--queries`` random match requests through
+``MatchingEngine.match`` and, as a baseline, through a brute-force pass
+that computes the distance to every caregiver with numpy before checking
+availability. No database is involved.
+
+    python -m benchmarks.bench_matching --caregivers 100000 --queries 2000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from benchmarks.common import emit, setup_env, summarize
+
+setup_env(LOG_FILE="", LOG_LEVEL="WARNING")
+
+import numpy as np  # noqa: E402
+from app.services.matching_engine import CaregiverEntry, MatchingEngine, haversine_km  # noqa: E402
+
+# (latitude, longitude, share of caregivers)
+CITIES = [
+    (43.6532, -79.3832, 0.45),  # Toronto
+    (45.4215, -75.6972, 0.12),  # Ottawa
+    (43.2557, -79.8711, 0.08),  # Hamilton
+    (42.9849, -81.2453, 0.06),  # London
+    (43.4516, -80.4925, 0.06),  # Kitchener-Waterloo
+    (42.3149, -83.0364, 0.04),  # Windsor
+    (44.2312, -76.4860, 0.03),  # Kingston
+    (46.4917, -80.9930, 0.03),  # Sudbury
+    (48.3809, -89.2477, 0.02),  # Thunder Bay
+]
+DAY = 24 * 60
+
+
+def random_location(rng: random.Random):
+    lat, lon, _ = rng.choices(CITIES, weights=[share for _, _, share in CITIES])[0]
+    return lat + rng.gauss(0, 0.15), lon + rng.gauss(0, 0.2)
+
+
+def random_slots(rng: random.Random):
+    slots = []
+    for day in rng.sample(range(7), rng.randint(2, 6)):
+        start = rng.choice(range(6 * 60, 16 * 60, 30))
+        slots.append((day * DAY + start, day * DAY + min(start + rng.choice((240, 360, 480)), DAY)))
+    return slots
+
+
+def caregivers(count: int, rng: random.Random):
+    for user_id in range(1, count + 1):
+        lat, lon = random_location(rng)
+        yield CaregiverEntry(
+            user_id=user_id, full_name=f"Caregiver {user_id}", latitude=lat, longitude=lon,
+            service_radius_km=rng.choice((10, 15, 25, 40)), rating=round(rng.uniform(3, 5), 1),
+            hourly_rate=rng.uniform(20, 45), years_experience=rng.randint(0, 25), slots=random_slots(rng),
+        )
+
+
+def brute_force(entries, columns, lat, lon, start, end, max_km, limit):
+    distance = haversine_km(lat, lon, columns["lat"], columns["lon"])
+    near = np.nonzero(distance <= np.minimum(max_km, columns["radius"]))[0]
+    available = [i for i in near if any(s <= start and end <= e for s, e in entries[i].slots)]
+    return sorted(available, key=lambda i: distance[i])[:limit]
+
+
+def main(args) -> None:
+    rng = random.Random(args.seed)
+    entries = list(caregivers(args.caregivers, rng))
+
+    start = time.perf_counter()
+    engine = MatchingEngine(cell_km=args.cell_km)
+    engine.rebuild(entries, len(entries))
+    build_seconds = time.perf_counter() - start
+
+    # Second build under tracemalloc (which slows it down) for the footprint
+    tracemalloc.start()
+    MatchingEngine(cell_km=args.cell_km).rebuild(entries, len(entries))
+    index_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    columns = {
+        "lat": np.array([e.latitude for e in entries]),
+        "lon": np.array([e.longitude for e in entries]),
+        "radius": np.array([e.service_radius_km for e in entries], dtype=float),
+    }
+    queries = []
+    for _ in range(args.queries):
+        lat, lon = random_location(rng)
+        day, hour = rng.randrange(7), rng.randrange(8, 18)
+        queries.append((lat, lon, day * DAY + hour * 60, day * DAY + (hour + 2) * 60))
+
+    indexed, found = [], []
+    for lat, lon, s, e in queries:
+        t = time.perf_counter()
+        found.append(len(engine.match(lat, lon, s, e, max_distance_km=args.max_distance, limit=args.limit)))
+        indexed.append(time.perf_counter() - t)
+
+    baseline = []
+    for lat, lon, s, e in queries[:args.baseline_queries]:
+        t = time.perf_counter()
+        brute_force(entries, columns, lat, lon, s, e, args.max_distance, args.limit)
+        baseline.append(time.perf_counter() - t)
+
+    emit("matching", {
+        "build_seconds": build_seconds,
+        "index_memory_mb": index_bytes / 2**20,
+        "indexed": summarize(indexed),
+        "brute_force": summarize(baseline),
+        "mean_results": sum(found) / len(found),
+        "queries_per_second": len(indexed) / sum(indexed),
+        "config": vars(args),
+    }, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--caregivers", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--baseline-queries", type=int, default=200)
+    parser.add_argument("--max-distance", type=float, default=25.0)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--cell-km", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    main(parser.parse_args())
@@ -0,0 +1,126 @@
+"""Latency of the Google OAuth callback against a local fake provider.
+
+Drives the real app in-process: ``/auth/google`` for the redirect and
+session state, the fake provider's authorize endpoint to get a code, then
+times ``/auth/google/callback`` (token exchange, ID token check, user
+lookup/creation, access token). It runs once with the shared keep-alive
+transport ("pooled") and once with authlib's default client-per-call
+("unpooled"), and separately times local ID-token verification against a
+userinfo round trip. ``--connect-latency`` stands in for the TCP+TLS
+handshake to the real provider.
+
+    python -m benchmarks.bench_oauth_callback --logins 200 --latency 0.02 --connect-latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+from benchmarks.common import create_schema, emit, setup_env, summarize
+
+setup_env(LOG_FILE="", LOG_LEVEL="WARNING", RATE_LIMIT_ENABLED="false")
+
+import httpx  # noqa: E402
+from benchmarks.fake_oauth import FakeOAuthProvider  # noqa: E402
+
+
+async def login(transport, provider_client: httpx.AsyncClient, email: str) -> float:
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get("/auth/google")
+        authorize_url = response.headers["location"]
+        response = await provider_client.get(authorize_url, params={"login_hint": email})
+        callback_url = response.headers["location"]
+        start = time.perf_counter()
+        response = await client.get(callback_url)
+        elapsed = time.perf_counter() - start
+        response.raise_for_status()
+        return elapsed
+
+
+async def run_mode(app, provider, logins: int, concurrency: int, run_id: str) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    durations = []
+    requests_before = dict(provider.requests)
+    connections_before = provider.connections
+
+    async with httpx.AsyncClient() as provider_client:
+        async def one(i: int):
+            async with semaphore:
+                durations.append(await login(transport, provider_client, f"oauth-{run_id}-{i}@example.com"))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(logins)))
+        elapsed = time.perf_counter() - start
+    return {
+        "logins_per_second": logins / elapsed,
+        "callback_latency": summarize(durations),
+        # authorize hits come from the benchmark client, not the app
+        "provider_requests": {
+            name: count - requests_before.get(name, 0)
+            for name, count in provider.requests.items() if name != "authorize"
+        },
+        "provider_connections": provider.connections - connections_before,
+    }
+
+
+async def id_token_vs_userinfo(provider, iterations: int) -> dict:
+    from app.auth.oauth import google_metadata, oauth
+
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"{provider.issuer}/authorize", params={
+            "login_hint": "verify@example.com", "redirect_uri": "http://bench/cb",
+        })
+        code = httpx.URL(response.headers["location"]).params["code"]
+        token = (await client.post(f"{provider.issuer}/token", data={"code": code})).json()
+
+        local = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await google_metadata.verify_id_token(token["id_token"], oauth.google.client_id)
+            local.append(time.perf_counter() - start)
+        remote = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await client.get(f"{provider.issuer}/userinfo",
+                             headers={"Authorization": f"Bearer {token['access_token']}"})
+            remote.append(time.perf_counter() - start)
+    return {"local_id_token": summarize(local), "userinfo_request": summarize(remote)}
+
+
+async def main(args) -> None:
+    provider = await FakeOAuthProvider(
+        os.environ["GOOGLE_CLIENT_ID"], latency=args.latency, connect_latency=args.connect_latency
+    ).start()
+    os.environ["GOOGLE_DISCOVERY_URL"] = provider.discovery_url
+
+    from app.main import app
+    from app.auth.oauth import oauth
+
+    await create_schema()
+    results = {}
+    async with app.router.lifespan_context(app):
+        client_kwargs = oauth.google.client_kwargs
+        run_id = uuid.uuid4().hex[:8]
+        results["pooled"] = await run_mode(app, provider, args.logins, args.concurrency, run_id + "p")
+        shared_transport = client_kwargs.pop("transport")
+        try:
+            results["unpooled"] = await run_mode(app, provider, args.logins, args.concurrency, run_id + "u")
+        finally:
+            client_kwargs["transport"] = shared_transport
+        results["verification"] = await id_token_vs_userinfo(provider, args.iterations)
+    await provider.stop()
+    results["config"] = vars(args)
+    emit("oauth_callback", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0, help="provider latency per request (s)")
+    parser.add_argument("--connect-latency", type=float, default=0.0, help="extra latency per new connection (s)")
+    parser.add_argument("--iterations", type=int, default=200, help="samples for the verification comparison")
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,77 @@
+"""Event-loop latency under concurrent logins, inline argon2 vs. the worker pool.
+
+A probe task sleeps for 1ms in a loop and records how late it wakes up; that
+lateness is what every other request on the worker experiences while logins
+are being verified.
+
+    python -m benchmarks.bench_password_hashing --logins 200 --concurrency 32
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import emit, setup_env, summarize
+
+setup_env()
+
+from app.utils.auth_utils import get_password_hash, verify_password  # noqa: E402
+from app.utils.password_hashing import PasswordHasher  # noqa: E402
+
+PROBE_INTERVAL = 0.001
+
+
+async def probe(lags: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - start - PROBE_INTERVAL))
+
+
+async def run(mode: str, hashed: str, logins: int, concurrency: int, hasher: PasswordHasher) -> dict:
+    lags, durations = [], []
+    stop = asyncio.Event()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            start = time.perf_counter()
+            if mode == "inline":
+                verify_password("benchmark-password", hashed)
+            else:
+                await hasher.verify("benchmark-password", hashed)
+            durations.append(time.perf_counter() - start)
+
+    probe_task = asyncio.create_task(probe(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+    return {
+        "logins_per_second": logins / elapsed,
+        "login_latency": summarize(durations),
+        "event_loop_lag": summarize(lags),
+    }
+
+
+async def main(args) -> None:
+    hashed = get_password_hash("benchmark-password")
+    hasher = PasswordHasher(args.executor, args.workers, args.logins)
+    results = {}
+    try:
+        for mode in ("inline", "pool"):
+            results[mode] = await run(mode, hashed, args.logins, args.concurrency, hasher)
+    finally:
+        hasher.shutdown()
+    results["config"] = vars(args)
+    emit("password_hashing", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,153 @@
+"""Throughput of the prefork server (``app.cli.serve``) from 1 to N workers.
+
+For each worker count, starts ``python -m app.cli.serve --workers k`` on a
+free port and drives ``--path`` from ``--clients`` load-generating
+processes (``--connections`` concurrent keep-alive connections each) for
+``--duration`` seconds. Reports requests per second, latency, and the
+scaling efficiency relative to one worker (1.0 is linear).
+
+It also checks that metrics are shared: the request count ``/metrics``
+reports for the route (all workers combined) must grow by exactly the
+number of requests sent, whichever worker answers the scrape.
+
+The load generators run on the same machine, so leave them cores of
+their own: e.g. on 8 CPUs, ``--workers 1,2,4 --clients 4``. On fewer
+cores than ``workers + clients`` the numbers show contention, not scaling.
+
+    python -m benchmarks.bench_prefork_scaling --workers 1,2,4 --clients 4 --duration 10
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+
+from benchmarks.common import create_schema, emit, setup_env, summarize
+
+setup_env(LOG_FILE="", LOG_LEVEL="WARNING", RATE_LIMIT_ENABLED="false")
+
+import httpx  # noqa: E402
+from app.utils.resources import cpu_limit  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.cli.serve", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers)],
+        env=os.environ.copy(),
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health/ready", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"server with {workers} workers did not become ready")
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.terminate()
+    try:
+        server.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+def route_count(base_url: str, path: str) -> float:
+    text = httpx.get(f"{base_url}/metrics", timeout=10).text
+    pattern = re.compile(r'^http_request_duration_seconds_count\{[^}]*route="' + re.escape(path) + r'"[^}]*\} (\S+)$',
+                         re.MULTILINE)
+    return sum(float(value) for value in pattern.findall(text))
+
+
+async def _load(base_url: str, path: str, connections: int, duration: float) -> tuple:
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def connection():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(connection() for _ in range(connections)))
+    return latencies, errors
+
+
+def load_process(args: tuple) -> tuple:
+    return asyncio.run(_load(*args))
+
+
+def measure(workers: int, args) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(workers, port)
+    try:
+        with multiprocessing.Pool(args.clients) as pool:
+            # Warm every worker's connections and code paths first
+            pool.map(load_process, [(base_url, args.path, args.connections, 1.0)] * args.clients)
+            before = route_count(base_url, args.path)
+            start = time.perf_counter()
+            results = pool.map(load_process, [(base_url, args.path, args.connections, args.duration)] * args.clients)
+            elapsed = time.perf_counter() - start
+        counted = route_count(base_url, args.path) - before
+    finally:
+        stop_server(server)
+    latencies = [latency for samples, _ in results for latency in samples]
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "requests_per_second": len(latencies) / elapsed,
+        "latency": summarize(latencies),
+        "metrics_counted": counted,
+        "metrics_match": counted == len(latencies),
+    }
+
+
+def main(args) -> None:
+    asyncio.run(create_schema())
+    worker_counts = [int(count) for count in args.workers.split(",")]
+    results = {"cpu_limit": cpu_limit(), "workers": {}}
+    for workers in worker_counts:
+        results["workers"][workers] = measure(workers, args)
+        print(f"{workers} workers: {results['workers'][workers]['requests_per_second']:.0f} req/s", file=sys.stderr)
+    baseline = results["workers"][worker_counts[0]]["requests_per_second"] / worker_counts[0]
+    for workers, result in results["workers"].items():
+        result["speedup"] = result["requests_per_second"] / (baseline * worker_counts[0])
+        result["efficiency"] = result["requests_per_second"] / (baseline * workers)
+    results["config"] = vars(args)
+    emit("prefork_scaling", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", default=",".join(str(2 ** i) for i in range(8) if 2 ** i <= cpu_limit()),
+                        help="comma-separated worker counts (default: powers of two up to the CPU limit)")
+    parser.add_argument("--clients", type=int, default=2, help="load-generating processes")
+    parser.add_argument("--connections", type=int, default=16, help="concurrent connections per client")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--path", default="/health/live")
+    parser.add_argument("--output")
+    main(parser.parse_args())
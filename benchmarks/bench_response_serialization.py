@@ -0,0 +1,75 @@
+"""Per-request response serialization cost on the hot auth endpoints.
+
+"generic" is what FastAPI does for a route with a ``response_model``:
+validate the returned object against the model, dump it and render it
+with the standard ``JSONResponse``. "trusted" is the path the auth
+routes now take: ``serialize_user`` (or ``model_dump`` for ``Token``)
+rendered by ``ORJSONResponse``, with no revalidation. Uses the routes'
+own response fields and an unsaved ``User`` row; no database.
+
+    python -m benchmarks.bench_response_serialization --iterations 50000
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from benchmarks.common import emit, setup_env
+
+setup_env(LOG_FILE="", LOG_LEVEL="WARNING")
+
+from app.auth.router import router  # noqa: E402
+from app.models.user_model import AuthProvider, User, UserRole  # noqa: E402
+from app.schemas.token_schemas import Token  # noqa: E402
+from app.schemas.user_schemas import serialize_user  # noqa: E402
+from app.utils.responses import trusted_response  # noqa: E402
+
+
+def response_field(path: str):
+    return next(route.response_field for route in router.routes if route.path == path)
+
+
+async def time_async(render, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await render()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def time_sync(render, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def compare(field, content, trusted, iterations: int) -> dict:
+    async def generic():
+        return JSONResponse(await serialize_response(field=field, response_content=content)).body
+
+    assert (await generic()).replace(b" ", b"") == trusted().body.replace(b" ", b"")
+    generic_us = await time_async(generic, iterations)
+    trusted_us = time_sync(lambda: trusted().body, iterations)
+    return {"generic_us": generic_us, "trusted_us": trusted_us, "speedup": generic_us / trusted_us}
+
+
+async def main(args) -> None:
+    user = User(id=42, email="user@example.com", full_name="Example User", role=UserRole.customer,
+                is_active=True, is_verified=True, is_approved=False, auth_provider=AuthProvider.email)
+    token = Token(access_token="a" * 220, token_type="bearer", refresh_token="r" * 43, expires_in=900)
+    emit("response_serialization", {
+        "user_response": await compare(response_field("/auth/me"), user,
+                                       lambda: trusted_response(serialize_user(user)), args.iterations),
+        "token": await compare(response_field("/auth/login"), token,
+                               lambda: trusted_response(token), args.iterations),
+        "config": vars(args),
+    }, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50000)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,78 @@
+"""Memory and check latency of the access-token revocation index.
+
+Fills a ``RevocationIndex`` with ``--revoked`` random jtis (merged into
+the sorted fingerprint array the way syncs do) and times ``is_revoked``
+for revoked and for valid tokens. For comparison it reports the same
+jtis in a plain Python ``set`` of strings and the theoretical size of a
+Bloom filter at ``--bloom-error``. No database is involved.
+
+    python -m benchmarks.bench_revocation --revoked 1000000
+"""
+import argparse
+import math
+import secrets
+import time
+import tracemalloc
+
+from benchmarks.common import emit, setup_env
+
+setup_env(LOG_FILE="", LOG_LEVEL="WARNING")
+
+from app.auth.revocation import RevocationIndex  # noqa: E402
+
+
+def time_checks(check, jtis) -> float:
+    start = time.perf_counter()
+    for jti in jtis:
+        check(jti)
+    return (time.perf_counter() - start) / len(jtis) * 1e9
+
+
+def main(args) -> None:
+    revoked = [secrets.token_hex(16) for _ in range(args.revoked)]
+    valid = [secrets.token_hex(16) for _ in range(args.checks)]
+
+    index = RevocationIndex(session_factory=None, interval=0, reload_interval=0)
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(0, len(revoked), args.sync_batch):
+        index.add(revoked[i:i + args.sync_batch])
+    build_seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    as_set = set(revoked)
+    set_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sample = revoked[:args.checks]
+    assert all(index.is_revoked(jti) for jti in sample)
+    false_positives = sum(index.is_revoked(jti) for jti in valid)
+    bloom_bits = -args.revoked * math.log(args.bloom_error) / math.log(2) ** 2
+    per_million = 1e6 / args.revoked / 2**20
+
+    emit("revocation", {
+        "entries": len(index),
+        "index_mb": index.nbytes / 2**20,
+        "index_mb_per_million": index.nbytes * per_million,
+        "index_peak_mb_per_million": peak * per_million,
+        "build_seconds": build_seconds,
+        "check_revoked_ns": time_checks(index.is_revoked, sample),
+        "check_valid_ns": time_checks(index.is_revoked, valid),
+        "false_positives": false_positives,
+        "python_set_mb_per_million": set_bytes * per_million,
+        "python_set_check_ns": time_checks(as_set.__contains__, valid),
+        "bloom_mb_per_million": bloom_bits / 8 * per_million,
+        "config": vars(args),
+    }, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--revoked", type=int, default=1000000)
+    parser.add_argument("--checks", type=int, default=100000)
+    parser.add_argument("--sync-batch", type=int, default=1000, help="jtis added per simulated sync")
+    parser.add_argument("--bloom-error", type=float, default=0.001)
+    parser.add_argument("--output")
+    main(parser.parse_args())
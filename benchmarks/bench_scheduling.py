@@ -0,0 +1,141 @@
+"""Scheduling throughput and incremental re-solve cost.
+
+Builds the matching index for ``--caregivers`` synthetic caregivers (same
+population as ``bench_matching``), generates ``--plans`` recurring care
+plans over ``--weeks`` weeks and staffs every visit with one full
+``Scheduler.solve``, reported as visits per second. It then times the two
+incremental paths the service uses against re-solving everything:
+
+* ``move``: one visit moves two hours later; only the visits overlapping
+  its old and new time are re-solved, around everyone else's commitments.
+* ``availability``: one busy caregiver's availability shrinks; only their
+  own visits are re-solved.
+
+Selecting the affected visits and commitments is the database's job in
+the service, so it happens outside the timed region here. No database is
+involved.
+
+    python -m benchmarks.bench_scheduling --caregivers 20000 --plans 5000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.bench_matching import caregivers, random_location
+from benchmarks.common import emit, setup_env, summarize
+
+setup_env(LOG_FILE="", LOG_LEVEL="WARNING")
+
+from app.services.matching_engine import MatchingEngine  # noqa: E402
+from app.services.scheduling_engine import SCHEDULE_TIMEZONE, ScheduledVisit, Scheduler  # noqa: E402
+
+
+def generate_visits(plans: int, weeks: int, rng: random.Random):
+    monday = datetime(2030, 1, 7, tzinfo=SCHEDULE_TIMEZONE)
+    visits = []
+    for plan_id in range(1, plans + 1):
+        lat, lon = random_location(rng)
+        slots = [
+            (day, rng.choice(range(8 * 60, 17 * 60, 30)), rng.choice((60, 120, 180, 240)))
+            for day in rng.sample(range(7), rng.randint(1, 3))
+        ]
+        for week in range(weeks):
+            for day, minute, duration in slots:
+                start = (monday + timedelta(days=week * 7 + day, minutes=minute)).astimezone(timezone.utc)
+                visits.append(ScheduledVisit(len(visits) + 1, plan_id, start, start + timedelta(minutes=duration),
+                                             lat, lon))
+    return visits
+
+
+def copy_visits(visits, keep_assignment: bool = True):
+    return [
+        ScheduledVisit(visit.id, visit.care_plan_id, visit.start, visit.end, visit.latitude, visit.longitude,
+                       visit.caregiver_id if keep_assignment else None, visit.preferred_caregiver_id)
+        for visit in visits
+    ]
+
+
+def commitments_excluding(visits, excluded):
+    return [(v.caregiver_id, *v.span, v.id) for v in visits if v.caregiver_id is not None and v.id not in excluded]
+
+
+def timed_solve(scheduler, visits, commitments=()):
+    start = time.perf_counter()
+    stats = scheduler.solve(visits, commitments)
+    return time.perf_counter() - start, stats
+
+
+def main(args) -> None:
+    rng = random.Random(args.seed)
+    entries = list(caregivers(args.caregivers, rng))
+    engine = MatchingEngine()
+    engine.rebuild(entries, len(entries))
+    scheduler = Scheduler(engine)
+
+    visits = generate_visits(args.plans, args.weeks, rng)
+    full_seconds, full_stats = timed_solve(scheduler, visits)
+    # Later visits of a plan prefer whoever took its first one, as in the service.
+    for visit in visits:
+        visit.preferred_caregiver_id = visit.caregiver_id
+    assigned = [visit for visit in visits if visit.caregiver_id is not None]
+    buffer = scheduler.buffer
+
+    move_times, move_sizes = [], []
+    for visit in rng.sample(assigned, args.changes):
+        moved = copy_visits([visit])[0]
+        old_start, old_end = moved.span
+        moved.start += timedelta(hours=2)
+        moved.end += timedelta(hours=2)
+        moved.caregiver_id = None
+        low, high = old_start, moved.span[1]
+        window = [moved] + copy_visits(v for v in visits if v.id != visit.id and v.span[0] < high and v.span[1] > low)
+        ids = {v.id for v in window}
+        commitments = [
+            c for c in commitments_excluding(visits, ids) if c[1] < high + buffer and c[2] > low - buffer
+        ]
+        seconds, _ = timed_solve(scheduler, window, commitments)
+        move_times.append(seconds)
+        move_sizes.append(len(window))
+
+    availability_times, availability_sizes = [], []
+    by_caregiver = {}
+    for visit in assigned:
+        by_caregiver.setdefault(visit.caregiver_id, []).append(visit)
+    busiest = sorted(by_caregiver, key=lambda c: len(by_caregiver[c]), reverse=True)[:args.changes]
+    entry_by_id = {entry.user_id: entry for entry in entries}
+    for caregiver_id in busiest:
+        entry = entry_by_id[caregiver_id]
+        engine.upsert(entry._replace(slots=entry.slots[:1]))
+        window = copy_visits(by_caregiver[caregiver_id])
+        ids = {v.id for v in window}
+        seconds, _ = timed_solve(scheduler, window, commitments_excluding(visits, ids))
+        availability_times.append(seconds)
+        availability_sizes.append(len(window))
+        engine.upsert(entry)
+
+    # What a change would cost without windowing: re-staff every visit.
+    full_resolve_seconds, _ = timed_solve(scheduler, copy_visits(visits, keep_assignment=False))
+
+    emit("scheduling", {
+        "visits": len(visits),
+        "full_solve_seconds": full_seconds,
+        "visits_per_second": len(visits) / full_seconds,
+        "full_solve": full_stats,
+        "full_resolve_seconds": full_resolve_seconds,
+        "move": {**summarize(move_times), "mean_visits": sum(move_sizes) / len(move_sizes)},
+        "availability": {**summarize(availability_times),
+                         "mean_visits": sum(availability_sizes) / len(availability_sizes)},
+        "config": vars(args),
+    }, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--caregivers", type=int, default=20000)
+    parser.add_argument("--plans", type=int, default=5000)
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--changes", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    main(parser.parse_args())
@@ -0,0 +1,150 @@
+"""Session cookie size and per-request cost of the session middleware.
+
+Runs ``/auth/google`` on the real app to capture the session authlib
+stores for the OAuth state, then compares Starlette's signed-cookie
+``SessionMiddleware`` with ``ServerSessionMiddleware`` (in-memory
+backend):
+
+- the Set-Cookie header each emits for that session;
+- microseconds of middleware overhead on a route that does not use the
+  session, with and without the session cookie on the request, measured
+  by calling each middleware directly around a no-op ASGI app (browsers
+  only send the server-side cookie under ``SESSION_COOKIE_PATH``, so
+  "with cookie" is its worst case);
+- the same for a session route that reads the state (the callback).
+
+    python -m benchmarks.bench_sessions --iterations 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from benchmarks.common import emit, setup_env
+
+setup_env(LOG_FILE="", LOG_LEVEL="WARNING", RATE_LIMIT_ENABLED="false")
+
+import httpx  # noqa: E402
+from starlette.middleware.sessions import SessionMiddleware  # noqa: E402
+from benchmarks.fake_oauth import FakeOAuthProvider  # noqa: E402
+from app.auth.sessions import InMemorySessionBackend, ServerSessionMiddleware  # noqa: E402
+
+
+async def capture_oauth_session() -> dict:
+    provider = await FakeOAuthProvider(os.environ["GOOGLE_CLIENT_ID"]).start()
+    os.environ["GOOGLE_DISCOVERY_URL"] = provider.discovery_url
+    from app.main import app
+
+    captured = {}
+
+    async def inner(scope, receive, send):
+        await app.router(scope, receive, send)
+        if scope["path"] == "/auth/google":
+            captured.update(scope["session"])
+
+    # The app's own stack minus middleware, so the session can be read back
+    stack = ServerSessionMiddleware(inner, backend=_memory_backend())
+    try:
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=stack), base_url="http://bench") as client:
+                response = await client.get("/auth/google")
+                assert response.status_code == 302, response.status_code
+    finally:
+        await provider.stop()
+    return captured
+
+
+def _memory_backend() -> InMemorySessionBackend:
+    return InMemorySessionBackend(maxsize=1000, ttl=900)
+
+
+async def set_cookie(middleware_factory, session: dict) -> bytes:
+    async def writes_session(scope, receive, send):
+        scope["session"].update(session)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    cookies = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            cookies.extend(value for name, value in message["headers"] if name == b"set-cookie")
+
+    await middleware_factory(writes_session)(_scope("/auth/google"), _receive, send)
+    return cookies[0]
+
+
+def _scope(path: str, cookie: bytes = b"") -> dict:
+    headers = [(b"host", b"bench"), (b"user-agent", b"bench")]
+    if cookie:
+        headers.append((b"cookie", cookie.split(b";")[0]))
+    return {"type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "root_path": "",
+            "scheme": "http", "query_string": b"", "headers": headers, "server": ("bench", 80),
+            "client": ("127.0.0.1", 1234), "http_version": "1.1", "asgi": {"version": "3.0"}}
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _noop_send(message):
+    pass
+
+
+async def per_request_us(middleware, path: str, cookie: bytes, iterations: int) -> float:
+    for _ in range(100):
+        await middleware(_scope(path, cookie), _receive, _noop_send)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await middleware(_scope(path, cookie), _receive, _noop_send)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def main(args) -> None:
+    session = await capture_oauth_session()
+
+    async def endpoint(scope, receive, send):
+        # Reads the state like the callback does, without changing it
+        if "session" in scope:
+            dict(scope["session"])
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    backend = _memory_backend()
+
+    def signed(app):
+        return SessionMiddleware(app, secret_key="benchmark-session-secret")
+
+    def server_side(app):
+        return ServerSessionMiddleware(app, backend=backend)
+
+    signed_cookie = await set_cookie(signed, session)
+    server_cookie = await set_cookie(server_side, session)
+
+    results = {
+        "session_json_bytes": len(json.dumps(session, separators=(",", ":"))),
+        "set_cookie_bytes": {"signed_cookie": len(signed_cookie), "server_side": len(server_cookie)},
+    }
+    baseline = {
+        "no_middleware": endpoint,
+        "signed_cookie": signed(endpoint),
+        "server_side": server_side(endpoint),
+    }
+    cookies = {"no_middleware": b"", "signed_cookie": signed_cookie, "server_side": server_cookie}
+    for label, path in (("other_route", "/health/live"), ("session_route", "/auth/google/callback")):
+        results[label] = {}
+        for name, middleware in baseline.items():
+            results[label][name] = {
+                "without_cookie_us": await per_request_us(middleware, path, b"", args.iterations),
+                "with_cookie_us": await per_request_us(middleware, path, cookies[name], args.iterations),
+            }
+    results["config"] = vars(args)
+    emit("sessions", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
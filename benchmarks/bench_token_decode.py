@@ -0,0 +1,52 @@
+"""Single-core decode_access_token throughput with the verified-token cache on and off.
+
+Decodes a pool of ``--tokens`` distinct bearer tokens round-robin, which is
+what a worker sees when that many clients are active.
+
+    python -m benchmarks.bench_token_decode --iterations 200000 --tokens 1000
+"""
+import argparse
+import time
+
+from benchmarks.common import emit, setup_env
+
+setup_env()
+
+from app.utils import auth_utils  # noqa: E402
+
+
+def run(tokens: list, iterations: int, cached: bool) -> dict:
+    auth_utils.TOKEN_CACHE_ENABLED = cached
+    auth_utils.token_cache.clear()
+    count = len(tokens)
+    start = time.perf_counter()
+    for i in range(iterations):
+        auth_utils.decode_access_token(tokens[i % count])
+    elapsed = time.perf_counter() - start
+    return {
+        "decodes_per_second": iterations / elapsed,
+        "mean_us": elapsed / iterations * 1e6,
+    }
+
+
+def main(args) -> None:
+    tokens = [
+        auth_utils.create_access_token({"sub": f"user{i}@example.com", "role": "customer"})
+        for i in range(args.tokens)
+    ]
+    uncached = run(tokens, args.iterations, cached=False)
+    cached = run(tokens, args.iterations, cached=True)
+    emit("token_decode", {
+        "uncached": uncached,
+        "cached": cached,
+        "speedup": cached["decodes_per_second"] / uncached["decodes_per_second"],
+        "config": vars(args),
+    }, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--output")
+    main(parser.parse_args())
@@ -0,0 +1,105 @@
+"""Verification/reset token lookup latency with --users rows (default 1M).
+
+Compares the indexed ``auth_tokens`` lookup against the old plan: an
+equality filter on an unindexed text column of the users table. Needs a
+scratch PostgreSQL database; every table in it is dropped and re-created.
+
+    DATABASE_URL=postgresql+asyncpg://postgres@localhost/bench \\
+        python -m benchmarks.bench_token_lookup --users 1000000 --lookups 2000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from benchmarks.common import create_schema, emit, setup_env, summarize
+
+setup_env()
+
+from datetime import datetime, timezone  # noqa: E402
+from sqlalchemy import select, text  # noqa: E402
+from app.crud.token_crud import hash_token  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+from app.models.token_model import AuthToken, TokenPurpose  # noqa: E402
+from app.models.user_model import User  # noqa: E402
+
+SEED_SQL = [
+    """
+    INSERT INTO users (email, full_name, role, is_active, is_verified, auth_provider)
+    SELECT 'user' || g || '@example.com', 'User ' || g, 'customer', true, false, 'email'
+    FROM generate_series(1, :users) AS g
+    """,
+    """
+    INSERT INTO auth_tokens (user_id, token_hash, purpose, expires_at)
+    SELECT id, encode(sha256(convert_to('token-' || id, 'UTF8')), 'hex'),
+           'email_verification', now() + interval '1 day'
+    FROM users
+    """,
+    "DROP TABLE IF EXISTS bench_legacy_tokens",
+    "CREATE TABLE bench_legacy_tokens AS SELECT id, 'token-' || id AS verification_token FROM users",
+    "ANALYZE",
+]
+
+
+async def get_user_by_token(db, token: str, purpose: TokenPurpose):
+    """The indexed lookup by token hash (redeem_token's WHERE clause, read-only)."""
+    result = await db.execute(
+        select(User)
+        .join(AuthToken, AuthToken.user_id == User.id)
+        .where(
+            AuthToken.token_hash == hash_token(token),
+            AuthToken.purpose == purpose,
+            AuthToken.expires_at > datetime.now(timezone.utc),
+        )
+    )
+    return result.scalars().first()
+
+
+async def seed(users: int) -> float:
+    start = time.perf_counter()
+    async with engine.begin() as conn:
+        for statement in SEED_SQL:
+            await conn.execute(text(statement), {"users": users})
+    return time.perf_counter() - start
+
+
+async def main(args) -> None:
+    if engine.dialect.name != "postgresql":
+        sys.exit("bench_token_lookup needs a PostgreSQL DATABASE_URL")
+    await create_schema()
+    seed_seconds = await seed(args.users)
+
+    ids = [random.randint(1, args.users) for _ in range(args.lookups)]
+    indexed, legacy = [], []
+    async with SessionLocal() as db:
+        for user_id in ids:
+            start = time.perf_counter()
+            user = await get_user_by_token(db, f"token-{user_id}", TokenPurpose.email_verification)
+            indexed.append(time.perf_counter() - start)
+            assert user is not None and user.id == user_id
+        for user_id in ids[: args.legacy_lookups]:
+            start = time.perf_counter()
+            await db.execute(
+                text("SELECT id FROM bench_legacy_tokens WHERE verification_token = :t"),
+                {"t": f"token-{user_id}"},
+            )
+            legacy.append(time.perf_counter() - start)
+
+    emit("token_lookup", {
+        "seed_seconds": seed_seconds,
+        "indexed_auth_tokens": summarize(indexed),
+        "unindexed_users_column": summarize(legacy),
+        "config": vars(args),
+    }, args.output)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--legacy-lookups", type=int, default=50,
+                        help="sequential scans are slow; sample fewer of them")
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
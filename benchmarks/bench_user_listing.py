@@ -0,0 +1,97 @@
+"""Page latency of the admin user listing at increasing depth.
+
+Seeds ``--users`` users, then times fetching a page at several depths with
+keyset pagination (``list_users(after_id=...)``) and, for comparison, with
+LIMIT/OFFSET. Keyset latency should stay flat; OFFSET grows with depth.
+Run against Postgres (``DATABASE_URL``, migrated) to exercise the real
+composite and trigram indexes.
+
+    python -m benchmarks.bench_user_listing --users 200000 --depths 0 1000 10000 100000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import create_schema, emit, setup_env, summarize
+
+setup_env(LOG_FILE="", LOG_LEVEL="WARNING")
+
+
+async def seed(count: int) -> None:
+    from sqlalchemy import insert
+    from app.database import SessionLocal
+    from app.models.user_model import AuthProvider, User, UserRole
+
+    async with SessionLocal() as db:
+        for start in range(0, count, 5000):
+            await db.execute(insert(User), [
+                {"email": f"list-{i}@example.com", "full_name": f"User {i}", "hashed_password": None,
+                 "role": UserRole.caregiver if i % 2 else UserRole.customer, "is_active": True,
+                 "is_verified": i % 3 != 0, "auth_provider": AuthProvider.email}
+                for i in range(start, min(start + 5000, count))
+            ])
+        await db.commit()
+
+
+async def time_page(fetch, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fetch()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+async def main(args) -> None:
+    from sqlalchemy import select
+    from app.crud.user_crud import list_users
+    from app.database import SessionLocal
+    from app.models.user_model import User, UserRole
+
+    if not args.no_seed:
+        await create_schema()
+        await seed(args.users)
+
+    results = {}
+    async with SessionLocal() as db:
+        role = UserRole.caregiver
+        for depth in args.depths:
+            # The id a client would hold as its cursor after `depth` rows
+            after_id = (await db.execute(
+                select(User.id).where(User.role == role).order_by(User.id).offset(depth).limit(1)
+            )).scalar()
+            if after_id is None:
+                continue
+
+            async def keyset():
+                await list_users(db, role=role, is_verified=True, after_id=after_id, limit=args.limit)
+
+            async def offset():
+                await db.execute(
+                    select(User).where(User.role == role, User.is_verified.is_(True))
+                    .order_by(User.id).offset(depth).limit(args.limit)
+                )
+
+            results[str(depth)] = {
+                "keyset": await time_page(keyset, args.repeat),
+                "offset": await time_page(offset, args.repeat),
+            }
+
+        async def search():
+            await list_users(db, role=role, q=args.search, limit=args.limit)
+
+        results["prefix_search"] = await time_page(search, args.repeat)
+    results["config"] = vars(args)
+    emit("user_listing", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1000, 10000, 40000])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--search", default="list-123")
+    parser.add_argument("--no-seed", action="store_true", help="reuse the users already in DATABASE_URL")
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,99 @@
+"""Concurrent user lookups with and without request coalescing.
+
+Seeds ``--users`` users, then fires ``--lookups`` ``get_user_by_email``
+calls, ``--concurrency`` at a time, each on its own session as a request
+would. Emails are drawn from a Zipf-like distribution so a few hot
+accounts get most of the traffic, as during a login spike. Runs once with
+``USER_LOOKUP_BATCHING`` on and once off, counting the SELECTs that
+actually reached the database.
+
+    python -m benchmarks.bench_user_lookup --users 10000 --lookups 20000 --concurrency 200
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.common import create_schema, emit, setup_env, summarize
+
+setup_env(LOG_FILE="", LOG_LEVEL="WARNING")
+
+
+async def seed(count: int) -> None:
+    from sqlalchemy import insert
+    from app.database import SessionLocal
+    from app.models.user_model import AuthProvider, User, UserRole
+
+    async with SessionLocal() as db:
+        for start in range(0, count, 5000):
+            await db.execute(insert(User), [
+                {"email": f"lookup-{i}@example.com", "full_name": f"User {i}", "hashed_password": None,
+                 "role": UserRole.customer, "is_active": True, "is_verified": True,
+                 "auth_provider": AuthProvider.email}
+                for i in range(start, min(start + 5000, count))
+            ])
+        await db.commit()
+
+
+async def run(emails, concurrency: int) -> dict:
+    from app.crud.user_crud import get_user_by_email
+    from app.database import SessionLocal
+
+    queue = iter(emails)
+    latencies, missing = [], 0
+
+    async def worker():
+        nonlocal missing
+        for email in queue:
+            start = time.perf_counter()
+            async with SessionLocal() as db:
+                if await get_user_by_email(db, email) is None:
+                    missing += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {**summarize(latencies), "lookups_per_second": len(latencies) / elapsed, "missing": missing}
+
+
+async def main(args) -> None:
+    from sqlalchemy import event
+    from app.crud import user_crud
+    from app.database import engine
+
+    await create_schema()
+    await seed(args.users)
+
+    selects = 0
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_selects(conn, cursor, statement, parameters, context, executemany):
+        nonlocal selects
+        if statement.lstrip().upper().startswith("SELECT") and "users" in statement:
+            selects += 1
+
+    rng = random.Random(args.seed)
+    weights = [1 / (rank + 1) ** args.skew for rank in range(args.users)]
+    emails = [f"lookup-{i}@example.com" for i in rng.choices(range(args.users), weights=weights, k=args.lookups)]
+
+    results = {}
+    for batching in (False, True):
+        user_crud.USER_LOOKUP_BATCHING = batching
+        selects = 0
+        stats = await run(emails, args.concurrency)
+        results["batched" if batching else "direct"] = {**stats, "queries": selects}
+    results["loader"] = user_crud.users_by_email.stats()
+    results["config"] = vars(args)
+    emit("user_lookup", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of the email popularity")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,95 @@
+"""Shared helpers for the scripts in ``benchmarks/``.
+
+Run benchmarks from the repository root, e.g.::
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.bench_password_hashing --concurrency 32
+
+Unless ``DATABASE_URL`` is already set they use a throwaway SQLite file.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+# Settings the app reads at import time. Benchmarks never talk to a real
+# mail server, so placeholders are enough.
+BENCH_ENV = {
+    "DATABASE_URL": "sqlite+aiosqlite:///./benchmark.db",
+    "JWT_SECRET": "benchmark-secret",
+    "MAIL_USERNAME": "bench",
+    "MAIL_PASSWORD": "bench",
+    "MAIL_FROM": "bench@example.com",
+    "MAIL_PORT": "2525",
+    "MAIL_SERVER": "127.0.0.1",
+    "MAIL_STARTTLS": "false",
+    "MAIL_USE_CREDENTIALS": "false",
+    "GOOGLE_CLIENT_ID": "bench-google-client",
+    "GOOGLE_CLIENT_SECRET": "bench-google-secret",
+    "FACEBOOK_APP_ID": "bench-facebook-app",
+    "FACEBOOK_APP_SECRET": "bench-facebook-secret",
+}
+
+
+def setup_env(**overrides) -> None:
+    for key, value in {**BENCH_ENV, **overrides}.items():
+        os.environ.setdefault(key, value)
+
+
+async def create_schema() -> None:
+    """Create all tables on the benchmark database (SQLite has no migrations)."""
+    from app.database import engine
+    from app.models.base import Base
+    import app.models  # noqa: F401
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+def percentile(samples, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples) -> dict:
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000 if samples else 0.0,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def emit(name: str, results: dict, output: str = None) -> None:
+    """Print results as JSON (and optionally write them to ``output``)."""
+    document = {
+        "benchmark": name,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    text = json.dumps(document, indent=2, sort_keys=True)
+    if output:
+        with open(output, "w") as fh:
+            fh.write(text + "\n")
+    sys.stdout.write(text + "\n")
@@ -0,0 +1,61 @@
+"""Compare two benchmark JSON files and flag regressions.
+
+Walks both documents and compares every numeric leaf they share. Keys
+ending in ``_ms``/``_us``/``_ns``/``_seconds`` are lower-is-better and
+everything ending in ``per_second`` is higher-is-better; other numbers are
+ignored. Exits non-zero if any metric regressed by more than ``--threshold``.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.1
+"""
+import argparse
+import json
+import sys
+
+LOWER_IS_BETTER = ("_ms", "_us", "_ns", "_seconds")
+HIGHER_IS_BETTER = ("per_second",)
+
+
+def flatten(document, prefix=""):
+    if isinstance(document, dict):
+        for key, value in document.items():
+            yield from flatten(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(document, (int, float)) and not isinstance(document, bool):
+        yield prefix, float(document)
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list:
+    old = dict(flatten(baseline.get("results", baseline)))
+    new = dict(flatten(candidate.get("results", candidate)))
+    rows = []
+    for key in sorted(old.keys() & new.keys()):
+        if key.startswith("config."):
+            continue
+        if key.endswith(LOWER_IS_BETTER):
+            change = (new[key] - old[key]) / old[key] if old[key] else 0.0
+        elif key.endswith(HIGHER_IS_BETTER):
+            change = (old[key] - new[key]) / old[key] if old[key] else 0.0
+        else:
+            continue
+        rows.append((key, old[key], new[key], change, change > threshold))
+    return rows
+
+
+def main(args) -> int:
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    with open(args.candidate) as fh:
+        candidate = json.load(fh)
+    rows = compare(baseline, candidate, args.threshold)
+    print(f"{'metric':60} {'baseline':>12} {'candidate':>12} {'worse by':>9}")
+    for key, old, new, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{key:60} {old:12.3f} {new:12.3f} {change:9.1%}{flag}")
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    sys.exit(main(parser.parse_args()))
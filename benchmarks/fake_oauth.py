@@ -0,0 +1,145 @@
+"""Minimal in-process OpenID provider standing in for Google.
+
+Serves a discovery document, a JWKS (one RSA key), an authorize endpoint
+that logs in whoever is named in ``login_hint`` and redirects straight back,
+a token endpoint issuing RS256 ID tokens and a userinfo endpoint. It runs
+on a real local socket (uvicorn) so connection reuse is visible, and can
+add per-request latency plus a one-off ``connect_latency`` for every new
+connection to stand in for the TCP+TLS handshake to a remote provider.
+
+Point the app at it with ``GOOGLE_DISCOVERY_URL=<provider.discovery_url>``.
+"""
+import asyncio
+import secrets
+import socket
+import time
+from typing import Dict, Optional, Set, Tuple
+from urllib.parse import urlencode
+
+import uvicorn
+from authlib.jose import JsonWebKey, jwt
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, RedirectResponse
+from starlette.routing import Route
+
+
+class FakeOAuthProvider:
+    def __init__(self, client_id: str, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, connect_latency: float = 0.0):
+        self.client_id = client_id
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.key = JsonWebKey.generate_key("RSA", 2048, is_private=True, options={"kid": "bench-key"})
+        self.requests: Dict[str, int] = {}
+        self.connections = 0
+        self._seen: Set[Tuple[str, int]] = set()
+        self._codes: Dict[str, Tuple[str, Optional[str]]] = {}
+        self._access_tokens: Dict[str, str] = {}
+        self._server: Optional[uvicorn.Server] = None
+        self._task: Optional[asyncio.Task] = None
+        self.app = Starlette(routes=[
+            Route("/.well-known/openid-configuration", self.discovery),
+            Route("/jwks", self.jwks),
+            Route("/authorize", self.authorize),
+            Route("/token", self.token, methods=["POST"]),
+            Route("/userinfo", self.userinfo),
+        ])
+
+    @property
+    def issuer(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def discovery_url(self) -> str:
+        return f"{self.issuer}/.well-known/openid-configuration"
+
+    async def start(self) -> "FakeOAuthProvider":
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        self.port = sock.getsockname()[1]
+        config = uvicorn.Config(self.app, log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._task = asyncio.create_task(self._server.serve(sockets=[sock]))
+        while not self._server.started:
+            await asyncio.sleep(0.01)
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+            await self._task
+            self._server = None
+
+    async def __aenter__(self) -> "FakeOAuthProvider":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def _simulate(self, request, name: str) -> None:
+        self.requests[name] = self.requests.get(name, 0) + 1
+        client = tuple(request.scope.get("client") or ())
+        if client not in self._seen:
+            self._seen.add(client)
+            self.connections += 1
+            if self.connect_latency:
+                await asyncio.sleep(self.connect_latency)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def claims(self, email: str) -> dict:
+        return {"sub": email, "email": email, "email_verified": True, "name": email.split("@")[0]}
+
+    async def discovery(self, request):
+        await self._simulate(request, "discovery")
+        return JSONResponse({
+            "issuer": self.issuer,
+            "authorization_endpoint": f"{self.issuer}/authorize",
+            "token_endpoint": f"{self.issuer}/token",
+            "userinfo_endpoint": f"{self.issuer}/userinfo",
+            "jwks_uri": f"{self.issuer}/jwks",
+            "id_token_signing_alg_values_supported": ["RS256"],
+        }, headers={"Cache-Control": "public, max-age=3600"})
+
+    async def jwks(self, request):
+        await self._simulate(request, "jwks")
+        return JSONResponse({"keys": [self.key.as_dict(is_private=False)]},
+                            headers={"Cache-Control": "public, max-age=3600"})
+
+    async def authorize(self, request):
+        await self._simulate(request, "authorize")
+        params = request.query_params
+        code = secrets.token_urlsafe(16)
+        self._codes[code] = (params["login_hint"], params.get("nonce"))
+        query = urlencode({"code": code, "state": params.get("state", "")})
+        return RedirectResponse(f"{params['redirect_uri']}?{query}", status_code=302)
+
+    async def token(self, request):
+        await self._simulate(request, "token")
+        form = await request.form()
+        email, nonce = self._codes.pop(form["code"])
+        now = int(time.time())
+        payload = {**self.claims(email), "iss": self.issuer, "aud": self.client_id, "iat": now, "exp": now + 3600}
+        if nonce:
+            payload["nonce"] = nonce
+        id_token = jwt.encode({"alg": "RS256", "kid": "bench-key"}, payload, self.key).decode()
+        access_token = secrets.token_urlsafe(16)
+        self._access_tokens[access_token] = email
+        return JSONResponse({
+            "access_token": access_token,
+            "token_type": "Bearer",
+            "expires_in": 3600,
+            "scope": "openid email profile",
+            "id_token": id_token,
+        })
+
+    async def userinfo(self, request):
+        await self._simulate(request, "userinfo")
+        token = request.headers.get("authorization", "").split(" ", 1)[-1]
+        email = self._access_tokens.get(token)
+        if email is None:
+            return JSONResponse({"error": "invalid_token"}, status_code=401)
+        return JSONResponse(self.claims(email))
@@ -0,0 +1,111 @@
+"""Minimal in-process SMTP server standing in for the real mail relay.
+
+It speaks just enough SMTP (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT)
+for aiosmtplib, keeps every accepted message in ``messages`` and can inject
+per-message latency and failures. No TLS or AUTH, so point the app at it
+with ``MAIL_STARTTLS=false`` and ``MAIL_USE_CREDENTIALS=false``.
+"""
+import asyncio
+import random
+from typing import List, Optional
+
+
+class FakeSMTPServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 failure_rate: float = 0.0, connect_latency: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.connect_latency = connect_latency
+        self.messages: List[dict] = []
+        self.connections = 0
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self) -> "FakeSMTPServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "FakeSMTPServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+
+        async def reply(line: str) -> None:
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        if self.connect_latency:
+            await asyncio.sleep(self.connect_latency)
+        await reply("220 fake-smtp ready")
+        envelope = {"from": None, "to": []}
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                command = raw.decode(errors="replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+                if verb == "EHLO":
+                    await reply("250-fake-smtp\r\n250-8BITMIME\r\n250 SMTPUTF8")
+                elif verb == "HELO":
+                    await reply("250 fake-smtp")
+                elif verb == "MAIL":
+                    envelope = {"from": command[10:].strip(), "to": []}
+                    await reply("250 OK")
+                elif verb == "RCPT":
+                    envelope["to"].append(command[8:].strip())
+                    await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    lines = []
+                    while True:
+                        line = await reader.readline()
+                        if line in (b".\r\n", b".\n", b""):
+                            break
+                        lines.append(line)
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    if self.failure_rate and random.random() < self.failure_rate:
+                        await reply("451 Temporary failure")
+                    else:
+                        self.messages.append({**envelope, "data": b"".join(lines)})
+                        await reply("250 OK queued")
+                elif verb == "RSET":
+                    envelope = {"from": None, "to": []}
+                    await reply("250 OK")
+                elif verb == "NOOP":
+                    await reply("250 OK")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def _serve_forever(port: int) -> None:
+    server = await FakeSMTPServer(port=port).start()
+    print(f"Fake SMTP server listening on {server.host}:{server.port}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=2525)
+    asyncio.run(_serve_forever(parser.parse_args().port))
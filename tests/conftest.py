@@ -0,0 +1,63 @@
+"""Shared fixtures: the app running in-process on a throwaway SQLite database.
+
+Settings are read when ``app`` modules are imported, so the environment
+(including the fake Google provider's address) is set up here, before
+any test module imports them.
+"""
+import os
+import socket
+import tempfile
+
+import httpx
+import pytest
+
+from benchmarks.common import setup_env
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+OAUTH_PROVIDER_PORT = _free_port()
+
+setup_env(
+    DATABASE_URL=f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='app-tests-')}/test.db",
+    LOG_FILE="",
+    LOG_LEVEL="WARNING",
+    RATE_LIMIT_ENABLED="false",
+    GOOGLE_DISCOVERY_URL=f"http://127.0.0.1:{OAUTH_PROVIDER_PORT}/.well-known/openid-configuration",
+)
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def oauth_provider():
+    from benchmarks.fake_oauth import FakeOAuthProvider
+
+    provider = await FakeOAuthProvider(os.environ["GOOGLE_CLIENT_ID"], port=OAUTH_PROVIDER_PORT).start()
+    yield provider
+    await provider.stop()
+
+
+@pytest.fixture(scope="session")
+async def app(oauth_provider):
+    from benchmarks.common import create_schema
+    from app.main import app
+    from app.startup import readiness
+
+    await create_schema()
+    async with app.router.lifespan_context(app):
+        await readiness.wait()
+        yield app
+
+
+@pytest.fixture
+async def client(app):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
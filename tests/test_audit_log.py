@@ -0,0 +1,41 @@
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_failed_batch_is_retried_event_by_event(app):
+    from app.database import SessionLocal
+    from app.models.audit_model import AuditEvent, AuditEventType
+    from app.utils.audit_log import AuditLog, events_dropped
+
+    audit = AuditLog(SessionLocal, buffer_size=100, batch_size=100, flush_interval=60)
+    email = f"audit-{uuid.uuid4().hex[:8]}@example.com"
+    audit.record(AuditEventType.login, True, 1, email)
+    audit.record(AuditEventType.login, False, 1, email, reason=object())  # not JSON serializable
+    audit.record(AuditEventType.signup, True, 1, email)
+    dropped = events_dropped.value(reason="invalid_event")
+
+    assert await audit.flush() == 0  # the batch fails as a whole
+    assert await audit.flush() == 2  # the retry writes everything but the bad event
+    assert events_dropped.value(reason="invalid_event") == dropped + 1
+
+    async with SessionLocal() as db:
+        events = (await db.execute(
+            select(AuditEvent.event).where(AuditEvent.email == email).order_by(AuditEvent.id)
+        )).scalars().all()
+    assert events == ["login", "signup"]
+
+
+async def test_client_address_is_cut_to_the_column_size():
+    from starlette.requests import Request
+    from app.auth.dependencies import audit_request
+    from app.utils.audit_log import audit_client
+
+    request = Request({"type": "http", "headers": [(b"user-agent", b"u" * 1000)], "client": ("h" * 100, 1)})
+    await audit_request(request)
+    ip, user_agent = audit_client.get()
+    assert len(ip) == 45
+    assert len(user_agent) == 256
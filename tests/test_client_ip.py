@@ -0,0 +1,39 @@
+import pytest
+from starlette.requests import Request
+
+from app.auth import dependencies
+from app.auth.dependencies import client_ip
+
+
+def request_from(forwarded=None, peer="10.0.0.5"):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded is not None else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 1234)})
+
+
+@pytest.fixture
+def trust_forwarded(monkeypatch):
+    monkeypatch.setattr(dependencies, "RATE_LIMIT_TRUST_FORWARDED", True)
+    return monkeypatch
+
+
+def test_forwarded_ignored_unless_trusted():
+    assert client_ip(request_from("203.0.113.7")) == "10.0.0.5"
+
+
+def test_rightmost_entry_wins_over_client_supplied_ones(trust_forwarded):
+    assert client_ip(request_from("1.2.3.4, 203.0.113.7")) == "203.0.113.7"
+
+
+def test_hop_count_from_the_right(trust_forwarded):
+    trust_forwarded.setattr(dependencies, "RATE_LIMIT_FORWARDED_HOPS", 2)
+    assert client_ip(request_from("1.2.3.4, 203.0.113.7, 10.0.0.9")) == "203.0.113.7"
+    assert client_ip(request_from("203.0.113.7")) == "10.0.0.5"
+
+
+@pytest.mark.parametrize("forwarded", ["", "not-an-ip", "1.2.3.4, " + "x" * 100, "2001:db8::1%eth0" * 4])
+def test_invalid_entry_falls_back_to_peer(trust_forwarded, forwarded):
+    assert client_ip(request_from(forwarded)) == "10.0.0.5"
+
+
+def test_ipv6_entry(trust_forwarded):
+    assert client_ip(request_from("2001:DB8::1")) == "2001:db8::1"
@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_bulk_import_hash_pool_does_not_fork():
+    from app.services.bulk_user_service import _get_hash_executor, shutdown_hash_executor
+    from app.utils.auth_utils import get_password_hash, verify_password
+
+    executor = _get_hash_executor()
+    try:
+        assert executor._mp_context.get_start_method() == "forkserver"
+        hashed = await asyncio.get_running_loop().run_in_executor(executor, get_password_hash, "pw")
+        assert verify_password("pw", hashed)
+    finally:
+        shutdown_hash_executor()
+
+
+async def test_password_hasher_process_pool_does_not_fork():
+    from app.utils.password_hashing import PasswordHasher
+
+    hasher = PasswordHasher("process", max_workers=1)
+    try:
+        hashed = await hasher.hash("pw")
+        assert hasher._executor._mp_context.get_start_method() == "forkserver"
+        assert await hasher.verify("pw", hashed)
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,26 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_changes_during_a_reload_survive_the_swap(app, monkeypatch):
+    from app.database import SessionLocal
+    from app.services.caregiver_service import matching_index
+    from app.services.matching_engine import CaregiverEntry, matching_engine
+
+    added = CaregiverEntry(user_id=10 ** 9, full_name="New", latitude=43.65, longitude=-79.38,
+                           service_radius_km=10, rating=5, hourly_rate=30, years_experience=3, slots=[(540, 1020)])
+
+    @asynccontextmanager
+    async def session_during_edits():
+        # A profile saved after the reload started; its snapshot may not have it
+        async with SessionLocal() as db:
+            yield db
+        matching_index.upsert(added)
+
+    monkeypatch.setattr(matching_index, "session_factory", session_during_edits)
+    await matching_index.refresh()
+    assert added.user_id in matching_engine
+    matching_engine.remove(added.user_id)
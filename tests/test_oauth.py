@@ -0,0 +1,33 @@
+import httpx
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_google_login_uses_cached_metadata_and_the_id_token(client, oauth_provider):
+    before = dict(oauth_provider.requests)
+    response = await client.get("/auth/google")
+    async with httpx.AsyncClient() as browser:
+        response = await browser.get(response.headers["location"], params={"login_hint": "oauth-test@example.com"})
+    callback = httpx.URL(response.headers["location"])
+    response = await client.get(callback.path, params=callback.params)
+    assert response.status_code < 400
+
+    made = {name: count - before.get(name, 0) for name, count in oauth_provider.requests.items()}
+    assert made.get("token") == 1
+    # Verified against the cached JWKS: no userinfo call, no metadata fetch on the request path
+    assert made.get("userinfo", 0) == 0
+    assert made.get("discovery", 0) == 0
+    assert made.get("jwks", 0) == 0
+
+
+def test_failed_refreshes_back_off_exponentially():
+    from app.auth.oauth_metadata import ProviderMetadata
+
+    metadata = ProviderMetadata("test", "http://127.0.0.1:1/.well-known/openid-configuration",
+                                retry_base=5, retry_max=300)
+    delays = []
+    for failures in (1, 2, 3, 10):
+        metadata.failures = failures
+        delays.append(metadata._next_delay())
+    assert delays == [5, 10, 20, 300]
@@ -0,0 +1,10 @@
+from app.cli.passwords import memory_candidates
+
+
+def test_memory_candidates_end_at_the_floor():
+    assert memory_candidates(256, 19) == [256, 128, 64, 32, 19]
+
+
+def test_memory_candidates_do_not_repeat_the_floor():
+    assert memory_candidates(256, 32) == [256, 128, 64, 32]
+    assert memory_candidates(19, 19) == [19]
@@ -0,0 +1,146 @@
+"""Database round trips per auth endpoint, checked against a budget.
+
+Drives each endpoint in-process (the Google callbacks against the fake
+provider) and counts the SQL statements and commits issued on the
+request's behalf -- batched lookups included, background workers not.
+Run against PostgreSQL too:
+
+    DATABASE_URL=postgresql+asyncpg://... python -m pytest tests/test_query_budget.py
+
+Budgets are for PostgreSQL. SQLite has no data-modifying CTEs, so token
+redemption takes one statement more there (``SQLITE_EXTRA``).
+"""
+import re
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+import httpx
+import pytest
+from sqlalchemy import event, select
+
+pytestmark = pytest.mark.anyio
+
+# endpoint: (statements, commits)
+BUDGETS = {
+    "signup": (3, 1),                  # INSERT user ON CONFLICT, token upsert, outbox row
+    "verify_email": (1, 1),            # DELETE token -> UPDATE user in one statement
+    "login": (2, 1),                   # user lookup, refresh token
+    "me_cold": (1, 0),                 # user lookup (user cache miss)
+    "me": (0, 0),                      # user cache hit, in-memory revocation check
+    "refresh": (3, 1),                 # claim UPDATE ... RETURNING, user lookup, new refresh token
+    "forgot_password": (3, 1),         # user lookup, token upsert, outbox row
+    "reset_password": (3, 1),          # redeem token, revoke refresh tokens, record revoked jtis
+    "resend_verification": (3, 1),     # user lookup, token upsert, outbox row
+    "logout": (3, 1),                  # refresh token lookup, revoke family, record revoked jtis
+    "google_callback_new": (3, 1),     # user lookup, INSERT user ON CONFLICT, refresh token
+    "google_callback_existing": (2, 1),  # user lookup, refresh token
+}
+SQLITE_EXTRA = {"verify_email": 1, "reset_password": 1}
+
+PASSWORD = "Budget-password-1"
+
+_counts: ContextVar[Optional[dict]] = ContextVar("query_budget_counts", default=None)
+
+
+def instrument(engine) -> None:
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        counts = _counts.get()
+        if counts is not None:
+            counts["statements"] += 1
+
+    @event.listens_for(engine.sync_engine, "commit")
+    def on_commit(conn):
+        counts = _counts.get()
+        if counts is not None:
+            counts["commits"] += 1
+
+
+async def counted(results: dict, name: str, request) -> httpx.Response:
+    counts = {"statements": 0, "commits": 0}
+    token = _counts.set(counts)
+    try:
+        response = await request
+    finally:
+        _counts.reset(token)
+    if response.status_code != 302:
+        response.raise_for_status()
+    results[name] = counts
+    return response
+
+
+async def latest_link_token(email: str) -> str:
+    from app.database import SessionLocal
+    from app.models.outbox_model import EmailOutbox
+
+    async with SessionLocal() as db:
+        body = (await db.execute(
+            select(EmailOutbox.body).where(EmailOutbox.recipient == email).order_by(EmailOutbox.id.desc())
+        )).scalars().first()
+    return re.search(r"token=(\S+)", body).group(1)
+
+
+async def google_login(client, provider_client, results: dict, name: str, email: str) -> None:
+    response = await client.get("/auth/google")
+    response = await provider_client.get(response.headers["location"], params={"login_hint": email})
+    callback = httpx.URL(response.headers["location"])
+    await counted(results, name, client.get(callback.path, params=callback.params))
+
+
+@pytest.fixture(scope="module")
+async def measured(app):
+    from app.database import get_engine
+    from app.utils.mail_dispatcher import mail_dispatcher
+
+    engine = get_engine()
+    instrument(engine)
+    # Links are read back from the outbox, so keep the dispatcher from sending (and clearing) them
+    await mail_dispatcher.stop()
+    results = {}
+    run_id = uuid.uuid4().hex[:8]
+    alice, bob = f"alice-{run_id}@example.com", f"bob-{run_id}@example.com"
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://budget") as client, \
+            httpx.AsyncClient() as provider_client:
+        signup = {"email": alice, "password": PASSWORD, "full_name": "Alice"}
+        await counted(results, "signup", client.post("/auth/signup", json=signup))
+        token = await latest_link_token(alice)
+        await counted(results, "verify_email", client.get("/auth/verify-email", params={"token": token}))
+
+        credentials = {"username": alice, "password": PASSWORD}
+        tokens = (await counted(results, "login", client.post("/auth/login", json=credentials))).json()
+        auth = {"Authorization": f"Bearer {tokens['access_token']}"}
+        await counted(results, "me_cold", client.get("/auth/me", headers=auth))
+        await counted(results, "me", client.get("/auth/me", headers=auth))
+        tokens = (await counted(results, "refresh", client.post(
+            "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}))).json()
+
+        await counted(results, "forgot_password", client.post("/auth/forgot-password", json={"email": alice}))
+        token = await latest_link_token(alice)
+        await counted(results, "reset_password", client.post(
+            "/auth/reset-password", json={"token": token, "new_password": PASSWORD + "!"}))
+
+        await client.post("/auth/signup", json={"email": bob, "password": PASSWORD, "full_name": "Bob"})
+        await counted(results, "resend_verification", client.post(
+            "/auth/resend-verification", params={"email": bob}))
+
+        tokens = (await client.post("/auth/login", json={"username": alice, "password": PASSWORD + "!"})).json()
+        await counted(results, "logout", client.post(
+            "/auth/logout", headers={"Authorization": f"Bearer {tokens['access_token']}"},
+            json={"refresh_token": tokens["refresh_token"]}))
+
+        social = f"carol-{run_id}@example.com"
+        await google_login(client, provider_client, results, "google_callback_new", social)
+        await google_login(client, provider_client, results, "google_callback_existing", social)
+    await mail_dispatcher.start()
+    return engine.dialect.name, results
+
+
+@pytest.mark.parametrize("endpoint", BUDGETS)
+async def test_endpoint_within_query_budget(measured, endpoint):
+    dialect, results = measured
+    statements, commits = BUDGETS[endpoint]
+    if dialect == "sqlite":
+        statements += SQLITE_EXTRA.get(endpoint, 0)
+    assert results[endpoint]["statements"] <= statements, results[endpoint]
+    assert results[endpoint]["commits"] <= commits, results[endpoint]
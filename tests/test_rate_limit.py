@@ -0,0 +1,17 @@
+import pytest
+
+from app.utils.rate_limit import InMemoryRateLimitBackend, RateLimitBackend, RateLimiter
+
+pytestmark = pytest.mark.anyio
+
+
+def test_backend_must_implement_the_interface():
+    with pytest.raises(TypeError):
+        RateLimitBackend()
+
+
+async def test_limit_rejects_once_exhausted():
+    limiter = RateLimiter(InMemoryRateLimitBackend(shards=4))
+    assert [await limiter.check("login_ip", "203.0.113.7", (2, 60)) for _ in range(2)] == [0.0, 0.0]
+    assert await limiter.check("login_ip", "203.0.113.7", (2, 60)) > 0
+    assert await limiter.check("login_ip", "203.0.113.8", (2, 60)) == 0.0
@@ -0,0 +1,53 @@
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+PASSWORD = "Refresh-password-1"
+
+
+@pytest.fixture
+async def tokens(app, client):
+    from app.database import SessionLocal
+    from app.models.user_model import AuthProvider, User, UserRole
+    from app.utils.password_hashing import password_hasher
+
+    email = f"refresh-{uuid.uuid4().hex[:8]}@example.com"
+    async with SessionLocal() as db:
+        db.add(User(email=email, hashed_password=await password_hasher.hash(PASSWORD), full_name="Refresh",
+                    role=UserRole.customer, is_active=True, is_verified=True, auth_provider=AuthProvider.email))
+        await db.commit()
+    response = await client.post("/auth/login", json={"username": email, "password": PASSWORD})
+    assert response.status_code == 200
+    return response.json()
+
+
+def bearer(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+async def test_refresh_rotates_the_pair(client, tokens):
+    response = await client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert (await client.get("/auth/me", headers=bearer(rotated))).status_code == 200
+
+
+async def test_reused_refresh_token_revokes_the_family(client, tokens):
+    rotated = (await client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})).json()
+    reuse = await client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert reuse.status_code == 401
+    # Everything issued from that login is gone, the rotated pair included
+    assert (await client.post("/auth/refresh", json={"refresh_token": rotated["refresh_token"]})).status_code == 401
+    assert (await client.get("/auth/me", headers=bearer(rotated))).status_code == 401
+
+
+async def test_logout_revokes_the_access_token(client, tokens):
+    assert (await client.get("/auth/me", headers=bearer(tokens))).status_code == 200
+    response = await client.post("/auth/logout", headers=bearer(tokens),
+                                 json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code < 300
+    assert (await client.get("/auth/me", headers=bearer(tokens))).status_code == 401
+    assert (await client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})).status_code == 401
@@ -0,0 +1,86 @@
+import uuid
+from datetime import datetime, time, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+pytestmark = pytest.mark.anyio
+
+TORONTO = {"latitude": 43.65, "longitude": -79.38}
+
+
+async def make_user(db, role):
+    from app.crud.user_crud import create_user
+    from app.models.user_model import AuthProvider
+    from app.schemas.user_schemas import UserCreate
+
+    user = await create_user(db, UserCreate(email=f"{role}-{uuid.uuid4().hex[:8]}@example.com",
+                                            auth_provider=AuthProvider.google, role=role))
+    await db.commit()
+    return user
+
+
+async def make_plan(db, customer, weekday=None):
+    from app.schemas.care_plan_schemas import CarePlanCreate
+    from app.services.customer_service import CarePlanService, _today
+
+    today = _today()
+    weekday = (today.weekday() + 2) % 7 if weekday is None else weekday
+    data = CarePlanCreate(title="Visits", start_date=today, **TORONTO,
+                          slots=[{"weekday": weekday, "start": time(10), "duration_minutes": 60}])
+    return await CarePlanService(db).create_plan(customer, data)
+
+
+async def test_extender_generates_visits_past_the_old_horizon(app):
+    from app.database import SessionLocal
+    from app.models.care_plan_model import CarePlan, Visit
+    from app.services.customer_service import SCHEDULE_HORIZON_DAYS, _today, schedule_extender
+
+    async with SessionLocal() as db:
+        plan = await make_plan(db, await make_user(db, "customer"))
+        # As if it was last extended a week ago
+        plan.scheduled_until = _today() + timedelta(days=SCHEDULE_HORIZON_DAYS - 7)
+        await db.commit()
+        plan_id = plan.id
+
+    assert await schedule_extender.extend() >= 1
+    async with SessionLocal() as db:
+        plan = await db.get(CarePlan, plan_id)
+        visits = (await db.execute(select(Visit).where(Visit.care_plan_id == plan_id))).scalars().all()
+    assert plan.scheduled_until == _today() + timedelta(days=SCHEDULE_HORIZON_DAYS)
+    assert len(visits) == 4
+    assert await schedule_extender.extend() == 0
+
+
+async def test_concurrent_solves_do_not_double_book_a_caregiver(app, monkeypatch):
+    from app.database import SessionLocal
+    from app.models.caregiver_model import MINUTES_PER_WEEK
+    from app.services import customer_service
+    from app.services.customer_service import CarePlanService
+    from app.services.matching_engine import CaregiverEntry, matching_engine
+
+    async with SessionLocal() as db:
+        customer, caregiver = await make_user(db, "customer"), await make_user(db, "caregiver")
+        # Generated while no caregiver is indexed, so every visit starts unassigned
+        first, second = await make_plan(db, customer, weekday=6), await make_plan(db, customer, weekday=6)
+    matching_engine.upsert(CaregiverEntry(caregiver.id, "Only", service_radius_km=50, rating=5, hourly_rate=30,
+                                          years_experience=1, slots=[(0, MINUTES_PER_WEEK)], **TORONTO))
+    start = datetime.now(timezone.utc)
+    end = start + timedelta(days=8)
+    lock_caregivers = customer_service.lock_caregivers
+
+    async def solved_elsewhere_meanwhile(db, caregiver_ids):
+        # The other solve books the caregiver after this one read the calendars
+        monkeypatch.setattr(customer_service, "lock_caregivers", lock_caregivers)
+        async with SessionLocal() as other:
+            assert (await CarePlanService(other).solve_window(start, end, plan_ids=[second.id])).assigned == 1
+        await lock_caregivers(db, caregiver_ids)
+
+    monkeypatch.setattr(customer_service, "lock_caregivers", solved_elsewhere_meanwhile)
+    try:
+        async with SessionLocal() as db:
+            report = await CarePlanService(db).solve_window(start, end, plan_ids=[first.id])
+            assert (report.assigned, report.unassigned) == (0, 1)
+            assert await CarePlanService(db).conflicts(start, end) == []
+    finally:
+        matching_engine.remove(caregiver.id)
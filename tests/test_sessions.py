@@ -0,0 +1,22 @@
+import pytest
+
+from app.auth.sessions import InMemorySessionBackend, SessionBackend
+
+pytestmark = pytest.mark.anyio
+
+
+def test_backend_must_implement_the_interface():
+    class Partial(SessionBackend):
+        async def get(self, session_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+async def test_in_memory_backend_roundtrip():
+    backend = InMemorySessionBackend(maxsize=10, ttl=60)
+    await backend.set("sid", '{"state":1}', 60)
+    assert await backend.get("sid") == '{"state":1}'
+    await backend.delete("sid")
+    assert await backend.get("sid") is None
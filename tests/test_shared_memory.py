@@ -0,0 +1,42 @@
+import multiprocessing
+
+import pytest
+
+from app.cli import serve
+from app.utils.shared_memory import SharedSessionTable
+
+
+def test_session_roundtrip():
+    table = SharedSessionTable(slots=64, shards=4, value_bytes=64)
+    assert table.set("sid", b'{"state":1}', ttl=60)
+    assert table.get("sid") == b'{"state":1}'
+    assert table.set("sid", b"{}", ttl=60)
+    assert table.get("sid") == b"{}"
+    table.delete("sid")
+    assert table.get("sid") is None
+
+
+def test_expired_or_oversized_sessions_are_not_found():
+    table = SharedSessionTable(slots=64, shards=4, value_bytes=8)
+    assert not table.set("big", b"x" * 9, ttl=60)
+    assert table.get("big") is None
+    assert table.set("old", b"x", ttl=-1)
+    assert table.get("old") is None
+
+
+def _store(table, session_id):
+    table.set(session_id, b"from the child", ttl=60)
+
+
+def test_sessions_are_shared_with_forked_workers():
+    table = SharedSessionTable(slots=64, shards=4, value_bytes=64)
+    worker = multiprocessing.get_context("fork").Process(target=_store, args=(table, "sid"))
+    worker.start()
+    worker.join()
+    assert table.get("sid") == b"from the child"
+
+
+def test_serve_refuses_several_workers_with_in_memory_sessions(monkeypatch):
+    monkeypatch.setenv("SESSION_BACKEND", "memory")
+    with pytest.raises(SystemExit):
+        serve.main(["--workers", "2"])
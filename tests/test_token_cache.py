@@ -0,0 +1,38 @@
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_logout_evicts_the_cached_token(app):
+    from app.crud.user_crud import create_user
+    from app.database import SessionLocal
+    from app.models.user_model import AuthProvider
+    from app.schemas.user_schemas import UserCreate
+    from app.services.token_service import TokenService
+    from app.utils.auth_utils import _token_digest, decode_access_token, token_cache
+
+    email = f"cached-{uuid.uuid4().hex[:8]}@example.com"
+    async with SessionLocal() as db:
+        user = await create_user(db, UserCreate(email=email, auth_provider=AuthProvider.google))
+        tokens = await TokenService(db).issue(user)
+        payload = decode_access_token(tokens.access_token)
+        assert _token_digest(tokens.access_token) in token_cache
+
+        await TokenService(db).logout(payload, tokens.refresh_token)
+    assert _token_digest(tokens.access_token) not in token_cache
+
+
+async def test_revoke_cached_tokens_keeps_other_tokens(app):
+    from app.utils.auth_utils import (
+        _token_digest, create_access_token, decode_access_token, new_token_id, revoke_cached_tokens, token_cache,
+    )
+
+    revoked, kept = (create_access_token({"sub": "a@example.com", "role": "customer", "jti": new_token_id()})
+                     for _ in range(2))
+    revoked_jti = decode_access_token(revoked)["jti"]
+    decode_access_token(kept)
+    revoke_cached_tokens([revoked_jti])
+    assert _token_digest(revoked) not in token_cache
+    assert _token_digest(kept) in token_cache
@@ -0,0 +1,27 @@
+import pytest
+
+from app.auth.user_cache import InMemoryUserCacheBackend, UserCache, UserCacheBackend
+
+pytestmark = pytest.mark.anyio
+
+
+def test_backend_must_implement_the_interface():
+    class Partial(UserCacheBackend):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+async def test_password_hash_is_not_cached():
+    from app.models.user_model import AuthProvider, User, UserRole
+
+    backend = InMemoryUserCacheBackend(maxsize=10, ttl=60)
+    user = User(id=1, email="cached@example.com", hashed_password="$argon2id$secret", full_name="Cached",
+                role=UserRole.customer, is_active=True, is_verified=True, is_approved=False,
+                auth_provider=AuthProvider.email)
+    await UserCache(backend, ttl=60).set(user)
+    stored = await backend.get("cached@example.com")
+    assert stored["email"] == "cached@example.com"
+    assert "hashed_password" not in stored
@@ -0,0 +1,53 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.utils.batching import BatchLoader
+
+pytestmark = pytest.mark.anyio
+
+
+def counting_loader():
+    calls = []
+
+    async def batch_fn(keys):
+        calls.append(list(keys))
+        await asyncio.sleep(0.01)
+        return {key: f"value-{key}" for key in keys}
+
+    return BatchLoader("test", batch_fn), calls
+
+
+async def test_same_tick_lookups_share_one_query():
+    loader, calls = counting_loader()
+    results = await asyncio.gather(loader.load("a"), loader.load("b"), loader.load("a"))
+    assert results == ["value-a", "value-b", "value-a"]
+    assert calls == [["a", "b"]]
+
+
+async def test_lookup_does_not_join_a_query_already_running():
+    loader, calls = counting_loader()
+    first = asyncio.ensure_future(loader.load("a"))
+    await asyncio.sleep(0.001)  # the batch for "a" is now running
+    assert await loader.load("a") == "value-a"
+    assert await first == "value-a"
+    assert calls == [["a"], ["a"]]
+
+
+async def test_social_user_conflict_returns_the_existing_user(app):
+    from app.database import SessionLocal
+    from app.models.user_model import AuthProvider
+    from app.schemas.user_schemas import UserCreate
+    from app.services.user_service import UserService
+
+    email = f"social-{uuid.uuid4().hex[:8]}@example.com"
+    user_create = UserCreate(email=email, full_name="Social", auth_provider=AuthProvider.google, role="customer")
+    async with SessionLocal() as db:
+        created = await UserService(db)._create_social_user(user_create)
+        await db.commit()
+    async with SessionLocal() as db:
+        # ON CONFLICT DO NOTHING returns no row; the fallback must find the committed one
+        existing = await UserService(db)._create_social_user(user_create)
+    assert existing is not None
+    assert existing.id == created.id